@@ -1,29 +1,100 @@
 import os
+import signal
 
-from flask import Flask
-import requests
+from config import STARTUP_TRACE_MEMORY
+from mlrvalidator.startup_profile import parse_budgets, startup_profiler
 
-from mlrvalidator.validators.error_validator import ErrorValidator
-from mlrvalidator.validators.warning_validator import WarningValidator
+# The profiler is started before the application's dependencies are imported so that the imports are included
+startup_profiler.start(trace_memory=STARTUP_TRACE_MEMORY)
+
+with startup_profiler.phase('imports'):
+    from flask import Flask
+
+    from mlrvalidator.flask_restplus_jwt import JWTKeyProvider, VerifiedTokenCache
+    from mlrvalidator.metrics import ValidationMetrics
+    from mlrvalidator.reference_reload import ValidatorReloader, check_validator_set, load_validator_set
+    from mlrvalidator.result_cache import ResultCache
 
 application = Flask(__name__)
 
-application.config.from_object('config')
+with startup_profiler.phase('config'):
+    application.config.from_object('config')
 
-PROJECT_DIR = os.path.dirname(__file__)
-if os.path.exists(os.path.join(PROJECT_DIR, '.env')):
-    application.config.from_pyfile('.env')
+    PROJECT_DIR = os.path.dirname(__file__)
+    if os.path.exists(os.path.join(PROJECT_DIR, '.env')):
+        application.config.from_pyfile('.env')
 
+startup_budgets = parse_budgets(application.config['STARTUP_BUDGETS'])
+
+# The token keys are loaded from the cache and fetched in the background, so startup does not wait for them
 if application.config.get('AUTH_TOKEN_KEY_URL'):
-    resp = requests.get(application.config.get('AUTH_TOKEN_KEY_URL'), verify=application.config['AUTH_CERT_PATH'])
-    application.config['JWT_PUBLIC_KEY'] = resp.json()['value']
-    application.config['JWT_ALGORITHM'] = 'RS256'
+    with startup_profiler.phase('token_keys'):
+        jwt_key_provider = JWTKeyProvider(application.config['AUTH_TOKEN_KEY_URL'],
+                                          cache_path=application.config['AUTH_TOKEN_KEY_CACHE_PATH'],
+                                          verify=application.config['AUTH_CERT_PATH'],
+                                          timeout=application.config['AUTH_TOKEN_KEY_TIMEOUT'],
+                                          refresh_seconds=application.config['AUTH_TOKEN_KEY_REFRESH'],
+                                          max_backoff_seconds=application.config['AUTH_TOKEN_KEY_MAX_BACKOFF'])
+        jwt_key_provider.start()
+        application.config['JWT_ALGORITHM'] = 'RS256'
+else:
+    jwt_key_provider = None
+
+if application.config['TOKEN_CACHE_SIZE'] > 0:
+    token_cache = VerifiedTokenCache(application.config['TOKEN_CACHE_SIZE'])
+else:
+    token_cache = None
+
+validation_metrics = ValidationMetrics() if application.config['METRICS_ENABLED'] else None
+
+
+def _load_validator_set():
+    # The validation pool is created after the validators so that the worker processes share the loaded reference data
+    return load_validator_set(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'],
+                              metrics=validation_metrics, processes=application.config['VALIDATION_PROCESSES'],
+                              use_reference_store=application.config['REFERENCE_STORE_ENABLED'])
+
+
+def _on_validator_swap(validator_set):
+    if result_cache is not None:
+        result_cache.set_fingerprint(validator_set.version)
+
+
+with startup_profiler.phase('validators'):
+    validator_reloader = ValidatorReloader(_load_validator_set, on_swap=_on_validator_swap)
+
+# The application is only reported as ready by /health/ready once its validators have passed the same check as reloads
+with startup_profiler.phase('warm_up'):
+    try:
+        check_validator_set(validator_reloader.current)
+    except Exception:
+        application.logger.exception('The validators failed their check and will be reported as not ready')
+reference_registry = validator_reloader.current.reference_registry
+application.logger.info('Loaded {0} reference files, sharing them saved {1} bytes of reference data'.format(
+    len(reference_registry.paths), reference_registry.bytes_saved))
+
+if application.config['RESULT_CACHE_SIZE'] > 0:
+    result_cache = ResultCache(validator_reloader.current.version, application.config['RESULT_CACHE_SIZE'],
+                               ttl_seconds=application.config['RESULT_CACHE_TTL'])
+else:
+    result_cache = None
+
+# Sending SIGHUP to the process reloads the reference files, as does a POST to /admin/reload
+try:
+    signal.signal(signal.SIGHUP, lambda signum, frame: validator_reloader.reload())
+except (AttributeError, ValueError):
+    # SIGHUP is not available on Windows and handlers can only be installed from the main thread
+    pass
 
-error_validator = ErrorValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'])
-warning_validator = WarningValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'])
 
+with startup_profiler.phase('services'):
+    from mlrvalidator.services import *
 
-from mlrvalidator.services import *
+startup_profiler.finish()
+application.logger.info('Startup profile:\n{0}'.format(startup_profiler.format_report(startup_budgets)))
+for phase_name, phase_seconds, phase_budget in startup_profiler.check_budgets(startup_budgets):
+    application.logger.warning('Startup phase {0} took {1:.3f} seconds, more than its budget of {2} seconds'.format(
+        phase_name, phase_seconds, phase_budget))
 
 if __name__ == '__main__':
-    application.run()
\ No newline at end of file
+    application.run()
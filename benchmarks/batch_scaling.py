@@ -0,0 +1,95 @@
+'''
+Measures how batch validation throughput scales with the number of processes in a ValidationPool.
+
+Run from the project directory:
+    python -m benchmarks.batch_scaling
+'''
+import argparse
+import os
+import time
+
+import config
+from mlrvalidator.validation_pool import ValidationPool
+from mlrvalidator.validators.error_validator import ErrorValidator
+from mlrvalidator.validators.reference import ReferenceRegistry
+from mlrvalidator.validators.warning_validator import WarningValidator
+
+LOCATION = {
+    'agencyCode': 'USGS ',
+    'siteNumber': '433000089300001',
+    'stationName': 'Test well near Madison, WI',
+    'siteTypeCode': 'GW',
+    'countryCode': 'US',
+    'stateFipsCode': '55',
+    'countyCode': '025',
+    'districtCode': '55',
+    'latitude': ' 433000',
+    'longitude': ' 0893000',
+    'coordinateAccuracyCode': 'S',
+    'coordinateDatumCode': 'NAD83',
+    'coordinateMethodCode': 'M',
+    'altitude': '850',
+    'altitudeDatumCode': 'NAVD88',
+    'altitudeMethodCode': 'M',
+    'altitudeAccuracyValue': '10',
+    'hydrologicUnitCode': '07090001',
+    'firstConstructionDate': '19800101',
+    'siteEstablishmentDate': '19900101',
+    'holeDepth': '100',
+    'wellDepth': '90',
+    'primaryUseOfSiteCode': 'W',
+    'primaryUseOfWaterCode': 'H'
+}
+
+
+def make_items(count):
+    '''
+    :param int count:
+    :return: list of batch items, alternating between adds and updates of LOCATION
+    '''
+    items = []
+    for index in range(count):
+        ddot_location = dict(LOCATION, siteNumber='4330000893{0:05d}'.format(index))
+        if index % 2:
+            items.append({'ddotLocation': {'stationName': 'Renamed {0}'.format(index)},
+                          'existingLocation': ddot_location,
+                          'transactionType': 'update'})
+        else:
+            items.append({'ddotLocation': ddot_location, 'existingLocation': {}, 'transactionType': 'add'})
+    return items
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Benchmark batch validation throughput by number of processes')
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--max-processes', type=int, default=cpu_count)
+    args = parser.parse_args()
+
+    reference_registry = ReferenceRegistry()
+    error_validator = ErrorValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR, reference_registry=reference_registry)
+    warning_validator = WarningValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                         reference_registry=reference_registry)
+    items = make_items(args.items)
+
+    process_counts = sorted(set([1] + [2 ** n for n in range(1, args.max_processes.bit_length())] + [args.max_processes]))
+    print('{0} items, {1} cpus'.format(len(items), cpu_count))
+    print('  {0:>9} {1:>12} {2:>8}'.format('processes', 'items/sec', 'speedup'))
+    single_rate = None
+    for processes in process_counts:
+        pool = ValidationPool(error_validator, warning_validator, processes)
+        try:
+            # Start the workers before timing
+            pool.validate_batch(items[:processes * 2])
+            start = time.perf_counter()
+            pool.validate_batch(items)
+            rate = len(items) / (time.perf_counter() - start)
+        finally:
+            pool.close()
+
+        single_rate = single_rate or rate
+        print('  {0:>9} {1:>12.1f} {2:>7.2f}x'.format(processes, rate, rate / single_rate))
+
+
+if __name__ == '__main__':
+    main()
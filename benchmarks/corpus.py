@@ -0,0 +1,327 @@
+'''
+Generates a corpus of DDOT add and update transactions for the benchmarks by sampling the reference files, so that the
+locations exercise the same reference lookups as real submissions: coordinates inside the bounding box of a real
+county, hydrologic unit codes of the state, the attributes required by the site type and site type changes allowed by
+site_type_transition.json.
+
+Each item is a batch item, as accepted by /validators/batch, with two extra keys: expected, which is 'valid' or
+'invalid', and fault, the name of the fault added to an invalid item or None. Valid items have no errors, although
+they may have warnings.
+
+Write a corpus to a newline delimited json file from the project directory:
+    python -m benchmarks.corpus --count 1000 --output corpus.ndjson
+'''
+import argparse
+import json
+import os
+import random
+
+import config
+from mlrvalidator.validators.dms import CoordinateBounds
+
+# Fields which are always given a value from reference_lists.json
+REFERENCE_LIST_FIELDS = ['coordinateAccuracyCode', 'coordinateDatumCode', 'coordinateMethodCode', 'altitudeDatumCode',
+                         'altitudeMethodCode', 'timeZoneCode', 'siteWebReadyCode']
+
+# Fields which some site types require and others do not allow. Updates which change the site type copy them from a
+# location of the new site type.
+SITE_TYPE_DEPENDENT_FIELDS = ['dataReliabilityCode', 'holeDepth', 'wellDepth', 'sourceOfDepthCode', 'aquiferTypeCode',
+                              'drainageArea', 'contributingDrainageArea', 'nationalWaterUseCode']
+SITE_USE_FIELDS = ['primaryUseOfSiteCode', 'secondaryUseOfSiteCode', 'tertiaryUseOfSiteCode']
+
+
+def _load(reference_dir, name):
+    with open(os.path.join(reference_dir, name)) as fd:
+        return json.load(fd)
+
+
+def format_latitude(hundredths):
+    '''
+    :param int hundredths: latitude in hundredths of a second
+    :return: str - [-]DDMMSS with a leading space for positive latitudes
+    '''
+    seconds = abs(hundredths) // 100
+    return '{0}{1:02d}{2:02d}{3:02d}'.format('-' if hundredths < 0 else ' ', seconds // 3600, seconds // 60 % 60,
+                                             seconds % 60)
+
+
+def format_longitude(hundredths):
+    '''
+    :param int hundredths: longitude in hundredths of a second, positive to the west
+    :return: str - [-]DDDMMSS with a leading space for positive longitudes
+    '''
+    seconds = abs(hundredths) // 100
+    return '{0}{1:03d}{2:02d}{3:02d}'.format('-' if hundredths < 0 else ' ', seconds // 3600, seconds // 60 % 60,
+                                             seconds % 60)
+
+
+class CorpusGenerator:
+    '''
+    Generates locations from the reference files in reference_dir. The same seed always generates the same corpus.
+    '''
+
+    FAULTS = ['latitude_format', 'outside_state', 'county_code', 'hydrologic_unit_code', 'missing_required_field',
+              'reference_code', 'site_dates', 'site_type_attributes']
+    UPDATE_FAULTS = ['site_type_transition', 'reference_code', 'latitude_format']
+
+    def __init__(self, reference_dir=config.REFERENCE_FILE_DIR, seed=0):
+        self._random = random.Random(seed)
+        self._reference_lists = _load(reference_dir, 'reference_lists.json')
+        invalid_site_types = set(_load(reference_dir, 'site_type_invalid.json')['siteTypeInvalidCode'])
+
+        states = {}
+        for country in _load(reference_dir, 'state.json')['countries']:
+            for state in country['states']:
+                states[(country['countryCode'], state['stateFipsCode'])] = state
+
+        hucs = {}
+        for country in _load(reference_dir, 'huc.json')['countries']:
+            for state in country['states']:
+                # Codes of at least 8 digits, as used by most sites
+                codes = [code for code in state['hydrologicUnitCodes'] if len(code) >= 8]
+                if codes:
+                    hucs[(country['countryCode'], state['stateFipsCode'])] = codes
+
+        # Counties of the United States whose box is inside the box of their state, so that a point in the county box
+        # is valid for both the state and the county
+        self._counties = []
+        for country in _load(reference_dir, 'county.json')['countries']:
+            if country['countryCode'] != 'US':
+                continue
+            for state in country['states']:
+                key = ('US', state['stateFipsCode'])
+                if key not in states or key not in hucs or state['stateFipsCode'] not in \
+                        self._reference_lists['districtCode']:
+                    continue
+                state_bounds = CoordinateBounds.from_attributes(states[key], 'state')
+                for county in state['counties']:
+                    bounds = CoordinateBounds.from_attributes(county, 'county')
+                    if county['countyCode'] == '000' or not (bounds.has_latitudes and bounds.has_longitudes) or \
+                            bounds.crosses_180th_meridian:
+                        continue
+                    if not (state_bounds.contains_latitude(bounds.min_latitude) and
+                            state_bounds.contains_latitude(bounds.max_latitude) and
+                            state_bounds.contains_longitude(bounds.min_longitude) and
+                            state_bounds.contains_longitude(bounds.max_longitude)):
+                        continue
+                    self._counties.append((state['stateFipsCode'], county['countyCode'], bounds, states[key]))
+        self._hucs = hucs
+
+        site_number_formats = {}
+        for site_number_format in _load(reference_dir, 'site_number_format.json')['siteNumberFormatCodes']:
+            for site_type_code in site_number_format['siteTypeCode']:
+                site_number_formats[site_type_code] = site_number_format['siteNumberFormatCode']
+        self._site_number_formats = site_number_formats
+
+        national_water_use = {site_type['siteTypeCode']: site_type['nationalWaterUseCodes']
+                              for site_type in _load(reference_dir, 'national_water_use.json')['siteTypeCodes']}
+        self._national_water_use = national_water_use
+
+        self._site_types = {site_type['siteTypeCode']: site_type
+                            for site_type in _load(reference_dir, 'site_type_cross_field.json')['siteTypeCodes']
+                            if site_type['siteTypeCode'] in self._reference_lists['siteTypeCode'] and
+                            site_type['siteTypeCode'] not in invalid_site_types}
+        self._site_type_codes = sorted(self._site_types)
+        self._transitions = {transition['existingField']: [code for code in transition['newFields']
+                                                           if code in self._site_types]
+                             for transition in _load(reference_dir, 'site_type_transition.json')
+                             if transition['existingField'] in self._site_types}
+        self._transitions = {code: new_codes for code, new_codes in self._transitions.items() if new_codes}
+
+    def _choice(self, values):
+        return self._random.choice(values)
+
+    def _site_number(self, site_type_code):
+        if self._site_number_formats.get(site_type_code) in ('WU', 'LLWU'):
+            return '9' + ''.join(self._choice('0123456789') for _ in range(14))
+        return ''.join(self._choice('0123456789') for _ in range(15))
+
+    def _point_in(self, bounds):
+        return (self._random.randint(bounds.min_latitude, bounds.max_latitude) // 100 * 100,
+                self._random.randint(bounds.min_longitude, bounds.max_longitude) // 100 * 100)
+
+    def valid_location(self, index, site_type_code=None):
+        '''
+        :param int index: used to make the station name unique
+        :param str site_type_code: If not specified, a site type is chosen at random.
+        :return: dict - a location with no errors
+        '''
+        if site_type_code is None:
+            site_type_code = self._choice(self._site_type_codes)
+        site_type = self._site_types[site_type_code]
+        state_code, county_code, county_bounds, state = self._choice(self._counties)
+        # Points on the edge of the county box may be rounded outside of it, so the box is shrunk by a second
+        latitude, longitude = self._point_in(CoordinateBounds(county_bounds.min_latitude + 100,
+                                                              county_bounds.max_latitude - 100,
+                                                              county_bounds.min_longitude + 100,
+                                                              county_bounds.max_longitude - 100))
+
+        location = {
+            'agencyCode': 'USGS ',
+            'siteNumber': self._site_number(site_type_code),
+            'stationName': 'Benchmark station {0}'.format(index),
+            'stationIx': 'BENCHMARKSTATION{0}'.format(index),
+            'siteTypeCode': site_type_code,
+            'countryCode': 'US',
+            'stateFipsCode': state_code,
+            'countyCode': county_code,
+            'districtCode': state_code,
+            'latitude': format_latitude(latitude),
+            'longitude': format_longitude(longitude),
+            'hydrologicUnitCode': self._choice(self._hucs[('US', state_code)]),
+            'daylightSavingsTimeFlag': self._choice(['Y', 'N'])
+        }
+        for field in REFERENCE_LIST_FIELDS:
+            location[field] = self._choice(self._reference_lists[field])
+
+        try:
+            min_altitude, max_altitude = int(state['state_min_alt_va']), int(state['state_max_alt_va'])
+        except ValueError:
+            min_altitude, max_altitude = 0, 100
+        location['altitude'] = str(self._random.randint(min_altitude, max(min_altitude, max_altitude)))
+        location['altitudeAccuracyValue'] = str(self._random.randint(1, 20))
+
+        construction_year = self._random.randint(1900, 2010)
+        location['firstConstructionDate'] = '{0}0101'.format(construction_year)
+        location['siteEstablishmentDate'] = '{0}0615'.format(self._random.randint(construction_year, 2017))
+
+        null_fields = set(site_type['nullAttrs'])
+        for field in site_type['notNullAttrs']:
+            if field in location:
+                continue
+            elif field == 'secondaryUseOfSiteCode' or field == 'tertiaryUseOfSiteCode':
+                uses = self._random.sample(self._reference_lists['primaryUseOfSiteCode'], 3)
+                location.update(zip(SITE_USE_FIELDS, uses))
+            elif field in self._reference_lists:
+                location.setdefault(field, self._choice(self._reference_lists[field]))
+        if 'holeDepth' not in null_fields and 'wellDepth' not in null_fields:
+            hole_depth = self._random.randint(20, 500)
+            location['holeDepth'] = str(hole_depth)
+            location['wellDepth'] = str(self._random.randint(10, hole_depth))
+        if 'nationalWaterUseCode' not in null_fields and self._national_water_use.get(site_type_code):
+            location['nationalWaterUseCode'] = self._choice(self._national_water_use[site_type_code])
+
+        for field in null_fields:
+            location.pop(field, None)
+        return location
+
+    def _add_fault(self, location, fault):
+        '''
+        Changes location so that it has an error
+        :param dict location:
+        :param str fault: one of FAULTS
+        '''
+        if fault == 'latitude_format':
+            location['latitude'] = location['latitude'][:3] + '7' + location['latitude'][4:]
+        elif fault == 'outside_state':
+            other_state = self._choice([county for county in self._counties if county[0] != location['stateFipsCode']])
+            latitude, longitude = self._point_in(other_state[2])
+            location['latitude'] = format_latitude(latitude)
+            location['longitude'] = format_longitude(longitude)
+        elif fault == 'county_code':
+            location['countyCode'] = '999'
+        elif fault == 'hydrologic_unit_code':
+            location['hydrologicUnitCode'] = location['hydrologicUnitCode'][:-2] + '98'
+        elif fault == 'missing_required_field':
+            del location[self._choice(['stationName', 'siteWebReadyCode', 'timeZoneCode'])]
+        elif fault == 'reference_code':
+            location[self._choice(REFERENCE_LIST_FIELDS)] = '#'
+        elif fault == 'site_dates':
+            location['firstConstructionDate'], location['siteEstablishmentDate'] = \
+                '20170101', location['firstConstructionDate']
+        elif fault == 'site_type_attributes':
+            null_fields = self._site_types[location['siteTypeCode']]['nullAttrs'] + ['secondaryUseOfSiteCode']
+            for field in [field for field in null_fields if field not in location][:1]:
+                location[field] = self._choice(self._reference_lists.get(field, ['A']))
+        return location
+
+    def add_item(self, index, fault=None):
+        '''
+        :param int index:
+        :param str fault: one of FAULTS. If specified, the location has this error.
+        :return: dict - batch item adding a location
+        '''
+        location = self.valid_location(index)
+        if fault is not None:
+            self._add_fault(location, fault)
+        return {'transactionType': 'add', 'ddotLocation': location, 'existingLocation': {},
+                'expected': 'valid' if fault is None else 'invalid', 'fault': fault}
+
+    def update_item(self, index, fault=None):
+        '''
+        :param int index:
+        :param str fault: one of UPDATE_FAULTS. If specified, the update has this error.
+        :return: dict - batch item updating an existing location. Valid updates either change the site type to one
+            allowed by site_type_transition.json or change the station name and altitude.
+        '''
+        if fault == 'site_type_transition' or (fault is None and self._random.random() < 0.5):
+            if fault is None:
+                site_type_code = self._choice(sorted(self._transitions))
+            else:
+                site_type_code = self._choice([code for code in sorted(self._transitions)
+                                               if len(self._transitions[code]) < len(self._site_type_codes) - 1])
+            existing_location = self.valid_location(index, site_type_code=site_type_code)
+            if fault is None:
+                new_site_type_code = self._choice(self._transitions[site_type_code])
+            else:
+                new_site_type_code = self._choice([code for code in self._site_type_codes
+                                                   if code not in self._transitions[site_type_code] and
+                                                   code != site_type_code])
+            new_location = self.valid_location(index, site_type_code=new_site_type_code)
+            ddot_location = {'siteTypeCode': new_site_type_code}
+            for field in SITE_TYPE_DEPENDENT_FIELDS:
+                if existing_location.get(field) != new_location.get(field):
+                    ddot_location[field] = new_location.get(field, '')
+            if any(existing_location.get(field) != new_location.get(field) for field in SITE_USE_FIELDS):
+                for field in SITE_USE_FIELDS:
+                    ddot_location[field] = new_location.get(field, '')
+        else:
+            existing_location = self.valid_location(index)
+            ddot_location = {'stationName': 'Renamed benchmark station {0}'.format(index),
+                             'altitude': existing_location['altitude']}
+            if fault is not None:
+                ddot_location['latitude'] = existing_location['latitude']
+                self._add_fault(ddot_location, fault)
+
+        ddot_location.update({'agencyCode': existing_location['agencyCode'],
+                              'siteNumber': existing_location['siteNumber']})
+        return {'transactionType': 'update', 'ddotLocation': ddot_location, 'existingLocation': existing_location,
+                'expected': 'valid' if fault is None else 'invalid', 'fault': fault}
+
+    def generate(self, count, invalid_fraction=0.25, update_fraction=0.5):
+        '''
+        :param int count: number of items
+        :param float invalid_fraction: fraction of the items which have an error
+        :param float update_fraction: fraction of the items which are updates
+        :return: list of dict - batch items
+        '''
+        items = []
+        for index in range(count):
+            invalid = self._random.random() < invalid_fraction
+            if self._random.random() < update_fraction:
+                items.append(self.update_item(index, self._choice(self.UPDATE_FAULTS) if invalid else None))
+            else:
+                items.append(self.add_item(index, self._choice(self.FAULTS) if invalid else None))
+        return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a corpus of DDOT transactions from the reference files')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--invalid-fraction', type=float, default=0.25)
+    parser.add_argument('--update-fraction', type=float, default=0.5)
+    parser.add_argument('--output', default='corpus.ndjson', help='newline delimited json file to write')
+    args = parser.parse_args()
+
+    items = CorpusGenerator(seed=args.seed).generate(args.count, invalid_fraction=args.invalid_fraction,
+                                                     update_fraction=args.update_fraction)
+    with open(args.output, 'w') as fd:
+        for item in items:
+            fd.write(json.dumps(item))
+            fd.write('\n')
+    print('Wrote {0} items to {1}'.format(len(items), args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+'''
+Compares the memory used by, and the membership test speed of, the hydrologic unit code lists in huc.json against
+mlrvalidator.validators.reference.HydrologicUnitCodeIndex for every US state.
+
+Run from the project directory:
+    python -m benchmarks.huc_index
+'''
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+import config
+from mlrvalidator.validators.reference import HydrologicUnitCodeIndex
+
+
+def size_of_list(codes):
+    return sys.getsizeof(codes) + sum(sys.getsizeof(code) for code in codes)
+
+
+def size_of_frozenset(codes):
+    return sys.getsizeof(codes) + sum(sys.getsizeof(code) for code in codes)
+
+
+def size_of_index(huc_index):
+    return sys.getsizeof(huc_index) + sys.getsizeof(huc_index.__dict__) + \
+        sys.getsizeof(huc_index._codes_by_length) + \
+        sum(sys.getsizeof(codes) for codes in huc_index._codes_by_length.values())
+
+
+def _time_lookups(container, lookups, repeat):
+    best = min(timeit.repeat(lambda: [code in container for code in lookups], number=1, repeat=repeat))
+    return best / len(lookups) * 1e6
+
+
+def _misses(codes):
+    code_set = set(codes)
+    misses = []
+    for code in codes:
+        miss = code[:-1] + str((int(code[-1]) + 5) % 10)
+        if miss not in code_set:
+            misses.append(miss)
+    return misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hydrologic unit code index')
+    parser.add_argument('--reference-dir', default=config.REFERENCE_FILE_DIR)
+    parser.add_argument('--lookups', type=int, default=200, help='Number of hits and misses to look up in each state')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with open(os.path.join(args.reference_dir, 'huc.json')) as fd:
+        huc_reference = json.loads(fd.read())
+    us_states = next(country['states'] for country in huc_reference['countries'] if country['countryCode'] == 'US')
+
+    totals = {'list_bytes': 0, 'set_bytes': 0, 'index_bytes': 0, 'list_us': 0, 'set_us': 0, 'index_us': 0, 'prefix_us': 0}
+    print('{0:>5} {1:>7} {2:>12} {3:>12} {4:>12} {5:>10} {6:>10} {7:>10}'.format(
+        'state', 'codes', 'list bytes', 'set bytes', 'index bytes', 'list us', 'set us', 'index us'))
+    for state in us_states:
+        codes = state['hydrologicUnitCodes']
+        code_set = frozenset(codes)
+        huc_index = HydrologicUnitCodeIndex(codes)
+
+        lookups = random.sample(codes, min(args.lookups, len(codes)))
+        misses = _misses(lookups)
+        lookups = lookups + misses
+
+        row = {
+            'list_bytes': size_of_list(codes),
+            'set_bytes': size_of_frozenset(code_set),
+            'index_bytes': size_of_index(huc_index),
+            'list_us': _time_lookups(codes, lookups, args.repeat),
+            'set_us': _time_lookups(code_set, lookups, args.repeat),
+            'index_us': _time_lookups(huc_index, lookups, args.repeat)
+        }
+        prefix_time = min(timeit.repeat(lambda: [huc_index.longest_prefix(code) for code in misses], number=1, repeat=args.repeat))
+        row['prefix_us'] = prefix_time / max(len(misses), 1) * 1e6
+        for key in totals:
+            totals[key] += row[key]
+
+        print('{0:>5} {1:>7} {2:>12} {3:>12} {4:>12} {5:>10.2f} {6:>10.2f} {7:>10.2f}'.format(
+            state['stateFipsCode'], len(codes), row['list_bytes'], row['set_bytes'], row['index_bytes'],
+            row['list_us'], row['set_us'], row['index_us']))
+
+    state_count = len(us_states)
+    print()
+    print('Total bytes: list {0}, frozenset {1}, index {2} ({3:.1f}% of list)'.format(
+        totals['list_bytes'], totals['set_bytes'], totals['index_bytes'],
+        100.0 * totals['index_bytes'] / totals['list_bytes']))
+    print('Mean us/lookup: list {0:.2f}, frozenset {1:.2f}, index {2:.2f}, longest prefix of a miss {3:.2f}'.format(
+        totals['list_us'] / state_count, totals['set_us'] / state_count, totals['index_us'] / state_count,
+        totals['prefix_us'] / state_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+'''
+Measures the cost of timing every validation rule and stage with ValidationMetrics.
+
+Run from the project directory:
+    python -m benchmarks.metrics_overhead
+'''
+import argparse
+import timeit
+
+import config
+from benchmarks.batch_scaling import make_items
+from mlrvalidator.batch import validate_batch
+from mlrvalidator.metrics import ValidationMetrics
+from mlrvalidator.validators.error_validator import ErrorValidator
+from mlrvalidator.validators.reference import ReferenceRegistry
+from mlrvalidator.validators.warning_validator import WarningValidator
+
+
+def make_validators(reference_registry, metrics=None):
+    error_validator = ErrorValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                     reference_registry=reference_registry, metrics=metrics)
+    warning_validator = WarningValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                         reference_registry=reference_registry, metrics=metrics)
+    return error_validator, warning_validator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the overhead of validation metrics')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    reference_registry = ReferenceRegistry()
+    metrics = ValidationMetrics()
+    plain_validators = make_validators(reference_registry)
+    instrumented_validators = make_validators(reference_registry, metrics=metrics)
+    items = make_items(args.items)
+
+    print('{0} items'.format(len(items)))
+    runs = [('disabled', plain_validators), ('enabled', instrumented_validators)]
+    best_times = {}
+    # Alternate the runs so that both see the same warm up and background load
+    for repeat in range(args.repeat):
+        for label, (error_validator, warning_validator) in runs:
+            elapsed = timeit.timeit(lambda: validate_batch(error_validator, warning_validator, items), number=1)
+            best_times[label] = min(elapsed, best_times.get(label, elapsed))
+
+    times = {}
+    for label, validators in runs:
+        times[label] = best_times[label] / len(items) * 1e6
+        print('  metrics {0:<9} {1:10.1f} us/item'.format(label, times[label]))
+    print('  overhead {0:17.1f}%'.format((times['enabled'] / times['disabled'] - 1) * 100))
+    print('  {0} timed rules and stages'.format(metrics.render().count('_calls_total{')))
+
+
+if __name__ == '__main__':
+    main()
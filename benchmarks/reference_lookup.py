@@ -0,0 +1,109 @@
+'''
+Compares the indexed lookups in mlrvalidator.validators.reference against the linear get_dict scans that they replaced.
+
+Run from the project directory:
+    python -m benchmarks.reference_lookup
+'''
+import argparse
+import os
+import random
+import timeit
+
+import config
+from mlrvalidator.utils import get_dict
+from mlrvalidator.validators.reference import Counties, CountryStateReference, States
+
+
+def scan_list_by_country_state(reference_info, ref_list_key, country_code, state_code):
+    state_list = get_dict(reference_info['countries'], 'countryCode', country_code).get('states', [])
+    return get_dict(state_list, 'stateFipsCode', state_code).get(ref_list_key, [])
+
+
+def scan_county_attributes(reference_info, country_code, state_code, county_code):
+    county_list = scan_list_by_country_state(reference_info, 'counties', country_code, state_code)
+    return get_dict(county_list, 'countyCode', county_code)
+
+
+def scan_state_attributes(reference_info, country_code, state_code):
+    state_list = get_dict(reference_info['countries'], 'countryCode', country_code).get('states', [])
+    return get_dict(state_list, 'stateFipsCode', state_code)
+
+
+def _sample_country_state_values(reference, ref_list_key, sample_size):
+    samples = []
+    for country in reference.reference_info['countries']:
+        for state in country['states']:
+            for value in state.get(ref_list_key, []):
+                samples.append((country['countryCode'], state['stateFipsCode'], value))
+    return random.sample(samples, min(sample_size, len(samples)))
+
+
+def _time(label, fnc, samples, repeat):
+    best = min(timeit.repeat(lambda: [fnc(*sample) for sample in samples], number=1, repeat=repeat))
+    per_lookup = best / len(samples) * 1e6
+    print('  {0:<10} {1:10.3f} us/lookup'.format(label, per_lookup))
+    return per_lookup
+
+
+def _compare(title, scan, indexed, samples, repeat):
+    print('{0} ({1} lookups)'.format(title, len(samples)))
+    scan_time = _time('scan', scan, samples, repeat)
+    indexed_time = _time('indexed', indexed, samples, repeat)
+    print('  speedup    {0:10.1f}x'.format(scan_time / indexed_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reference lookups')
+    parser.add_argument('--reference-dir', default=config.REFERENCE_FILE_DIR)
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    huc_ref = CountryStateReference(os.path.join(args.reference_dir, 'huc.json'), 'hydrologicUnitCodes')
+    huc_samples = _sample_country_state_values(huc_ref, 'hydrologicUnitCodes', args.samples)
+    _compare(
+        'huc.json membership',
+        lambda country, state, huc: huc in scan_list_by_country_state(huc_ref.reference_info, 'hydrologicUnitCodes', country, state),
+        lambda country, state, huc: huc in huc_ref.get_set_by_country_state(country, state),
+        huc_samples,
+        args.repeat
+    )
+
+    counties_ref = Counties(os.path.join(args.reference_dir, 'county.json'))
+    county_samples = [(country, state, county['countyCode'])
+                      for country, state, county in _sample_country_state_values(counties_ref, 'counties', args.samples)]
+    _compare(
+        'county.json attributes',
+        lambda country, state, county: scan_county_attributes(counties_ref.reference_info, country, state, county),
+        counties_ref.get_county_attributes,
+        county_samples,
+        args.repeat
+    )
+
+    mcd_ref = Counties(os.path.join(args.reference_dir, 'mcd.json'))
+    mcd_samples = [(country, state, county['countyCode'])
+                   for country, state, county in _sample_country_state_values(mcd_ref, 'counties', args.samples)]
+    _compare(
+        'mcd.json attributes',
+        lambda country, state, county: scan_county_attributes(mcd_ref.reference_info, country, state, county),
+        mcd_ref.get_county_attributes,
+        mcd_samples,
+        args.repeat
+    )
+
+    states_ref = States(os.path.join(args.reference_dir, 'state.json'))
+    state_samples = [(country['countryCode'], state['stateFipsCode'])
+                     for country in states_ref.reference_info['countries'] for state in country['states']]
+    _compare(
+        'state.json attributes',
+        lambda country, state: scan_state_attributes(states_ref.reference_info, country, state),
+        states_ref.get_state_attributes,
+        state_samples,
+        args.repeat
+    )
+
+
+if __name__ == '__main__':
+    main()
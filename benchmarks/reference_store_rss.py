@@ -0,0 +1,93 @@
+'''
+Measures the memory used by each worker process when every worker builds its own validators, as the workers of a
+pre-forking server do, with the references loaded into dictionaries and with the references read from the shared
+ReferenceStore.
+
+RSS counts the shared pages of the store in every worker, so the proportional set size (PSS), which divides each
+shared page between the processes using it, is also reported. Needs Linux for /proc/self/smaps.
+
+Run from the project directory:
+    python -m benchmarks.reference_store_rss
+'''
+import argparse
+import multiprocessing
+import os
+
+import config
+from benchmarks.batch_scaling import make_items
+from mlrvalidator.batch import validate_batch
+from mlrvalidator.validators.error_validator import ErrorValidator
+from mlrvalidator.validators.reference import ReferenceRegistry
+from mlrvalidator.validators.reference_store import build_store, get_store
+from mlrvalidator.validators.warning_validator import WarningValidator
+
+
+def memory_usage():
+    '''
+    :return: tuple of the RSS, PSS and private memory of the calling process in kB
+    '''
+    totals = {'Rss': 0, 'Pss': 0, 'Private_Clean': 0, 'Private_Dirty': 0}
+    with open('/proc/self/smaps') as fd:
+        for line in fd:
+            name, _, value = line.partition(':')
+            if name in totals:
+                totals[name] += int(value.split()[0])
+    return totals['Rss'], totals['Pss'], totals['Private_Clean'] + totals['Private_Dirty']
+
+
+def _worker(use_store, items, barrier, results):
+    reference_registry = ReferenceRegistry(use_store=use_store)
+    error_validator = ErrorValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                     reference_registry=reference_registry)
+    warning_validator = WarningValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                         reference_registry=reference_registry)
+    validate_batch(error_validator, warning_validator, items)
+
+    # Measure once every worker has loaded its references so that the shared pages are divided between all of them
+    barrier.wait()
+    results.put(memory_usage())
+    barrier.wait()
+
+
+def measure(use_store, workers, items):
+    '''
+    :return: list of (rss, pss, private) in kB for each worker
+    '''
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(use_store, items, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    usages = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return usages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memory used by each worker with and without the '
+                                                 'shared reference store')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--items', type=int, default=200)
+    args = parser.parse_args()
+
+    store = get_store(config.REFERENCE_FILE_DIR)
+    if store is None or \
+            not all(store.is_current(os.path.join(config.REFERENCE_FILE_DIR, name)) for name in store.files):
+        print('Building the reference store in {0}'.format(config.REFERENCE_FILE_DIR))
+        build_store(config.REFERENCE_FILE_DIR)
+
+    items = make_items(args.items)
+    print('{0:>12} {1:>8} {2:>12} {3:>12} {4:>12} {5:>12}'.format(
+        'references', 'workers', 'RSS MB', 'PSS MB', 'private MB', 'total PSS MB'))
+    for workers in args.workers:
+        for use_store in [False, True]:
+            usages = measure(use_store, workers, items)
+            rss, pss, private = [sum(usage[index] for usage in usages) / len(usages) / 1024 for index in range(3)]
+            print('{0:>12} {1:>8} {2:>12.1f} {3:>12.1f} {4:>12.1f} {5:>12.1f}'.format(
+                'store' if use_store else 'dicts', workers, rss, pss, private, pss * workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+'''
+Compares the latency of single field validation with the compiled schemas against validation with Cerberus.
+
+Run from the project directory:
+    python -m benchmarks.single_field_compiled
+'''
+import argparse
+import timeit
+
+import config
+from benchmarks.batch_scaling import make_items
+from mlrvalidator.validators.error_validator import ErrorValidator
+from mlrvalidator.validators.reference import ReferenceRegistry
+from mlrvalidator.validators.warning_validator import WarningValidator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compiled single field validation against Cerberus')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    reference_registry = ReferenceRegistry()
+    validators = [
+        ErrorValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR, reference_registry=reference_registry),
+        WarningValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR, reference_registry=reference_registry)
+    ]
+    items = make_items(args.items)
+
+    print('{0} items'.format(len(items)))
+    for validator in validators:
+        single_field_validator = validator.single_field_validator
+        documents = [(item['ddotLocation'], item['transactionType'] == 'update') for item in items]
+
+        def validate_cerberus():
+            for document, update in documents:
+                single_field_validator.validate(document, update=update)
+
+        def validate_compiled():
+            for document, update in documents:
+                single_field_validator.compiled_schema.validate(document, update=update)
+
+        cerberus_time = min(timeit.repeat(validate_cerberus, number=1, repeat=args.repeat)) / len(documents) * 1e6
+        compiled_time = min(timeit.repeat(validate_compiled, number=1, repeat=args.repeat)) / len(documents) * 1e6
+        print('  {0}'.format(type(validator).__name__))
+        print('    cerberus {0:10.1f} us/item'.format(cerberus_time))
+        print('    compiled {0:10.1f} us/item'.format(compiled_time))
+        print('    speedup  {0:10.1f}x'.format(cerberus_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main()
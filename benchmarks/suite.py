@@ -0,0 +1,188 @@
+'''
+Times the validators and the Flask request path on a corpus generated by benchmarks.corpus and writes the results to a
+json file. Results can be compared against the results of an earlier run, saved as a baseline, to catch regressions.
+
+Run from the project directory:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.15
+
+The run exits with status 1 if any benchmark is slower than its baseline by more than the threshold. Only compare
+results from the same machine, and use --items and --repeat values large enough to give stable timings.
+'''
+import argparse
+from datetime import datetime, timezone
+import json
+import platform
+import statistics
+import sys
+import time
+
+import jwt
+
+import config
+from benchmarks.corpus import CorpusGenerator
+from mlrvalidator.validators.error_validator import ErrorValidator
+from mlrvalidator.validators.reference import ReferenceRegistry
+from mlrvalidator.validators.validation_context import ValidationContext
+from mlrvalidator.validators.warning_validator import WarningValidator
+
+RESULTS_FORMAT_VERSION = 1
+
+
+def _contexts(items):
+    return [ValidationContext(item['ddotLocation'], item['existingLocation'],
+                              update=item['transactionType'] == 'update') for item in items]
+
+
+def make_benchmarks(items):
+    '''
+    :param list of dict items: corpus items
+    :return: list of (name, function) - each function validates every item once
+    '''
+    reference_registry = ReferenceRegistry()
+    error_validator = ErrorValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                     reference_registry=reference_registry)
+    warning_validator = WarningValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                         reference_registry=reference_registry)
+    transactions = [(item['ddotLocation'], item['existingLocation'], item['transactionType'] == 'update')
+                    for item in items]
+
+    def validate(validator):
+        def run():
+            for ddot_location, existing_location, update in transactions:
+                validator.validate(ddot_location, existing_location, update=update)
+        return run
+
+    def validate_contexts(validator):
+        # Contexts are made for every run so that none of their cached values are reused
+        def run():
+            for context in _contexts(items):
+                validator.validate_context(context)
+        return run
+
+    benchmarks = [
+        ('error_validator', validate(error_validator)),
+        ('warning_validator', validate(warning_validator)),
+        ('error.cross_field', validate_contexts(error_validator.cross_field_validator)),
+        ('error.cross_field_ref', validate_contexts(error_validator.cross_field_ref_validator)),
+        ('error.transition', validate_contexts(error_validator.transition_validator)),
+        ('warning.cross_field_ref', validate_contexts(warning_validator.cross_field_ref_validator)),
+        ('validation_context', lambda: _contexts(items)),
+        ('flask_request', make_request_benchmark(items))
+    ]
+    return benchmarks
+
+
+def make_request_benchmark(items):
+    '''
+    :return: function which posts every item to /validators/add or /validators/update with the Flask test client
+    '''
+    import app
+    # Importing services registers the routes
+    from mlrvalidator import services
+
+    app.application.config['JWT_SECRET_KEY'] = 'benchmark'
+    app.application.config['JWT_PUBLIC_KEY'] = None
+    app.application.config['JWT_ALGORITHM'] = 'HS256'
+    app.application.config['JWT_DECODE_AUDIENCE'] = None
+    client = app.application.test_client()
+    headers = {'Authorization': 'Bearer {0}'.format(jwt.encode({}, 'benchmark').decode('utf-8'))}
+    requests = [('/validators/update' if item['transactionType'] == 'update' else '/validators/add',
+                 json.dumps({'ddotLocation': item['ddotLocation'], 'existingLocation': item['existingLocation']}))
+                for item in items]
+
+    def run():
+        for url, data in requests:
+            response = client.post(url, data=data, content_type='application/json', headers=headers)
+            if response.status_code != 200:
+                raise RuntimeError('{0} returned {1}: {2}'.format(url, response.status_code, response.data))
+    return run
+
+
+def run_benchmarks(benchmarks, item_count, repeat):
+    '''
+    :param list benchmarks: (name, function) as returned by make_benchmarks
+    :param int item_count: number of items validated by each call of a function
+    :param int repeat: number of times to call each function
+    :return: dict of name to the minimum and median time per item in microseconds
+    '''
+    results = {}
+    for name, function in benchmarks:
+        function()  # warm up
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append((time.perf_counter() - start) / item_count * 1e6)
+        results[name] = {'minUs': min(times), 'medianUs': statistics.median(times)}
+    return results
+
+
+def compare(results, baseline, threshold):
+    '''
+    :param dict results: results written by this module
+    :param dict baseline: earlier results to compare against
+    :param float threshold: a benchmark has regressed if its median is more than this fraction slower than the
+        baseline
+    :return: list of (name, baseline median, median, change, regressed) for each benchmark in both results
+    '''
+    comparisons = []
+    for name, result in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+        baseline_median = baseline['benchmarks'][name]['medianUs']
+        change = result['medianUs'] / baseline_median - 1
+        comparisons.append((name, baseline_median, result['medianUs'], change, change > threshold))
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the validators on a generated corpus')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help='names of the benchmarks to run')
+    parser.add_argument('--output', default='benchmark_results.json', help='json file to write the results to')
+    parser.add_argument('--baseline', help='json results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='fraction by which a benchmark may be slower than the baseline')
+    args = parser.parse_args()
+
+    items = CorpusGenerator(seed=args.seed).generate(args.items)
+    benchmarks = make_benchmarks(items)
+    if args.only:
+        benchmarks = [(name, function) for name, function in benchmarks if name in args.only]
+
+    results = {
+        'formatVersion': RESULTS_FORMAT_VERSION,
+        'createdAt': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'items': len(items),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'benchmarks': run_benchmarks(benchmarks, len(items), args.repeat)
+    }
+    with open(args.output, 'w') as fd:
+        json.dump(results, fd, indent=2, sort_keys=True)
+
+    print('{0} items, {1} runs each. Results written to {2}'.format(len(items), args.repeat, args.output))
+    print('  {0:<24} {1:>12} {2:>12}'.format('benchmark', 'min us/item', 'median us/item'))
+    for name, result in results['benchmarks'].items():
+        print('  {0:<24} {1:>12.1f} {2:>12.1f}'.format(name, result['minUs'], result['medianUs']))
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)
+        comparisons = compare(results, baseline, args.threshold)
+        print('Compared with {0}, threshold {1:.0%}'.format(args.baseline, args.threshold))
+        print('  {0:<24} {1:>12} {2:>12} {3:>8}'.format('benchmark', 'baseline us', 'median us', 'change'))
+        for name, baseline_median, median, change, regressed in comparisons:
+            print('  {0:<24} {1:>12.1f} {2:>12.1f} {3:>+8.1%}{4}'.format(name, baseline_median, median, change,
+                                                                         '  REGRESSED' if regressed else ''))
+        if any(comparison[-1] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
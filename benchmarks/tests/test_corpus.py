@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import config
+from mlrvalidator.validators.error_validator import ErrorValidator
+from mlrvalidator.validators.reference import ReferenceRegistry
+from ..corpus import CorpusGenerator
+
+
+class CorpusGeneratorTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.error_validator = ErrorValidator(config.SCHEMA_DIR, config.REFERENCE_FILE_DIR,
+                                             reference_registry=ReferenceRegistry())
+
+    def setUp(self):
+        self.generator = CorpusGenerator(seed=1)
+
+    def _errors(self, item):
+        return self.error_validator.validate(item['ddotLocation'], item['existingLocation'],
+                                             update=item['transactionType'] == 'update').errors
+
+    def test_valid_items(self):
+        for index in range(20):
+            for item in [self.generator.add_item(index), self.generator.update_item(index)]:
+                self.assertEqual(item['expected'], 'valid')
+                self.assertEqual(self._errors(item), {}, item)
+
+    def test_invalid_add_items(self):
+        for index, fault in enumerate(CorpusGenerator.FAULTS):
+            item = self.generator.add_item(index, fault)
+            self.assertEqual(item['transactionType'], 'add')
+            self.assertEqual(item['expected'], 'invalid')
+            self.assertNotEqual(self._errors(item), {}, fault)
+
+    def test_invalid_update_items(self):
+        for index, fault in enumerate(CorpusGenerator.UPDATE_FAULTS):
+            item = self.generator.update_item(index, fault)
+            self.assertEqual(item['transactionType'], 'update')
+            self.assertEqual(item['expected'], 'invalid')
+            self.assertNotEqual(self._errors(item), {}, fault)
+
+    def test_generate(self):
+        items = self.generator.generate(200, invalid_fraction=0.25, update_fraction=0.5)
+
+        self.assertEqual(len(items), 200)
+        self.assertEqual(set((item['transactionType'], item['expected']) for item in items),
+                         {('add', 'valid'), ('add', 'invalid'), ('update', 'valid'), ('update', 'invalid')})
+        self.assertEqual(items, CorpusGenerator(seed=1).generate(200, invalid_fraction=0.25, update_fraction=0.5))
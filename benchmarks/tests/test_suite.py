@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from ..suite import compare
+
+
+def _results(**medians):
+    return {'benchmarks': {name: {'minUs': median, 'medianUs': median} for name, median in medians.items()}}
+
+
+class CompareTestCase(TestCase):
+
+    def test_regressed_only_above_threshold(self):
+        comparisons = compare(_results(error_validator=111.0, warning_validator=109.0, transition=50.0),
+                              _results(error_validator=100.0, warning_validator=100.0, transition=100.0),
+                              0.1)
+
+        self.assertEqual({name: (baseline, median, regressed)
+                          for name, baseline, median, change, regressed in comparisons},
+                         {'error_validator': (100.0, 111.0, True),
+                          'warning_validator': (100.0, 109.0, False),
+                          'transition': (100.0, 50.0, False)})
+        changes = {name: change for name, baseline, median, change, regressed in comparisons}
+        self.assertAlmostEqual(changes['error_validator'], 0.11)
+        self.assertAlmostEqual(changes['transition'], -0.5)
+
+    def test_change_equal_to_threshold_not_regressed(self):
+        comparisons = compare(_results(error_validator=125.0), _results(error_validator=100.0), 0.25)
+
+        self.assertFalse(comparisons[0][4])
+
+    def test_benchmarks_missing_from_baseline_skipped(self):
+        comparisons = compare(_results(error_validator=100.0, flask_request=500.0), _results(error_validator=100.0),
+                              0.1)
+
+        self.assertEqual([comparison[0] for comparison in comparisons], ['error_validator'])
@@ -0,0 +1,60 @@
+'''
+Measures the time taken to authenticate a request with an RS256 token, with and without the VerifiedTokenCache. The
+same token is sent with every request, as the ingester does.
+
+Run from the project directory:
+    python -m benchmarks.token_cache
+'''
+import argparse
+import timeit
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+import jwt
+
+import app
+from mlrvalidator.flask_restplus_jwt import VerifiedTokenCache, jwt_required
+
+
+def make_token():
+    '''
+    :return: tuple of an RS256 token and the PEM public key which verifies it
+    '''
+    private_key = rsa.generate_private_key(65537, 2048, default_backend())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo)
+    token = jwt.encode({'sub': 'ingester', 'aud': 'mlr'}, private_key, algorithm='RS256')
+    return token.decode('utf-8'), public_pem.decode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the verified token cache')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    token, public_pem = make_token()
+    app.application.config['JWT_PUBLIC_KEY'] = public_pem
+    app.application.config['JWT_ALGORITHM'] = 'RS256'
+    app.application.config['JWT_DECODE_AUDIENCE'] = 'mlr'
+    jwt_manager = app.application.extensions['flask-jwt-simple']
+    authenticate = jwt_required(lambda: None)
+
+    print('{0} requests with the same token'.format(args.requests))
+    results = {}
+    for name, token_cache in [('disabled', None), ('enabled', VerifiedTokenCache(1000))]:
+        jwt_manager.token_cache = token_cache
+        with app.application.test_request_context(headers={'Authorization': 'Bearer {0}'.format(token)}):
+            seconds = min(timeit.repeat(authenticate, number=args.requests, repeat=args.repeat))
+        results[name] = seconds / args.requests * 1e6
+        print('  cache {0:<9} {1:>8.1f} us/request'.format(name, results[name]))
+        if token_cache is not None:
+            print('  hit rate {0:.1%}'.format(token_cache.stats()['hitRate']))
+
+    print('Saved {0:.1f} us/request ({1:.0%})'.format(results['disabled'] - results['enabled'],
+                                                      1 - results['enabled'] / results['disabled']))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 PROJECT_DIR = os.path.dirname(__file__)
 REFERENCE_FILE_DIR = os.path.join(PROJECT_DIR, 'mlrvalidator/references')
@@ -6,6 +7,39 @@ SCHEMA_DIR = os.path.join(PROJECT_DIR, 'mlrvalidator/schemas')
 DEBUG = False
 CRU_SERVICE_URL = os.getenv('cru_service_url', 'http://localhost')
 
+# The largest number of locations which will be validated in a single request to /validators/batch
+BATCH_MAX_ITEMS = int(os.getenv('batch_max_items', 1000))
+
+# The number of worker processes used to validate the items in a batch. If 1, batches are validated in the process
+# which receives the request.
+VALIDATION_PROCESSES = int(os.getenv('validation_processes', 1))
+
+# Set the environment variable metrics_enabled to true to time each validation rule and stage. The metrics are served
+# in Prometheus format at /metrics. When false the validators are not instrumented at all.
+METRICS_ENABLED = os.getenv('metrics_enabled', 'false').lower() == 'true'
+
+# Set the environment variable reference_store_enabled to true to read the county, minor civil division, hydrologic unit
+# code and aquifer references from the memory mapped store built by mlrvalidator.validators.reference_store, so that
+# all of the processes serving the application share one copy of them.
+REFERENCE_STORE_ENABLED = os.getenv('reference_store_enabled', 'false').lower() == 'true'
+
+# Set the environment variable result_cache_size to cache the responses of that many distinct /validators/add and
+# /validators/update requests. Responses are cached for result_cache_ttl seconds, or until they are evicted if it is
+# not set. The cache is disabled when the size is 0.
+RESULT_CACHE_SIZE = int(os.getenv('result_cache_size', 0))
+RESULT_CACHE_TTL = float(os.getenv('result_cache_ttl')) if os.getenv('result_cache_ttl') else None
+
+# Responses of the /references endpoints may be cached by clients for this many seconds. After that they are
+# revalidated with their ETag, which only changes when the reference files are reloaded.
+REFERENCE_CACHE_MAX_AGE = int(os.getenv('reference_cache_max_age', 300))
+
+# Set the environment variable startup_budgets to the number of seconds each phase of startup may take, as
+# comma separated phase=seconds, for instance imports=3,reference:*=2,total=20. Phases which take longer are logged as
+# warnings and listed at /diagnostics/startup. Set startup_trace_memory to true to also record the memory allocated in
+# each phase, which slows down startup.
+STARTUP_BUDGETS = os.getenv('startup_budgets', '')
+STARTUP_TRACE_MEMORY = os.getenv('startup_trace_memory', 'false').lower() == 'true'
+
 # The following four variables configure authentication
 
 # If using a public key, set the environment variable AUTH_TOKEN_KEY_URL to the url where it can be retrieved
@@ -20,5 +54,21 @@ JWT_ALGORITHM = os.getenv('jwt_algorithm', 'HS256')
 # Set the JWT_DECODE_AUDIENCE environment variable to the value of the 'aud' claim in the
 JWT_DECODE_AUDIENCE = os.getenv('jwt_decode_audience')
 
+# The keys from AUTH_TOKEN_KEY_URL are fetched in the background so that startup does not wait for the OAuth server.
+# The last keys fetched are saved to AUTH_TOKEN_KEY_CACHE_PATH and used until the keys have been fetched again. Keys are
+# fetched again every AUTH_TOKEN_KEY_REFRESH seconds. Requests to AUTH_TOKEN_KEY_URL time out after
+# AUTH_TOKEN_KEY_TIMEOUT seconds and failed requests are retried after a delay which doubles up to
+# AUTH_TOKEN_KEY_MAX_BACKOFF seconds.
+AUTH_TOKEN_KEY_CACHE_PATH = os.getenv('oauth_server_token_key_cache_path',
+                                      os.path.join(tempfile.gettempdir(), 'mlr_validator_token_keys.json'))
+AUTH_TOKEN_KEY_REFRESH = float(os.getenv('oauth_server_token_key_refresh', 3600))
+AUTH_TOKEN_KEY_TIMEOUT = float(os.getenv('oauth_server_token_key_timeout', 5))
+AUTH_TOKEN_KEY_MAX_BACKOFF = float(os.getenv('oauth_server_token_key_max_backoff', 300))
+
+# Set the environment variable token_cache_size to the number of verified tokens to keep, so that a token sent with
+# many requests is only verified once. Hits and misses are served at /diagnostics/token_cache. The cache is disabled
+# when the size is 0.
+TOKEN_CACHE_SIZE = int(os.getenv('token_cache_size', 1000))
+
 # Configure exception JSON to not always output with a `message` field. Global exception handling is done via a custom handler in services.py.
 ERROR_INCLUDE_MESSAGE=False
\ No newline at end of file
@@ -0,0 +1,127 @@
+'''
+Validation of many locations, such as all of the transactions in a DDot file, in a single request.
+'''
+import json
+
+from .validators.validation_context import ValidationContext
+
+NDJSON_MIMETYPES = ['application/x-ndjson', 'application/ndjson']
+
+# Maps the transactionType of a batch item to the update argument of the validators
+TRANSACTION_TYPES = {
+    'add': False,
+    'update': True
+}
+
+
+def validation_response(error_validator, warning_validator, ddot_location, existing_location, update=False):
+    '''
+    :param ErrorValidator error_validator:
+    :param WarningValidator warning_validator:
+    :param dict ddot_location:
+    :param dict existing_location:
+    :param boolean update:
+    :return: dict - the response for a single location containing the errors and warnings found or a message
+        indicating that the validations passed.
+    '''
+    # The error and warning validators share the context so that it is only built once
+    context = ValidationContext(ddot_location, existing_location, update=update)
+    error_result = error_validator.validate_context(context)
+    warning_result = warning_validator.validate_context(context)
+
+    response = {}
+    if error_result.errors:
+        response["fatal_error_message"] = error_result.errors
+    if warning_result.warnings:
+        response["warning_message"] = warning_result.warnings
+    if error_result.passed and warning_result.passed:
+        response["validation_passed_message"] = 'Validations Passed'
+
+    return response
+
+
+def parse_batch(data, mimetype, max_items):
+    '''
+    :param str data: the request body. This should be a json array of items or, if mimetype is one of
+        NDJSON_MIMETYPES, one json item per line.
+    :param str mimetype:
+    :param int max_items: the largest number of items which will be accepted
+    :return: list of items
+    :raises ValueError: if data can not be parsed or contains more than max_items items
+    '''
+    try:
+        if mimetype in NDJSON_MIMETYPES:
+            items = [json.loads(line) for line in data.splitlines() if line.strip()]
+        else:
+            items = json.loads(data)
+    except ValueError as err:
+        raise ValueError('Request body is not valid json: {0}'.format(err))
+
+    if not isinstance(items, list):
+        raise ValueError('Request body must be a json array or newline delimited json.')
+    if len(items) > max_items:
+        raise ValueError('Request contains {0} items. At most {1} items can be validated in one request.'.format(
+            len(items), max_items))
+
+    return items
+
+
+def validate_batch_item(error_validator, warning_validator, item):
+    '''
+    :param ErrorValidator error_validator:
+    :param WarningValidator warning_validator:
+    :param dict item: contains ddotLocation, existingLocation and transactionType
+    :return: dict - the validation response for item, or a response containing error_message if item is invalid.
+    '''
+    if not isinstance(item, dict) or 'ddotLocation' not in item or 'existingLocation' not in item:
+        return {'error_message': 'Item is missing required components (ddotLocation and/or existingLocation).'}
+    if not isinstance(item['ddotLocation'], dict) or not isinstance(item['existingLocation'], dict):
+        return {'error_message': 'Item ddotLocation and existingLocation must be json objects.'}
+
+    transaction_type = item.get('transactionType')
+    if transaction_type not in TRANSACTION_TYPES:
+        return {'error_message': 'Item has an invalid transactionType, {0}. Must be one of {1}.'.format(
+            transaction_type, ', '.join(sorted(TRANSACTION_TYPES)))}
+
+    return validation_response(error_validator, warning_validator, item.get('ddotLocation'),
+                               item.get('existingLocation'), update=TRANSACTION_TYPES[transaction_type])
+
+
+def validate_batch(error_validator, warning_validator, items):
+    '''
+    Each item is validated independently. The references loaded by the validators are shared by all of the items.
+    :param ErrorValidator error_validator:
+    :param WarningValidator warning_validator:
+    :param list of dict items:
+    :return: list of dict - the validation response for each item in the same order as items.
+    '''
+    return [validate_batch_item(error_validator, warning_validator, item) for item in items]
+
+
+def validate_stream(error_validator, warning_validator, lines):
+    '''
+    Validates newline delimited json items as they are read. Only one item is held in memory at a time.
+    :param ErrorValidator error_validator:
+    :param WarningValidator warning_validator:
+    :param lines: iterable of str or bytes, each containing a json item. Blank lines are ignored.
+    :return: generator of str - a line of json containing the validation response for each item, in the same
+        order as lines.
+    '''
+    # The response has already started when an item is read, so every line gets a result line rather than an
+    # exception ending the stream
+    for line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            item = json.loads(line)
+        except UnicodeDecodeError as err:
+            response = {'error_message': 'Item is not valid utf-8: {0}'.format(err)}
+        except ValueError as err:
+            response = {'error_message': 'Item is not valid json: {0}'.format(err)}
+        else:
+            response = validate_batch_item(error_validator, warning_validator, item)
+
+        yield json.dumps(response) + '\n'
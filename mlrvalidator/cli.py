@@ -0,0 +1,241 @@
+'''
+Validates files of locations without running the web service. Only the validators are imported, so Flask and the
+authentication modules are not needed. Run with:
+    python -m mlrvalidator [options] input_file
+
+The input file can be json (an array), newline delimited json or csv. Each record is either a location or an item
+in the form accepted by /validators/batch ({"ddotLocation": ..., "existingLocation": ..., "transactionType": ...}).
+Csv files contain one location per row, with the location field names as column headings. Empty csv cells are treated
+as missing fields. A file of existing locations, in any of the same formats, can be given with --existing. Existing
+locations are matched to the input locations by agencyCode and siteNumber.
+
+A result line of json is written for each record and a summary of the number of errors and warnings for each field
+is written as json.
+'''
+import argparse
+from collections import Counter
+import csv
+from itertools import islice
+import json
+import os
+import sys
+import time
+
+from .batch import TRANSACTION_TYPES
+from .validation_pool import ValidationPool
+from .validators.error_validator import ErrorValidator
+from .validators.reference import ReferenceRegistry
+from .validators.warning_validator import WarningValidator
+
+PACKAGE_DIR = os.path.dirname(__file__)
+
+FILE_FORMATS = {
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.csv': 'csv'
+}
+
+
+def get_file_format(path_to_file):
+    '''
+    :param str path_to_file:
+    :return: str - json, ndjson or csv depending on the extension of path_to_file
+    :raises ValueError: if the extension is not recognized
+    '''
+    extension = os.path.splitext(path_to_file)[1].lower()
+    try:
+        return FILE_FORMATS[extension]
+    except KeyError:
+        raise ValueError('Can not tell the format of {0}. Use --format to specify it'.format(path_to_file))
+
+
+def read_records(path_to_file, file_format):
+    '''
+    :param str path_to_file:
+    :param str file_format: json, ndjson or csv
+    :return: generator of dict - the records in the file
+    '''
+    with open(path_to_file, newline='' if file_format == 'csv' else None) as fd:
+        if file_format == 'json':
+            yield from json.load(fd)
+        elif file_format == 'ndjson':
+            for line in fd:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(fd):
+                yield {key: value for key, value in row.items() if key and value}
+
+
+def location_key(location):
+    '''
+    :param dict location:
+    :return: tuple - agencyCode and siteNumber, which identify a location
+    '''
+    return location.get('agencyCode', '').strip(), location.get('siteNumber', '').strip()
+
+
+def read_existing_locations(path_to_file, file_format):
+    '''
+    :param str path_to_file:
+    :param str file_format: json, ndjson or csv
+    :return: dict of existing locations keyed by location_key
+    '''
+    return {location_key(location): location for location in read_records(path_to_file, file_format)}
+
+
+def make_item(record, existing_locations, transaction_type=None):
+    '''
+    :param dict record: a location or a batch item
+    :param dict existing_locations: existing locations keyed by location_key
+    :param str transaction_type: used for records which do not specify their transactionType. If None, the
+        transaction is an update if there is an existing location and an add otherwise.
+    :return: dict - the batch item to validate for record
+    '''
+    if 'ddotLocation' in record:
+        item = dict(record)
+        item.setdefault('existingLocation', existing_locations.get(location_key(item['ddotLocation']), {}))
+    else:
+        ddot_location = dict(record)
+        record_transaction_type = ddot_location.pop('transactionType', None)
+        item = {
+            'ddotLocation': ddot_location,
+            'existingLocation': existing_locations.get(location_key(ddot_location), {})
+        }
+        if record_transaction_type:
+            item['transactionType'] = record_transaction_type
+
+    if 'transactionType' not in item:
+        item['transactionType'] = transaction_type or ('update' if item['existingLocation'] else 'add')
+    return item
+
+
+class ValidationSummary:
+    '''
+    Counts the validation results for a file
+    '''
+
+    def __init__(self):
+        self.records = 0
+        self.passed = 0
+        self.records_with_errors = 0
+        self.records_with_warnings = 0
+        self.invalid_records = 0
+        self.errors_by_field = Counter()
+        self.warnings_by_field = Counter()
+
+    def add(self, response):
+        '''
+        :param dict response: the validation response for a record
+        '''
+        self.records += 1
+        if 'error_message' in response:
+            self.invalid_records += 1
+        if 'validation_passed_message' in response:
+            self.passed += 1
+        if 'fatal_error_message' in response:
+            self.records_with_errors += 1
+            self.errors_by_field.update(response['fatal_error_message'].keys())
+        if 'warning_message' in response:
+            self.records_with_warnings += 1
+            self.warnings_by_field.update(response['warning_message'].keys())
+
+    def to_dict(self):
+        return {
+            'records': self.records,
+            'passed': self.passed,
+            'recordsWithErrors': self.records_with_errors,
+            'recordsWithWarnings': self.records_with_warnings,
+            'invalidRecords': self.invalid_records,
+            'errorsByField': dict(self.errors_by_field.most_common()),
+            'warningsByField': dict(self.warnings_by_field.most_common())
+        }
+
+
+def validate_file(items, validation_pool, results_fd, chunk_size):
+    '''
+    Validates items in chunks of chunk_size, writing a json result line for each item to results_fd
+    :param iterable items: batch items
+    :param ValidationPool validation_pool:
+    :param results_fd: file object
+    :param int chunk_size:
+    :return: ValidationSummary
+    '''
+    summary = ValidationSummary()
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        for item, response in zip(chunk, validation_pool.validate_batch(chunk)):
+            agency_code, site_number = location_key(item['ddotLocation']) \
+                if isinstance(item.get('ddotLocation'), dict) else ('', '')
+            result = {'record': summary.records, 'agencyCode': agency_code, 'siteNumber': site_number}
+            result.update(response)
+            results_fd.write(json.dumps(result) + '\n')
+            summary.add(response)
+
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m mlrvalidator', description='Validate a file of MLR locations')
+    parser.add_argument('input_file', help='json, newline delimited json or csv file of locations')
+    parser.add_argument('--format', choices=sorted(set(FILE_FORMATS.values())),
+                        help='format of input_file and the existing file. By default this is taken from the file extension')
+    parser.add_argument('--existing', help='file of existing locations, matched by agencyCode and siteNumber')
+    parser.add_argument('--transaction-type', choices=sorted(TRANSACTION_TYPES),
+                        help='transaction type of records which do not specify one. By default a record is an update '
+                             'if it has an existing location and an add otherwise')
+    parser.add_argument('--output', help='results file. Defaults to input_file with a .results.ndjson extension')
+    parser.add_argument('--summary', help='summary file. Defaults to the results file with a .summary.json extension')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='number of records validated at a time')
+    parser.add_argument('--schema-dir', default=os.path.join(PACKAGE_DIR, 'schemas'))
+    parser.add_argument('--reference-dir', default=os.path.join(PACKAGE_DIR, 'references'))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or os.path.splitext(args.input_file)[0] + '.results.ndjson'
+    summary_file = args.summary or os.path.splitext(output)[0] + '.summary.json'
+
+    try:
+        input_format = args.format or get_file_format(args.input_file)
+        existing_locations = {}
+        if args.existing:
+            existing_locations = read_existing_locations(args.existing, args.format or get_file_format(args.existing))
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 2
+
+    reference_registry = ReferenceRegistry()
+    error_validator = ErrorValidator(args.schema_dir, args.reference_dir, reference_registry=reference_registry)
+    warning_validator = WarningValidator(args.schema_dir, args.reference_dir, reference_registry=reference_registry)
+    validation_pool = ValidationPool(error_validator, warning_validator, args.processes)
+
+    items = (make_item(record, existing_locations, args.transaction_type)
+             for record in read_records(args.input_file, input_format))
+    start = time.perf_counter()
+    try:
+        with open(output, 'w') as results_fd:
+            summary = validate_file(items, validation_pool, results_fd, args.chunk_size)
+    finally:
+        validation_pool.close()
+    elapsed = time.perf_counter() - start
+
+    with open(summary_file, 'w') as fd:
+        json.dump(summary.to_dict(), fd, indent=2)
+
+    print('Results written to {0}'.format(output))
+    print('Summary written to {0}'.format(summary_file))
+    print('{0} records: {1} passed, {2} with errors, {3} with warnings, {4} invalid'.format(
+        summary.records, summary.passed, summary.records_with_errors, summary.records_with_warnings,
+        summary.invalid_records))
+    for field, count in summary.errors_by_field.most_common():
+        print('  {0:<30} {1:>8} errors'.format(field, count))
+    print('Validated {0} records in {1:.1f} seconds ({2:.1f} records/sec) using {3} processes'.format(
+        summary.records, elapsed, summary.records / elapsed if elapsed else 0, args.processes))
+    return 0
@@ -1,9 +1,300 @@
+from collections import OrderedDict
 from functools import wraps
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
 
-from flask import current_app, jsonify
-from flask_jwt_simple import JWTManager, jwt_required as simple_jwt_required, get_jwt
-from flask_jwt_simple.exceptions import NoAuthorizationError
+from flask import current_app, jsonify, request
+try:
+    from flask import _app_ctx_stack as ctx_stack
+except ImportError:  # pragma: no cover
+    from flask import _request_ctx_stack as ctx_stack
+from flask_jwt_simple import JWTManager, get_jwt
+from flask_jwt_simple.config import config
+from flask_jwt_simple.exceptions import InvalidHeaderError, NoAuthorizationError
+import jwt
+from jwt.algorithms import RSAAlgorithm
 from jwt.exceptions import InvalidTokenError
+import requests
+from werkzeug.exceptions import ServiceUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+def parse_token_keys(key_response):
+    '''
+    :param dict key_response: json returned by the token key url. Either a single key, {"value": "<PEM public key>"}
+        with an optional "kid", or a JSON Web Key Set, {"keys": [...]}, whose keys have a "kid" and either a "value" with
+        a PEM public key or the parameters of an RSA key.
+    :return: dict of key id to public key. A key without a key id has the id None.
+    :raises ValueError: if key_response does not contain any keys
+    '''
+    if 'keys' in key_response:
+        keys = {}
+        for key in key_response['keys']:
+            if 'value' in key:
+                keys[key.get('kid')] = key['value']
+            else:
+                keys[key.get('kid')] = RSAAlgorithm.from_jwk(json.dumps(key))
+    elif 'value' in key_response:
+        keys = {key_response.get('kid'): key_response['value']}
+    else:
+        keys = {}
+    if not keys:
+        raise ValueError('The token key response does not contain any keys')
+    return keys
+
+
+class JWTKeyProvider:
+    '''
+    Provides the public keys used to verify tokens without blocking startup on the token key url. The keys of the last
+    successful fetch are saved to a cache file and are loaded from it when the provider is started. The keys are then
+    fetched in a background thread, with a timeout, and fetched again every refresh_seconds. A fetch which fails is
+    retried after a delay which doubles after each failure, up to max_backoff_seconds.
+
+    Keys are chosen by the kid in the header of the token, so a new key can be published alongside the old one and
+    tokens signed with either are accepted. A token with a kid which is not known makes the provider fetch the keys
+    again, at most once every min_backoff_seconds, so a rotated key is picked up without restarting.
+    '''
+
+    def __init__(self, url, cache_path=None, verify=True, timeout=5, refresh_seconds=3600, min_backoff_seconds=1,
+                 max_backoff_seconds=300):
+        '''
+        :param str url: token key url
+        :param str cache_path: file where the last fetched keys are saved. If None the keys are not cached.
+        :param verify: passed to requests, True, False or the path of a CA bundle
+        :param float timeout: seconds to wait for the token key url
+        :param float refresh_seconds: seconds between successful fetches
+        :param float min_backoff_seconds: delay before the first retry of a failed fetch
+        :param float max_backoff_seconds: longest delay between retries
+        '''
+        self.url = url
+        self.cache_path = cache_path
+        self.verify = verify
+        self.timeout = timeout
+        self.refresh_seconds = refresh_seconds
+        self.min_backoff_seconds = min_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._keys = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.failures = 0
+        self.last_error = None
+        self.last_fetch = None
+        self.last_attempt = None
+
+    @property
+    def has_keys(self):
+        return bool(self._keys)
+
+    @property
+    def key_ids(self):
+        return sorted(self._keys, key=lambda kid: '' if kid is None else kid)
+
+    def get_key(self, kid=None):
+        '''
+        :param str kid: key id from the header of a token
+        :return: the public key with the id kid, or None if there is no such key. If the only key has no id it is used
+            for every token.
+        '''
+        keys = self._keys
+        if kid in keys:
+            return keys[kid]
+        if list(keys) == [None]:
+            return keys[None]
+        return None
+
+    def load_cache(self):
+        '''
+        Loads the keys saved by the last successful fetch
+        :return: boolean - True if keys were loaded from the cache file
+        '''
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path) as fd:
+                self._keys = parse_token_keys(json.load(fd))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if os.path.exists(self.cache_path):
+                logger.warning('Could not load the token keys cached in {0}: {1}'.format(self.cache_path, e))
+            return False
+        return True
+
+    def _save_cache(self, key_response):
+        # The keys are written to a temporary file which replaces the cache so that a partly written cache is never read
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.token_keys')
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(key_response, temp_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning('Could not cache the token keys in {0}: {1}'.format(self.cache_path, e))
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def refresh(self):
+        '''
+        Fetches the keys from the token key url once. If the fetch fails, the current keys are kept.
+        :return: boolean - True if the keys were fetched
+        '''
+        self.last_attempt = time.monotonic()
+        try:
+            resp = requests.get(self.url, verify=self.verify, timeout=self.timeout)
+            resp.raise_for_status()
+            key_response = resp.json()
+            keys = parse_token_keys(key_response)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.warning('Could not fetch the token keys from {0}: {1}'.format(self.url, e))
+            return False
+
+        self._keys = keys
+        self.failures = 0
+        self.last_error = None
+        self.last_fetch = time.time()
+        if self.cache_path:
+            self._save_cache(key_response)
+        return True
+
+    def next_delay(self):
+        '''
+        :return: float - seconds to wait before the next fetch
+        '''
+        if self.failures == 0:
+            return self.refresh_seconds
+        return min(self.max_backoff_seconds, self.min_backoff_seconds * 2 ** (self.failures - 1))
+
+    def request_refresh(self):
+        '''
+        Wakes the background thread to fetch the keys now, unless a fetch was attempted in the last
+        min_backoff_seconds.
+        '''
+        if self.last_attempt is None or time.monotonic() - self.last_attempt >= self.min_backoff_seconds:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.refresh()
+            self._wake.wait(self.next_delay())
+            self._wake.clear()
+
+    def start(self):
+        '''
+        Loads the cached keys and starts fetching the keys in the background. Does not wait for the fetch.
+        '''
+        self.load_cache()
+        self._thread = threading.Thread(target=self._run, name='token-key-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self):
+        return {
+            'keyIds': self.key_ids,
+            'lastFetch': self.last_fetch,
+            'failures': self.failures,
+            'lastError': self.last_error
+        }
+
+
+def token_digest(encoded_token, algorithm, audience):
+    '''
+    :param str encoded_token:
+    :param str algorithm: the algorithm the token is verified with
+    :param str audience: the audience the token is verified against
+    :return: str - sha256 of the token and the settings it is verified with
+    '''
+    return hashlib.sha256('{0} {1} {2}'.format(algorithm, audience, encoded_token).encode('utf-8')).hexdigest()
+
+
+class VerifiedTokenCache:
+    '''
+    Least recently used cache of the claims of tokens whose signature has been verified, so that a token which is sent
+    with many requests is only verified once. Tokens are keyed by token_digest, so a change to the algorithm or audience
+    setting means tokens are verified again. A cached token is not used once it has expired or if it is not yet valid,
+    and is verified again if the key it was verified with is no longer the key for the token, for instance once the
+    signing key has been rotated. It can be used from several threads at once.
+    '''
+
+    def __init__(self, max_entries, clock=time.time):
+        '''
+        :param int max_entries: the least recently used token is evicted when more than this many are cached
+        :param function clock: returns the current time in seconds since the epoch
+        '''
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, digest, key):
+        '''
+        :param str digest: see token_digest
+        :param key: the key the token would be verified with now
+        :return: dict - the claims of the token, or None if the token is not cached or can not be used
+        '''
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                verified_key, claims = entry
+                now = self._clock()
+                # Checked as jwt.decode does, with no leeway
+                exp = claims.get('exp')
+                nbf = claims.get('nbf')
+                if verified_key == key and (exp is None or exp >= now) and (nbf is None or nbf <= now):
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return claims
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest, key, claims):
+        '''
+        :param str digest: see token_digest
+        :param key: the key the token was verified with
+        :param dict claims: the verified claims of the token
+        '''
+        with self._lock:
+            self._entries[digest] = (key, claims)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        '''
+        :return: dict - the number of cached tokens, hits, misses and evictions and the hit rate
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups else 0.0
+            }
 
 
 class JWTRestplusManager(JWTManager):
@@ -13,12 +304,18 @@ class JWTRestplusManager(JWTManager):
 
     """
 
-    def __init__(self, api, app=None):
+    def __init__(self, api, app=None, key_provider=None, token_cache=None):
         '''
         :param api: Instance of a flask_restplus Api that has been associated with app
         :param app: Instance of flask application or blueprint
+        :param JWTKeyProvider key_provider: If specified, tokens signed with an asymmetric algorithm are verified with
+            the keys of the provider rather than JWT_PUBLIC_KEY
+        :param VerifiedTokenCache token_cache: If specified, tokens which have already been verified are not verified
+            again
         '''
         self.api = api
+        self.key_provider = key_provider
+        self.token_cache = token_cache
         super(self.__class__, self).__init__(app)
 
         # https://github.com/vimalloc/flask-jwt-extended/issues/86
@@ -50,16 +347,72 @@ def invalid_token_callback(error_string):
 def unauthorized_callback(error_string):
     return jsonify({'error_message': error_string}), 401
 
+def _get_token_from_headers():
+    # Same header checks as flask_jwt_simple
+    header_name = config.header_name
+    header_type = config.header_type
+
+    jwt_header = request.headers.get(header_name, None)
+    if not jwt_header:
+        raise NoAuthorizationError("Missing {} Header".format(header_name))
+
+    parts = jwt_header.split()
+    if not header_type:
+        if len(parts) != 1:
+            raise InvalidHeaderError("Bad {} header. Expected value '<JWT>'".format(header_name))
+        return parts[0]
+    if parts[0] != header_type or len(parts) != 2:
+        raise InvalidHeaderError("Bad {} header. Expected value '{} <JWT>'".format(header_name, header_type))
+    return parts[1]
+
+
+def _get_decode_key(encoded_token):
+    key_provider = current_app.extensions['flask-jwt-simple'].key_provider
+    if key_provider is None or not config.is_asymmetric:
+        return config.decode_key
+
+    if not key_provider.has_keys:
+        raise ServiceUnavailable('The keys used to verify tokens have not been loaded yet')
+    kid = jwt.get_unverified_header(encoded_token).get('kid')
+    key = key_provider.get_key(kid)
+    if key is None:
+        # The key may have been rotated since the keys were fetched
+        key_provider.request_refresh()
+        raise InvalidTokenError('Token was signed with an unknown key {0}'.format(kid))
+    return key
+
+
+def decode_token(encoded_token):
+    """
+    :param str encoded_token:
+    :return: dict - the claims of the token once its signature, expiry and audience have been verified
+    """
+    key = _get_decode_key(encoded_token)
+    token_cache = current_app.extensions['flask-jwt-simple'].token_cache
+    if token_cache is None:
+        return jwt.decode(encoded_token, key, algorithms=[config.algorithm], audience=config.audience)
+
+    digest = token_digest(encoded_token, config.algorithm, config.audience)
+    claims = token_cache.get(digest, key)
+    if claims is None:
+        claims = jwt.decode(encoded_token, key, algorithms=[config.algorithm], audience=config.audience)
+        token_cache.put(digest, key, claims)
+    # The claims are copied so that changes made by a view do not change the cached claims
+    return dict(claims)
+
+
 def jwt_required(fn):
     """
-    Wrapper for the flask_jwt_simple.jwt_required decorator
+    Replaces the flask_jwt_simple.jwt_required decorator so that tokens can be verified with the keys of a
+    JWTKeyProvider
     :param fn: Flask Restplus resource view function
     :return: function
     """
 
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        return simple_jwt_required(fn)(*args, **kwargs)
+        ctx_stack.top.jwt = decode_token(_get_token_from_headers())
+        return fn(*args, **kwargs)
 
     return wrapper
 
@@ -77,7 +430,7 @@ def jwt_role_required(allowed_roles):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            response = simple_jwt_required(fn)(*args, **kwargs)
+            response = jwt_required(fn)(*args, **kwargs)
             token = get_jwt()
             roles_in_token = current_app.config['JWT_ROLE_CLAIM'](token)
             if [role for role in roles_in_token if role in allowed_roles]:
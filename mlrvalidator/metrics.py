@@ -0,0 +1,210 @@
+'''
+Call counts, failure counts and latency histograms for the validator stages and the rules that they run, rendered in
+the Prometheus text exposition format.
+
+Validators are instrumented by replacing their rule methods with timed wrappers on the instance, so validators which
+are not given a ValidationMetrics object run exactly as before. Each process keeps its own metrics, so the
+validations done by the workers of a ValidationPool are not included.
+'''
+from collections import namedtuple
+import functools
+import threading
+import time
+
+from .validators.base_cross_field_validator import BaseCrossFieldValidator
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+# Attributes of ErrorValidator and WarningValidator which are timed as stages
+STAGE_ATTRIBUTES = ['single_field_validator', 'cross_field_validator', 'cross_field_ref_validator',
+                    'transition_validator']
+
+MetricFamily = namedtuple('MetricFamily', ['name', 'labels', 'description'])
+
+RULE_METRIC = MetricFamily('mlr_validator_rule', ('validator', 'rule'), 'validation rule')
+STAGE_METRIC = MetricFamily('mlr_validator_stage', ('validator', 'stage'), 'validator stage')
+
+
+class _Timer:
+    '''
+    Call count, failure count and latency histogram for one rule or stage
+    '''
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.bucket_counts = [0] * len(buckets)
+
+
+class ValidationMetrics:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        '''
+        :param tuple of float buckets: upper bounds, in seconds, of the latency histogram buckets
+        '''
+        self.buckets = tuple(sorted(buckets))
+        self._timers = {RULE_METRIC: {}, STAGE_METRIC: {}}
+        self._lock = threading.Lock()
+
+    def observe(self, family, labels, seconds, failed):
+        '''
+        :param MetricFamily family: RULE_METRIC or STAGE_METRIC
+        :param tuple of str labels: values of family.labels
+        :param float seconds: time taken by the call
+        :param boolean failed: True if the call found a validation error
+        '''
+        with self._lock:
+            timers = self._timers[family]
+            timer = timers.get(labels)
+            if timer is None:
+                timer = timers[labels] = _Timer(self.buckets)
+            timer.calls += 1
+            timer.total_seconds += seconds
+            if failed:
+                timer.failures += 1
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    timer.bucket_counts[index] += 1
+                    break
+
+    def observe_rule(self, validator_name, rule, seconds, failed):
+        '''
+        :param str validator_name: name of the class of the validator which ran the rule
+        :param str rule:
+        :param float seconds: time taken by the rule
+        :param boolean failed: True if the rule found a validation error
+        '''
+        self.observe(RULE_METRIC, (validator_name, rule), seconds, failed)
+
+    def _wrap(self, obj, method_name, family, labels, failed):
+        method = getattr(obj, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            self.observe(family, labels, time.perf_counter() - start, failed(args, result))
+            return result
+
+        setattr(obj, method_name, timed)
+
+    def instrument_cross_field_validator(self, validator):
+        '''
+        Times the rule methods (those whose names start with _validate_) of a BaseCrossFieldValidator and any
+        BaseCrossFieldValidators that it uses, such as the CountryStateReferenceValidators used by
+        CrossFieldRefErrorValidator. A rule fails if it adds to the errors passed to it.
+        :param BaseCrossFieldValidator validator:
+        '''
+        validator_name = type(validator).__name__
+        for name in dir(type(validator)):
+            if name.startswith('_validate_') and callable(getattr(validator, name)):
+                self._wrap_error_rule(validator, name, (validator_name, name[len('_validate_'):]))
+        for name, child in sorted(vars(validator).items()):
+            if isinstance(child, BaseCrossFieldValidator):
+                self._wrap(child, 'validate_context', RULE_METRIC, (validator_name, name),
+                           lambda args, errors: bool(errors))
+
+    def _wrap_error_rule(self, validator, method_name, labels):
+        method = getattr(validator, method_name)
+
+        @functools.wraps(method)
+        def timed(context, errors, *args, **kwargs):
+            error_count = len(errors)
+            start = time.perf_counter()
+            result = method(context, errors, *args, **kwargs)
+            self.observe(RULE_METRIC, labels, time.perf_counter() - start, len(errors) > error_count)
+            return result
+
+        setattr(validator, method_name, timed)
+
+    def instrument_single_field_validator(self, validator):
+        '''
+        Times the custom Cerberus rules and types defined by the class of validator. A rule fails if it adds a
+        Cerberus error and a type fails if it returns False.
+        :param SingleFieldValidator validator:
+        '''
+        validator_name = type(validator).__name__
+        for name, attribute in vars(type(validator)).items():
+            if not (name.startswith('_validate_') and callable(attribute)):
+                continue
+            labels = (validator_name, name[len('_validate_'):])
+            if name.startswith('_validate_type_'):
+                self._wrap(validator, name, RULE_METRIC, labels, lambda args, result: not result)
+            else:
+                self._wrap_cerberus_rule(validator, name, labels)
+
+    def _wrap_cerberus_rule(self, validator, method_name, labels):
+        method = getattr(validator, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            error_count = len(validator._errors)
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            self.observe(RULE_METRIC, labels, time.perf_counter() - start, len(validator._errors) > error_count)
+            return result
+
+        setattr(validator, method_name, timed)
+
+    def instrument_stages(self, validator):
+        '''
+        Times each stage of an ErrorValidator or WarningValidator. A stage fails if it returns any errors.
+        :param validator: ErrorValidator or WarningValidator
+        '''
+        validator_name = type(validator).__name__
+        for name in STAGE_ATTRIBUTES:
+            stage = getattr(validator, name, None)
+            if stage is not None:
+                self._wrap(stage, 'validate_context', STAGE_METRIC, (validator_name, name),
+                           lambda args, errors: bool(errors))
+
+    def render(self):
+        '''
+        :return: str - the metrics in the Prometheus text exposition format
+        '''
+        lines = []
+        with self._lock:
+            for family in [STAGE_METRIC, RULE_METRIC]:
+                timers = sorted(self._timers[family].items())
+                lines.append('# HELP {0}_calls_total Number of times each {1} was run'.format(
+                    family.name, family.description))
+                lines.append('# TYPE {0}_calls_total counter'.format(family.name))
+                for labels, timer in timers:
+                    lines.append('{0}_calls_total{1} {2}'.format(family.name, _labels(family, labels), timer.calls))
+
+                lines.append('# HELP {0}_failures_total Number of times each {1} found a validation error'.format(
+                    family.name, family.description))
+                lines.append('# TYPE {0}_failures_total counter'.format(family.name))
+                for labels, timer in timers:
+                    lines.append('{0}_failures_total{1} {2}'.format(family.name, _labels(family, labels), timer.failures))
+
+                lines.append('# HELP {0}_duration_seconds Time taken by each {1}'.format(family.name, family.description))
+                lines.append('# TYPE {0}_duration_seconds histogram'.format(family.name))
+                for labels, timer in timers:
+                    cumulative_count = 0
+                    for bound, count in zip(self.buckets, timer.bucket_counts):
+                        cumulative_count += count
+                        lines.append('{0}_duration_seconds_bucket{1} {2}'.format(
+                            family.name, _labels(family, labels, le=repr(bound)), cumulative_count))
+                    lines.append('{0}_duration_seconds_bucket{1} {2}'.format(
+                        family.name, _labels(family, labels, le='+Inf'), timer.calls))
+                    lines.append('{0}_duration_seconds_sum{1} {2!r}'.format(
+                        family.name, _labels(family, labels), timer.total_seconds))
+                    lines.append('{0}_duration_seconds_count{1} {2}'.format(
+                        family.name, _labels(family, labels), timer.calls))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(family, values, le=None):
+    pairs = list(zip(family.labels, values))
+    if le is not None:
+        pairs.append(('le', le))
+    return '{' + ','.join('{0}="{1}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
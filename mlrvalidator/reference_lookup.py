@@ -0,0 +1,90 @@
+'''
+Read only lookups of the references loaded by a set of validators, served by the /references endpoints so that clients
+can populate their lists from the same references that are used to validate locations.
+
+Responses only change when the references are reloaded, so their ETag is derived from the reference version and the
+request rather than from the response. A request whose ETag matches is answered without looking anything up.
+'''
+import hashlib
+
+
+def reference_etag(reference_version, request_path):
+    '''
+    :param str reference_version: version of the references, see ValidatorSet
+    :param str request_path: path and query string of the request
+    :return: str - the entity tag of the response to request_path
+    '''
+    return hashlib.sha256('{0} {1}'.format(reference_version, request_path).encode('utf-8')).hexdigest()[:32]
+
+
+class ReferenceLookup:
+    '''
+    Lists of the reference values used by an ErrorValidator. Each method returns json serializable values.
+    '''
+
+    def __init__(self, error_validator):
+        '''
+        :param ErrorValidator error_validator:
+        '''
+        cross_field_ref_validator = error_validator.cross_field_ref_validator
+        self._reference_lists = error_validator.single_field_validator.reference_list
+        self._states = cross_field_ref_validator.states_ref
+        self._country_state_references = {
+            'counties': cross_field_ref_validator.counties_ref,
+            'mcds': cross_field_ref_validator.mcd_ref,
+            'huc': cross_field_ref_validator.huc_ref_validator.country_state_ref,
+            'aquifers': cross_field_ref_validator.aquifer_ref_validator.country_state_ref,
+            'national_aquifers': cross_field_ref_validator.national_aquifer_ref_validator.country_state_ref
+        }
+        self._national_water_use = cross_field_ref_validator.national_water_use_ref
+        self._site_type_transitions = error_validator.transition_validator.site_type_transition_ref
+
+    def get_list_names(self):
+        '''
+        :return: sorted list of str - the fields which have a list in reference_lists.json
+        '''
+        return self._reference_lists.get_field_names()
+
+    def get_list(self, name):
+        '''
+        :param str name: field name
+        :return: sorted list of str - the allowed values of the field or None if the field has no reference list.
+        '''
+        if name not in self._reference_lists.get_field_names():
+            return None
+        return sorted(self._reference_lists.get_reference_set(name))
+
+    def get_state_codes(self, country_code):
+        return self._states.get_state_codes(country_code)
+
+    def get_country_state_list(self, name, country_code, state_code, prefix=''):
+        '''
+        :param str name: one of counties, mcds, huc, aquifers and national_aquifers
+        :param str country_code:
+        :param str state_code:
+        :param str prefix: If specified, only codes which start with prefix are returned. Only used for lists of
+            codes, counties and mcds are always returned in full.
+        :return: list - the entries of the country and state. Counties and MCDs are dicts with their attributes and
+            the others are sorted codes.
+        '''
+        reference = self._country_state_references[name]
+        if name in ('counties', 'mcds'):
+            return reference.get_list_by_country_state(country_code, state_code)
+        codes = reference.get_set_by_country_state(country_code, state_code)
+        return sorted(code for code in codes if code.startswith(prefix))
+
+    def get_site_type_transitions(self, site_type_code=None):
+        '''
+        :param str site_type_code: If specified, only the transitions from this site type are returned.
+        :return: dict of site type code to the sorted list of site types it can be changed to
+        '''
+        if site_type_code is not None:
+            return {site_type_code: sorted(self._site_type_transitions.get_allowed_transition_set(site_type_code))}
+        return {existing_field: sorted(new_fields)
+                for existing_field, new_fields in self._site_type_transitions.get_all_transition_sets().items()}
+
+    def get_national_water_use_codes(self, site_type_code):
+        '''
+        :return: sorted list of str - the national water use codes allowed for site_type_code
+        '''
+        return sorted(self._national_water_use.get_national_water_use_code_set(site_type_code))
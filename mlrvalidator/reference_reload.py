@@ -0,0 +1,188 @@
+'''
+Reloads the reference files and schemas while the application is running.
+
+A new set of validators is built from the files in the background and checked before it replaces the current set.
+Requests take the current ValidatorSet once when they start, so a request which is being validated when the set is
+replaced finishes with the validators it started with.
+'''
+from datetime import datetime, timezone
+import glob
+import logging
+import os
+import threading
+
+from .result_cache import file_fingerprint
+from .validation_pool import ValidationPool
+from .validators.error_validator import ErrorValidator
+from .validators.reference import ReferenceRegistry
+from .validators.reference_snapshot import get_snapshot
+from .validators.reference_store import get_store
+from .validators.warning_validator import WarningValidator
+
+logger = logging.getLogger(__name__)
+
+# Validated by each new set of validators to check that they work before they are used
+CHECK_LOCATIONS = [
+    {'agencyCode': 'USGS ', 'siteNumber': '123456789012345', 'stationName': 'Check station', 'siteTypeCode': 'ST',
+     'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025', 'latitude': ' 430000', 'longitude': ' 0893000',
+     'coordinateAccuracyCode': 'S', 'coordinateDatumCode': 'NAD83', 'coordinateMethodCode': 'M',
+     'hydrologicUnitCode': '070900020604'}
+]
+
+
+class ValidatorSet:
+    '''
+    The error and warning validators built from one version of the reference files and schemas
+    '''
+
+    def __init__(self, error_validator, warning_validator, version, validation_pool=None, reference_registry=None):
+        '''
+        :param ErrorValidator error_validator:
+        :param WarningValidator warning_validator:
+        :param str version: fingerprint of the reference files and schemas used to build the validators
+        :param ValidationPool validation_pool: pool of workers which use the validators, or None
+        :param ReferenceRegistry reference_registry: the registry which loaded the references of the validators
+        '''
+        self.error_validator = error_validator
+        self.warning_validator = warning_validator
+        self.version = version
+        self.validation_pool = validation_pool
+        self.reference_registry = reference_registry
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        # Set by check_validator_set once the validators have validated CHECK_LOCATIONS
+        self.checked = False
+
+
+def load_validator_set(schema_dir, reference_dir, metrics=None, processes=1, use_reference_store=False):
+    '''
+    :param str schema_dir:
+    :param str reference_dir:
+    :param ValidationMetrics metrics: If specified, the new validators are timed.
+    :param int processes: If more than one, the set has a ValidationPool with this many workers.
+    :param boolean use_reference_store: If True, references are read from the ReferenceStore in reference_dir when
+        it is current.
+    :return: ValidatorSet built from the current contents of schema_dir and reference_dir
+    '''
+    # A snapshot or store which has been rebuilt since it was opened must be opened again
+    get_snapshot(reference_dir, reopen=True)
+    if use_reference_store:
+        get_store(reference_dir, reopen=True)
+    reference_registry = ReferenceRegistry(use_store=use_reference_store)
+    error_validator = ErrorValidator(schema_dir, reference_dir, reference_registry=reference_registry,
+                                     metrics=metrics)
+    warning_validator = WarningValidator(schema_dir, reference_dir, reference_registry=reference_registry,
+                                         metrics=metrics)
+    version = file_fingerprint(reference_registry.paths + glob.glob(os.path.join(schema_dir, '*.yml')))
+
+    empty_paths = reference_registry.get_empty_paths()
+    if empty_paths:
+        raise ValueError('Reference files contain no data: {0}'.format(', '.join(empty_paths)))
+
+    if processes > 1:
+        validation_pool = ValidationPool(error_validator, warning_validator, processes)
+    else:
+        validation_pool = None
+
+    return ValidatorSet(error_validator, warning_validator, version, validation_pool=validation_pool,
+                        reference_registry=reference_registry)
+
+
+def check_validator_set(validator_set):
+    '''
+    Validates CHECK_LOCATIONS with the validators in validator_set, which also warms up the references they use
+    :param ValidatorSet validator_set:
+    :raises Exception: whatever the validators raise
+    '''
+    for location in CHECK_LOCATIONS:
+        validator_set.error_validator.validate(location, {})
+        validator_set.warning_validator.validate(location, {})
+        validator_set.error_validator.validate(location, location, update=True)
+    validator_set.checked = True
+
+
+class ValidatorReloader:
+    '''
+    Holds the current ValidatorSet and replaces it with a newly loaded set on request.
+    '''
+
+    def __init__(self, load, validator_set=None, on_swap=None):
+        '''
+        :param function load: called with no arguments to build a new ValidatorSet
+        :param ValidatorSet validator_set: the initial set. If not specified, load is called.
+        :param function on_swap: called with the new ValidatorSet after it has replaced the current set
+        '''
+        self._load = load
+        self._on_swap = on_swap
+        self._current = validator_set if validator_set is not None else load()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reload_count = 0
+        self.last_error = None
+        self.last_attempt = None
+
+    @property
+    def current(self):
+        '''
+        :return: ValidatorSet - take this once per request so that the whole request uses the same validators
+        '''
+        return self._current
+
+    @property
+    def reloading(self):
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def reload(self, wait=False):
+        '''
+        Loads and checks a new ValidatorSet in a background thread and then replaces the current set with it. If the
+        new set can not be loaded or fails its check, the current set is kept.
+        :param boolean wait: If True, returns once the reload has finished.
+        :return: boolean - False if a reload was already in progress, in which case no new reload is started.
+        '''
+        with self._lock:
+            if self.reloading:
+                return False
+            self._thread = threading.Thread(target=self._reload, name='reference-reload', daemon=True)
+            self._thread.start()
+            thread = self._thread
+
+        if wait:
+            thread.join()
+        return True
+
+    def _reload(self):
+        self.last_attempt = datetime.now(timezone.utc).isoformat()
+        try:
+            validator_set = self._load()
+            check_validator_set(validator_set)
+        except Exception as err:
+            self.last_error = '{0}: {1}'.format(type(err).__name__, err)
+            logger.exception('Reloading the reference files failed, continuing with version %s',
+                             self._current.version)
+            return
+
+        old_validator_set = self._current
+        self._current = validator_set
+        self.reload_count += 1
+        self.last_error = None
+        logger.info('Reference files reloaded, version %s replaces %s', validator_set.version,
+                    old_validator_set.version)
+        if self._on_swap is not None:
+            self._on_swap(validator_set)
+        if old_validator_set.validation_pool is not None:
+            # Waits for batches which are still using the old workers
+            old_validator_set.validation_pool.close()
+
+    def status(self):
+        '''
+        :return: dict describing the current set and the last reload
+        '''
+        current = self._current
+        return {
+            'referenceVersion': current.version,
+            'loadedAt': current.loaded_at,
+            'reloading': self.reloading,
+            'reloadCount': self.reload_count,
+            'lastAttempt': self.last_attempt,
+            'lastError': self.last_error
+        }
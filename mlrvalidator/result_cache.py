@@ -0,0 +1,127 @@
+'''
+Cache of validation responses keyed by a hash of the validated payload, so that a location which is submitted again,
+for instance when a DDot file is resubmitted after fixing one row, is not validated from scratch.
+
+Keys also contain a fingerprint of the reference files and schemas which the validators were built from. Changing the
+fingerprint, which happens whenever the validators are rebuilt from different reference data or schemas, drops every
+cached response.
+'''
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def payload_hash(payload):
+    '''
+    :param payload: json serializable value
+    :return: str - sha256 of the canonical json encoding of payload, so equal payloads have the same hash whatever the
+        order of their keys.
+    '''
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(paths):
+    '''
+    :param list of str paths: the reference files and schemas used by the validators
+    :return: str - sha256 of the names and contents of the files in paths
+    '''
+    sha = hashlib.sha256()
+    for path in sorted(paths):
+        sha.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as fd:
+            sha.update(fd.read())
+    return sha.hexdigest()
+
+
+class ResultCache:
+    '''
+    Least recently used cache of validation responses with an optional time to live. It can be used from several
+    threads at once.
+    '''
+
+    def __init__(self, fingerprint, max_entries, ttl_seconds=None, clock=time.monotonic):
+        '''
+        :param str fingerprint: identifies the reference files and schemas of the validators, see file_fingerprint
+        :param int max_entries: the least recently used response is evicted when more than this many are cached
+        :param float ttl_seconds: responses older than this are not used. If None responses do not expire.
+        :param function clock: returns the current time in seconds
+        '''
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_fingerprint(self, fingerprint):
+        '''
+        Drops all cached responses if fingerprint differs from the current fingerprint
+        :param str fingerprint:
+        '''
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self.fingerprint = fingerprint
+                self._entries.clear()
+
+    def get_or_validate(self, payload, validate, fingerprint=None):
+        '''
+        :param payload: json serializable value containing everything which validate depends on
+        :param function validate: called with no arguments to produce the response when it is not cached
+        :param str fingerprint: fingerprint of the validators used by validate. Responses are only cached or reused
+            when this is the current fingerprint. Defaults to the current fingerprint.
+        :return: the cached response for payload or the response returned by validate
+        '''
+        key = payload_hash(payload)
+        with self._lock:
+            if fingerprint is None:
+                fingerprint = self.fingerprint
+            entry = self._entries.get((fingerprint, key))
+            if entry is not None:
+                created, response = entry
+                if self.ttl_seconds is None or self._clock() - created < self.ttl_seconds:
+                    self._entries.move_to_end((fingerprint, key))
+                    self.hits += 1
+                    return response
+                del self._entries[(fingerprint, key)]
+            self.misses += 1
+
+        response = validate()
+
+        with self._lock:
+            # The fingerprint may have changed while validating, in which case the response is not cached
+            if fingerprint == self.fingerprint:
+                self._entries[(fingerprint, key)] = (self._clock(), response)
+                self._entries.move_to_end((fingerprint, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        '''
+        :return: dict - the number of cached responses, hits, misses and evictions and the hit rate
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups else 0.0,
+                'fingerprint': self.fingerprint
+            }
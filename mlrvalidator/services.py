@@ -1,12 +1,19 @@
 
+import json
+
 import pkg_resources
 
-from flask import request
+from flask import g, request, Response, stream_with_context
 from flask_restplus import Api, Resource, fields
-from werkzeug.exceptions import BadRequest
+from flask_restplus.swagger import Swagger
+from werkzeug.exceptions import BadRequest, NotFound
 
-from app import application, error_validator, warning_validator
+from app import application, jwt_key_provider, result_cache, startup_budgets, startup_profiler, token_cache, \
+    validation_metrics, validator_reloader
+from .batch import NDJSON_MIMETYPES, parse_batch, validate_batch, validate_stream, validation_response
 from .flask_restplus_jwt import JWTRestplusManager, jwt_required
+from .metrics import CONTENT_TYPE
+from .reference_lookup import ReferenceLookup, reference_etag
 
 
 # This will add the Authorize button to the swagger docs
@@ -28,7 +35,7 @@ api = Api(application,
           )
 
 # Setup the Flask-JWT-Simple extension
-jwt = JWTRestplusManager(api, application)
+jwt = JWTRestplusManager(api, application, key_provider=jwt_key_provider, token_cache=token_cache)
 
 ddot_location_model = api.model('DdotLocationModel', {
     "agencyCode": fields.String(),
@@ -109,21 +116,43 @@ validation_model = api.model('SuccessModel', {'validation_passed_message': field
                                               'fatal_error_message': fields.String()})
 
 
+REFERENCE_VERSION_HEADER = 'X-Reference-Version'
+
+
+def _get_validator_set():
+    '''
+    :return: ValidatorSet - the validators to be used for the whole of the current request. The version of their
+        reference files is added to the response headers.
+    '''
+    validator_set = validator_reloader.current
+    g.reference_version = validator_set.version
+    return validator_set
+
+
+@application.after_request
+def add_reference_version_header(response):
+    reference_version = g.get('reference_version')
+    if reference_version is not None:
+        response.headers[REFERENCE_VERSION_HEADER] = reference_version
+    return response
+
+
 def _validate_response(req_json, update=False):
     if 'ddotLocation' not in req_json or 'existingLocation' not in req_json:
         raise BadRequest('Request is missing required components (ddotLocation and/or existingLocation).')
     ddot_location = req_json.get('ddotLocation')
     existing_location = req_json.get('existingLocation')
-    no_errors = error_validator.validate(ddot_location, existing_location, update=update)
-    no_warnings = warning_validator.validate(ddot_location, existing_location)
+    validators = _get_validator_set()
+
+    def validate():
+        return validation_response(validators.error_validator, validators.warning_validator, ddot_location,
+                                   existing_location, update=update)
 
-    response = {}
-    if not no_errors:
-        response["fatal_error_message"] = error_validator.errors
-    if not no_warnings:
-        response["warning_message"] = warning_validator.warnings
-    if no_errors and no_warnings:
-        response["validation_passed_message"] = 'Validations Passed'
+    if result_cache is None:
+        response = validate()
+    else:
+        payload = {'ddotLocation': ddot_location, 'existingLocation': existing_location, 'update': update}
+        response = result_cache.get_or_validate(payload, validate, fingerprint=validators.version)
 
     return response, 200
 
@@ -168,32 +197,547 @@ class UpdateValidator(Resource):
         return response, status
 
 
+batch_item_model = api.model('BatchItemModel', {
+    'ddotLocation': fields.Nested(ddot_location_model),
+    'existingLocation': fields.Nested(location_model),
+    'transactionType': fields.String(enum=['add', 'update'])
+})
+
+batch_result_model = api.model('BatchResultModel', {
+    'validation_passed_message': fields.String(),
+    'warning_message': fields.String(),
+    'fatal_error_message': fields.String(),
+    'error_message': fields.String()
+})
+
+batch_model = api.model('BatchModel', {
+    'results': fields.List(fields.Nested(batch_result_model))
+})
+
+batch_limits_model = api.model('BatchLimitsModel', {
+    'maxItems': fields.Integer()
+})
+
+
+@api.route('/validators/batch')
+class BatchValidator(Resource):
+
+    @api.response(200, 'Success', batch_limits_model)
+    def get(self):
+        return {'maxItems': application.config['BATCH_MAX_ITEMS']}
+
+    @api.response(200, 'Successfully validated. Results are in the same order as the request items', batch_model)
+    @api.response(400, 'Invalid validation request', error_model)
+    @api.response(401, 'Not authorized', error_model)
+    @api.response(422, 'Invalid token', error_model)
+    @api.response(500, 'Error during validation', error_model)
+    @api.doc(security='apikey',
+             description='Accepts a json array or newline delimited json (Content-Type application/x-ndjson) of items')
+    @api.expect([batch_item_model])
+    @jwt_required
+    def post(self):
+        try:
+            items = parse_batch(request.get_data(as_text=True), request.mimetype,
+                                application.config['BATCH_MAX_ITEMS'])
+        except ValueError as err:
+            return {'error_message': str(err)}, 400
+
+        validators = _get_validator_set()
+        if validators.validation_pool is not None:
+            results = validators.validation_pool.validate_batch(items)
+        else:
+            results = validate_batch(validators.error_validator, validators.warning_validator, items)
+
+        return {'results': results}, 200
+
+
+@api.route('/validators/stream')
+class StreamValidator(Resource):
+
+    @api.response(200, 'Successfully validated. A line of json is returned for each request item, in the same order',
+                  batch_result_model)
+    @api.response(401, 'Not authorized', error_model)
+    @api.response(422, 'Invalid token', error_model)
+    @api.doc(security='apikey',
+             description='Accepts newline delimited json (Content-Type application/x-ndjson) of items. Each item is '
+                         'validated as soon as it has been read and its result is written to the chunked response')
+    @api.expect([batch_item_model])
+    @jwt_required
+    def post(self):
+        validators = _get_validator_set()
+        lines = validate_stream(validators.error_validator, validators.warning_validator, request.stream)
+        return Response(stream_with_context(lines), mimetype=NDJSON_MIMETYPES[0])
+
+
+@api.route('/metrics')
+class Metrics(Resource):
+
+    @api.response(200, 'Validation rule and stage metrics in Prometheus text format')
+    @api.response(404, 'Metrics are not enabled', error_model)
+    def get(self):
+        if validation_metrics is None:
+            return {'error_message': 'Metrics are not enabled'}, 404
+        return Response(validation_metrics.render(), content_type=CONTENT_TYPE)
+
+
+result_cache_model = api.model('ResultCacheModel', {
+    'entries': fields.Integer(),
+    'maxEntries': fields.Integer(),
+    'ttlSeconds': fields.Float(),
+    'hits': fields.Integer(),
+    'misses': fields.Integer(),
+    'evictions': fields.Integer(),
+    'hitRate': fields.Float(),
+    'fingerprint': fields.String()
+})
+
+
+@api.route('/validators/cache')
+class ResultCacheStats(Resource):
+
+    @api.response(200, 'Statistics of the validation result cache', result_cache_model)
+    @api.response(404, 'The result cache is not enabled', error_model)
+    def get(self):
+        if result_cache is None:
+            return {'error_message': 'The result cache is not enabled'}, 404
+        return result_cache.stats()
+
+
+reference_list_model = api.model('ReferenceListModel', {
+    'name': fields.String(),
+    'values': fields.List(fields.String())
+})
+
+reference_lists_model = api.model('ReferenceListsModel', {
+    'lists': fields.List(fields.String())
+})
+
+reference_codes_model = api.model('ReferenceCodesModel', {
+    'codes': fields.List(fields.String())
+})
+
+county_model = api.model('CountyModel', {
+    'countyCode': fields.String(),
+    'county_min_lat_va': fields.String(),
+    'county_max_lat_va': fields.String(),
+    'county_min_long_va': fields.String(),
+    'county_max_long_va': fields.String(),
+    'county_min_alt_va': fields.String(),
+    'county_max_alt_va': fields.String()
+})
+
+counties_model = api.model('CountiesModel', {
+    'counties': fields.List(fields.Nested(county_model))
+})
+
+mcd_county_model = api.model('MinorCivilDivisionCountyModel', {
+    'countyCode': fields.String(),
+    'minorCivilDivisionCodes': fields.List(fields.String())
+})
+
+mcd_counties_model = api.model('MinorCivilDivisionCountiesModel', {
+    'counties': fields.List(fields.Nested(mcd_county_model))
+})
+
+site_type_transitions_model = api.model('SiteTypeTransitionsModel', {
+    'transitions': fields.Raw(description='Each siteTypeCode and the siteTypeCodes it can be changed to')
+})
+
+candidate_county_model = api.model('CandidateCountyModel', {
+    'countryCode': fields.String(),
+    'stateFipsCode': fields.String(),
+    'countyCode': fields.String()
+})
+
+candidate_counties_model = api.model('CandidateCountiesModel', {
+    'counties': fields.List(fields.Nested(candidate_county_model))
+})
+
+COUNTRY_STATE_PARAMS = {'country': 'countryCode', 'state': 'stateFipsCode'}
+
+
+def _get_args(*names):
+    '''
+    :param names: names of the required query parameters
+    :return: list of str - the value of each parameter
+    :raises BadRequest: if a parameter is missing or empty
+    '''
+    values = [request.args.get(name, '').strip() for name in names]
+    missing = [name for name, value in zip(names, values) if not value]
+    if missing:
+        raise BadRequest('Missing query parameters: {0}'.format(', '.join(missing)))
+    return values
+
+
+def _reference_response(lookup):
+    '''
+    Responds with the result of lookup, or with 304 Not Modified if the request's If-None-Match contains the ETag of
+    the response. The ETag depends only on the reference version and the request, so the lookup is not made for a
+    304 response.
+    :param function lookup: called with the ReferenceLookup of the current validators and returns the response body.
+        Raises BadRequest or NotFound if the request is not valid.
+    :return: flask.Response
+    '''
+    validators = _get_validator_set()
+    etag = reference_etag(validators.version, request.full_path)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            body = lookup(ReferenceLookup(validators.error_validator))
+        except BadRequest as err:
+            return {'error_message': err.description}, 400
+        except NotFound as err:
+            return {'error_message': err.description}, 404
+        response = api.make_response(body, 200)
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = application.config['REFERENCE_CACHE_MAX_AGE']
+    return response
+
+
+def _country_state_list(name, key, prefix=False):
+    def lookup(references):
+        country, state = _get_args('country', 'state')
+        return {key: references.get_country_state_list(name, country, state,
+                                                       prefix=request.args.get('prefix', '') if prefix else '')}
+    return _reference_response(lookup)
+
+
+@api.route('/references')
+class ReferenceListNames(Resource):
+
+    @api.response(200, 'The names of the lists served at /references/{name}', reference_lists_model)
+    @api.response(304, 'Not modified')
+    def get(self):
+        return _reference_response(lambda references: {'lists': references.get_list_names()})
+
+
+@api.route('/references/<string:name>')
+@api.doc(params={'name': 'a field with a reference list, such as siteTypeCode'})
+class ReferenceList(Resource):
+
+    @api.response(200, 'The allowed values of the field', reference_list_model)
+    @api.response(304, 'Not modified')
+    @api.response(404, 'The field has no reference list', error_model)
+    def get(self, name):
+        def lookup(references):
+            values = references.get_list(name)
+            if values is None:
+                raise NotFound('There is no reference list for {0}'.format(name))
+            return {'name': name, 'values': values}
+        return _reference_response(lookup)
+
+
+@api.route('/references/states')
+class StateCodes(Resource):
+
+    @api.response(200, 'The state codes of the country', reference_codes_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing country', error_model)
+    @api.doc(params={'country': 'countryCode'})
+    def get(self):
+        def lookup(references):
+            country, = _get_args('country')
+            return {'codes': references.get_state_codes(country)}
+        return _reference_response(lookup)
+
+
+@api.route('/references/counties')
+class CountyList(Resource):
+
+    @api.response(200, 'The counties of the state', counties_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing country or state', error_model)
+    @api.doc(params=COUNTRY_STATE_PARAMS)
+    def get(self):
+        return _country_state_list('counties', 'counties')
+
+
+@api.route('/references/mcds')
+class MinorCivilDivisionList(Resource):
+
+    @api.response(200, 'The minor civil divisions of each county of the state', mcd_counties_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing country or state', error_model)
+    @api.doc(params=COUNTRY_STATE_PARAMS)
+    def get(self):
+        return _country_state_list('mcds', 'counties')
+
+
+@api.route('/references/huc')
+class HydrologicUnitCodeList(Resource):
+
+    @api.response(200, 'The hydrologic unit codes of the state', reference_codes_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing country or state', error_model)
+    @api.doc(params=dict(COUNTRY_STATE_PARAMS, prefix='only return the codes which start with this prefix'))
+    def get(self):
+        return _country_state_list('huc', 'codes', prefix=True)
+
+
+@api.route('/references/aquifers')
+class AquiferList(Resource):
+
+    @api.response(200, 'The aquifer codes of the state', reference_codes_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing country or state', error_model)
+    @api.doc(params=COUNTRY_STATE_PARAMS)
+    def get(self):
+        return _country_state_list('aquifers', 'codes')
+
+
+@api.route('/references/national_aquifers')
+class NationalAquiferList(Resource):
+
+    @api.response(200, 'The national aquifer codes of the state', reference_codes_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing country or state', error_model)
+    @api.doc(params=COUNTRY_STATE_PARAMS)
+    def get(self):
+        return _country_state_list('national_aquifers', 'codes')
+
+
+@api.route('/references/site_type_transitions')
+class SiteTypeTransitions(Resource):
+
+    @api.response(200, 'The allowed changes of siteTypeCode', site_type_transitions_model)
+    @api.response(304, 'Not modified')
+    @api.doc(params={'siteTypeCode': 'If specified, only the transitions from this site type are returned'})
+    def get(self):
+        site_type_code = request.args.get('siteTypeCode')
+        return _reference_response(
+            lambda references: {'transitions': references.get_site_type_transitions(site_type_code)})
+
+
+@api.route('/references/national_water_use')
+class NationalWaterUseCodeList(Resource):
+
+    @api.response(200, 'The national water use codes allowed for the site type', reference_codes_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Missing siteTypeCode', error_model)
+    @api.doc(params={'siteTypeCode': 'siteTypeCode'})
+    def get(self):
+        def lookup(references):
+            site_type_code, = _get_args('siteTypeCode')
+            return {'codes': references.get_national_water_use_codes(site_type_code)}
+        return _reference_response(lookup)
+
+
+@api.route('/references/candidate_counties')
+class CandidateCounties(Resource):
+
+    @api.response(200, 'The counties whose bounding boxes contain the coordinate', candidate_counties_model)
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid coordinate', error_model)
+    @api.doc(params={'latitude': 'a sign or space followed by DDMMSS[.ss]',
+                     'longitude': 'a sign or space followed by DDDMMSS[.ss], positive to the west'})
+    def get(self):
+        latitude = request.args.get('latitude', '')
+        longitude = request.args.get('longitude', '')
+        county_boxes = _get_validator_set().warning_validator.cross_field_ref_validator.county_boxes_ref
+
+        def lookup(references):
+            counties = county_boxes.get_candidate_counties(latitude, longitude)
+            if counties is None:
+                raise BadRequest('latitude and longitude must be in degrees, minutes and seconds')
+            return {'counties': counties}
+        return _reference_response(lookup)
+
+
+reload_status_model = api.model('ReloadStatusModel', {
+    'referenceVersion': fields.String(),
+    'loadedAt': fields.String(),
+    'reloading': fields.Boolean(),
+    'reloadCount': fields.Integer(),
+    'lastAttempt': fields.String(),
+    'lastError': fields.String()
+})
+
+
+@api.route('/admin/reload')
+class ReloadReferences(Resource):
+
+    @api.response(200, 'The version of the reference files in use and the status of the last reload',
+                  reload_status_model)
+    def get(self):
+        return validator_reloader.status()
+
+    @api.response(202, 'The reference files are being reloaded', reload_status_model)
+    @api.response(401, 'Not authorized', error_model)
+    @api.response(409, 'A reload is already in progress', reload_status_model)
+    @api.response(422, 'Invalid token', error_model)
+    @api.doc(security='apikey',
+             description='Loads the reference files and schemas in the background. Once they have been checked they '
+                         'are used for new requests. Requests which have already started use the previous version')
+    @jwt_required
+    def post(self):
+        started = validator_reloader.reload()
+        return validator_reloader.status(), 202 if started else 409
+
+
+startup_phase_model = api.model('StartupPhaseModel', {
+    'name': fields.String(),
+    'depth': fields.Integer(description='The number of phases this phase is nested in'),
+    'seconds': fields.Float(),
+    'allocatedBytes': fields.Integer(description='Only recorded when startup_trace_memory is true')
+})
+
+startup_budget_model = api.model('StartupBudgetModel', {
+    'name': fields.String(),
+    'seconds': fields.Float(),
+    'budget': fields.Float()
+})
+
+startup_profile_model = api.model('StartupProfileModel', {
+    'totalSeconds': fields.Float(),
+    'traceMemory': fields.Boolean(),
+    'phases': fields.List(fields.Nested(startup_phase_model)),
+    'budgets': fields.Raw(description='Phase name pattern to budget in seconds'),
+    'exceeded': fields.List(fields.Nested(startup_budget_model))
+})
+
+
+@api.route('/diagnostics/startup')
+class StartupProfile(Resource):
+
+    @api.response(200, 'The time taken by each phase of startup and the phases which exceeded their budgets',
+                  startup_profile_model)
+    def get(self):
+        return startup_profiler.report(startup_budgets)
+
+
+token_cache_model = api.model('TokenCacheModel', {
+    'entries': fields.Integer(),
+    'maxEntries': fields.Integer(),
+    'hits': fields.Integer(),
+    'misses': fields.Integer(),
+    'evictions': fields.Integer(),
+    'hitRate': fields.Float()
+})
+
+
+@api.route('/diagnostics/token_cache')
+class TokenCacheStats(Resource):
+
+    @api.response(200, 'Statistics of the verified token cache', token_cache_model)
+    @api.response(404, 'The token cache is not enabled', error_model)
+    def get(self):
+        if token_cache is None:
+            return {'error_message': 'The token cache is not enabled'}, 404
+        return token_cache.stats()
+
+
 version_model = api.model('VersionModel', {
     'version': fields.String,
-    'artifact': fields.String
+    'artifact': fields.String,
+    'referenceVersion': fields.String
 })
 
 
+def _get_version_info():
+    try:
+        distribution = pkg_resources.get_distribution('usgs_wma_mlr_validator')
+    except pkg_resources.DistributionNotFound:
+        return {
+            "version": "local_development",
+            "artifact": None
+        }
+    return {
+        "version": distribution.version,
+        "artifact": distribution.project_name
+    }
+
+
+# Looking up the distribution is slow and it does not change while the application is running
+VERSION_INFO = _get_version_info()
+
+
 @api.route('/version')
 class Version(Resource):
 
     @api.response(200, 'Success', version_model)
     def get(self):
-        try:
-            distribution = pkg_resources.get_distribution('usgs_wma_mlr_validator')
-        except pkg_resources.DistributionNotFound:
-            resp = {
-                "version": "local_development",
-                "artifact": None
-            }
-        else:
-            resp = {
-                "version": distribution.version,
-                "artifact": distribution.project_name
-            }
-        return resp
+        return dict(VERSION_INFO, referenceVersion=validator_reloader.current.version)
+
+
+liveness_model = api.model('LivenessModel', {
+    'status': fields.String()
+})
+
+readiness_model = api.model('ReadinessModel', {
+    'ready': fields.Boolean(),
+    'referencesLoaded': fields.Boolean(),
+    'warm': fields.Boolean(description='The validators have passed the check made after they are loaded'),
+    'tokenKeysLoaded': fields.Boolean(description='False until the token keys have been loaded. Does not affect '
+                                                  'ready, as only the validation endpoints need the keys'),
+    'referenceVersion': fields.String()
+})
+
+
+@api.route('/health/live')
+class Liveness(Resource):
+
+    @api.response(200, 'The application is running', liveness_model)
+    def get(self):
+        return {'status': 'UP'}
+
+
+@api.route('/health/ready')
+class Readiness(Resource):
+
+    @api.response(200, 'The reference files are loaded and the validators are ready', readiness_model)
+    @api.response(503, 'The validators are not ready', readiness_model)
+    def get(self):
+        validator_set = validator_reloader.current
+        references_loaded = bool(validator_set.reference_registry is None or validator_set.reference_registry.paths)
+        ready = references_loaded and validator_set.checked
+        return {
+            'ready': ready,
+            'referencesLoaded': references_loaded,
+            'warm': validator_set.checked,
+            'tokenKeysLoaded': jwt_key_provider is None or jwt_key_provider.has_keys,
+            'referenceVersion': validator_set.version
+        }, 200 if ready else 503
+
 
 @api.errorhandler
 def default_error_handler(error):
     '''Default error handler'''
-    return {'error_message': str(error)}, getattr(error, 'code', 500)
\ No newline at end of file
+    return {'error_message': str(error)}, getattr(error, 'code', 500)
+
+
+# The Swagger document is serialized once for each path the application is served under, rather than for every request
+_swagger_documents = {}
+
+
+def _get_swagger_document():
+    '''
+    :return: bytes - the Swagger document of api as json
+    '''
+    script_root = request.script_root
+    document = _swagger_documents.get(script_root)
+    if document is None:
+        document = json.dumps(Swagger(api).as_dict()).encode('utf-8')
+        _swagger_documents[script_root] = document
+    return document
+
+
+def swagger_json():
+    '''
+    Replaces the flask_restplus view of /swagger.json, which serializes the document on every request
+    '''
+    try:
+        document = _get_swagger_document()
+    except Exception:
+        application.logger.exception('Unable to render schema')
+        return Response(json.dumps({'error': 'Unable to render schema'}), status=500, content_type='application/json')
+    return Response(document, content_type='application/json')
+
+
+application.view_functions[api.endpoint('specs')] = swagger_json
+
+# All of the routes have been registered, so the document for the application root can be serialized now
+with application.test_request_context():
+    swagger_json()
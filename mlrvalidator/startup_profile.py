@@ -0,0 +1,219 @@
+'''
+Records the wall time, and optionally the memory allocated, of each phase of application startup: importing the
+modules, reading the configuration, loading the token keys, loading each reference file and compiling each schema.
+Budgets can be set for any phase so that a slow cold start is caught before it exceeds the readiness timeout of the
+deployment.
+
+Only the standard library is imported so that the profiler can be started before anything else is imported. The
+phases recorded by app.py are served at /diagnostics/startup. To check a cold start against the budgets, run from the
+project directory:
+    python -m mlrvalidator.startup_profile --budget total=20 --budget "reference:*=2"
+
+The check exits with status 1 if any budget is exceeded.
+'''
+import argparse
+from contextlib import contextmanager
+import fnmatch
+import os
+import sys
+import time
+import tracemalloc
+
+TOTAL = 'total'
+
+
+def parse_budgets(value):
+    '''
+    :param str value: comma separated phase=seconds, for instance 'imports=3,reference:*=2,total=20'. Phase names may
+        contain the wildcards accepted by fnmatch and 'total' is the time from the start of the profile to its end.
+    :return: dict of phase name pattern to budget in seconds
+    :raises ValueError: if value is not in this form
+    '''
+    budgets = {}
+    for budget in value.split(','):
+        if not budget.strip():
+            continue
+        name, separator, seconds = budget.rpartition('=')
+        if not separator or not name.strip():
+            raise ValueError('Startup budgets are phase=seconds, not {0}'.format(budget))
+        budgets[name.strip()] = float(seconds)
+    return budgets
+
+
+class StartupPhase:
+
+    def __init__(self, name, depth):
+        '''
+        :param str name:
+        :param int depth: the number of phases which were running when this phase started
+        '''
+        self.name = name
+        self.depth = depth
+        self.seconds = None
+        self.allocated_bytes = None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'seconds': self.seconds,
+            'allocatedBytes': self.allocated_bytes
+        }
+
+
+class StartupProfiler:
+    '''
+    Phases are only recorded between start and finish, so code which is also run after startup, such as a reference
+    reload, can always be wrapped in a phase. Phases may be nested and the time and memory of a phase include those of
+    the phases within it.
+    '''
+
+    def __init__(self):
+        self.phases = []
+        self.total_seconds = None
+        self.trace_memory = False
+        self._active = False
+        self._depth = 0
+        self._started = None
+        self._started_tracing = False
+
+    @property
+    def active(self):
+        return self._active
+
+    def start(self, trace_memory=False):
+        '''
+        :param boolean trace_memory: If True, the memory allocated in each phase is traced with tracemalloc. Tracing
+            slows down startup, so times are only comparable between profiles with the same setting.
+        '''
+        self.phases = []
+        self.total_seconds = None
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._active = True
+        self._started = time.perf_counter()
+
+    def finish(self):
+        '''
+        Stops recording phases. Memory tracing is stopped if it was started by this profiler.
+        '''
+        if not self._active:
+            return
+        self.total_seconds = time.perf_counter() - self._started
+        self._active = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        '''
+        Records the code run within the context as the phase name. Does nothing if the profiler is not active.
+        :param str name:
+        '''
+        if not self._active:
+            yield
+            return
+
+        startup_phase = StartupPhase(name, self._depth)
+        self.phases.append(startup_phase)
+        self._depth += 1
+        allocated_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            startup_phase.seconds = time.perf_counter() - started
+            if allocated_before is not None and tracemalloc.is_tracing():
+                startup_phase.allocated_bytes = tracemalloc.get_traced_memory()[0] - allocated_before
+            self._depth -= 1
+
+    def check_budgets(self, budgets):
+        '''
+        :param dict budgets: phase name pattern to seconds, see parse_budgets
+        :return: list of (phase name, seconds, budget) for each recorded phase which took longer than its budget. A
+            phase which matches several patterns is checked against the smallest budget.
+        '''
+        exceeded = []
+        timings = [(startup_phase.name, startup_phase.seconds) for startup_phase in self.phases]
+        if self.total_seconds is not None:
+            timings.append((TOTAL, self.total_seconds))
+        for name, seconds in timings:
+            matching = [budget for pattern, budget in budgets.items() if fnmatch.fnmatchcase(name, pattern)]
+            if seconds is not None and matching and seconds > min(matching):
+                exceeded.append((name, seconds, min(matching)))
+        return exceeded
+
+    def report(self, budgets=None):
+        '''
+        :param dict budgets: If specified, the phases which exceeded their budgets are included
+        :return: json serializable dict of the recorded phases
+        '''
+        budgets = budgets or {}
+        return {
+            'totalSeconds': self.total_seconds,
+            'traceMemory': self.trace_memory,
+            'phases': [startup_phase.to_dict() for startup_phase in self.phases],
+            'budgets': budgets,
+            'exceeded': [{'name': name, 'seconds': seconds, 'budget': budget}
+                         for name, seconds, budget in self.check_budgets(budgets)]
+        }
+
+    def format_report(self, budgets=None):
+        '''
+        :param dict budgets: If specified, phases which exceeded their budgets are marked
+        :return: str - a line for each phase, indented by its depth, followed by the total
+        '''
+        exceeded = set(name for name, seconds, budget in self.check_budgets(budgets or {}))
+        lines = ['  {0:<60} {1:>9} {2:>12}'.format('phase', 'seconds', 'allocated MB')]
+        for startup_phase in self.phases:
+            lines.append('  {0:<60} {1:>9.3f} {2:>12}{3}'.format(
+                '  ' * startup_phase.depth + startup_phase.name, startup_phase.seconds or 0,
+                '' if startup_phase.allocated_bytes is None else '{0:.1f}'.format(startup_phase.allocated_bytes / 1e6),
+                '  OVER BUDGET' if startup_phase.name in exceeded else ''))
+        if self.total_seconds is not None:
+            lines.append('  {0:<60} {1:>9.3f} {2:>12}{3}'.format(TOTAL, self.total_seconds, '',
+                                                                 '  OVER BUDGET' if TOTAL in exceeded else ''))
+        return '\n'.join(lines)
+
+
+# The profiler used by the application. Modules which load data at startup record their phases with profile_phase.
+startup_profiler = StartupProfiler()
+
+
+def profile_phase(name):
+    '''
+    :param str name:
+    :return: context manager which records name as a phase of the application's startup profile
+    '''
+    return startup_profiler.phase(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile the startup of the application and check its phase budgets')
+    parser.add_argument('--budget', action='append', default=[],
+                        help='phase=seconds. Overrides the budgets in startup_budgets. May be repeated.')
+    parser.add_argument('--trace-memory', action='store_true', help='trace the memory allocated in each phase')
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        os.environ['startup_trace_memory'] = 'true'
+
+    # When run with -m this module is __main__, so the profiler used by the application is the one in app
+    import app
+
+    budgets = dict(app.startup_budgets)
+    budgets.update(parse_budgets(','.join(args.budget)))
+    profiler = app.startup_profiler
+    print(profiler.format_report(budgets))
+
+    exceeded = profiler.check_budgets(budgets)
+    for name, seconds, budget in exceeded:
+        print('{0} took {1:.3f} seconds, more than its budget of {2} seconds'.format(name, seconds, budget))
+    return 1 if exceeded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import json
+from unittest import TestCase, mock
+
+from app import application
+from ..batch import parse_batch, validate_batch, validate_batch_item, validate_stream
+from ..validators.error_validator import ErrorValidator
+from ..validators.validation_result import ValidationResult
+from ..validators.warning_validator import WarningValidator
+
+
+class ParseBatchTestCase(TestCase):
+
+    def setUp(self):
+        self.items = [{'ddotLocation': {}, 'existingLocation': {}, 'transactionType': 'add'},
+                      {'ddotLocation': {}, 'existingLocation': {}, 'transactionType': 'update'}]
+
+    def test_json_array(self):
+        self.assertEqual(parse_batch(json.dumps(self.items), 'application/json', 10), self.items)
+
+    def test_ndjson(self):
+        data = '{0}\n\n{1}\n'.format(json.dumps(self.items[0]), json.dumps(self.items[1]))
+        self.assertEqual(parse_batch(data, 'application/x-ndjson', 10), self.items)
+
+    def test_invalid_json(self):
+        self.assertRaises(ValueError, parse_batch, '[{"ddotLocation": ', 'application/json', 10)
+        self.assertRaises(ValueError, parse_batch, '{"ddotLocation": {}}\n{', 'application/x-ndjson', 10)
+
+    def test_not_an_array(self):
+        self.assertRaises(ValueError, parse_batch, json.dumps(self.items[0]), 'application/json', 10)
+
+    def test_too_many_items(self):
+        self.assertEqual(len(parse_batch(json.dumps(self.items), 'application/json', 2)), 2)
+        self.assertRaises(ValueError, parse_batch, json.dumps(self.items), 'application/json', 1)
+
+
+class ValidateBatchItemTestCase(TestCase):
+
+    def setUp(self):
+        self.error_validator = mock.Mock()
+        self.error_validator.validate_context.return_value = ValidationResult()
+        self.warning_validator = mock.Mock()
+        self.warning_validator.validate_context.return_value = ValidationResult()
+
+    def test_transaction_types(self):
+        validate_batch_item(self.error_validator, self.warning_validator,
+                            {'ddotLocation': {'A': '1'}, 'existingLocation': {}, 'transactionType': 'add'})
+        context = self.error_validator.validate_context.call_args[0][0]
+        self.assertEqual((context.document, context.existing_document, context.update), ({'A': '1'}, {}, False))
+        self.warning_validator.validate_context.assert_called_with(context)
+
+        validate_batch_item(self.error_validator, self.warning_validator,
+                            {'ddotLocation': {'A': '1'}, 'existingLocation': {'A': '2'}, 'transactionType': 'update'})
+        context = self.error_validator.validate_context.call_args[0][0]
+        self.assertEqual((context.document, context.existing_document, context.update), ({'A': '1'}, {'A': '2'}, True))
+
+    def test_invalid_transaction_type(self):
+        response = validate_batch_item(self.error_validator, self.warning_validator,
+                                       {'ddotLocation': {}, 'existingLocation': {}, 'transactionType': 'delete'})
+        self.assertIn('error_message', response)
+        self.error_validator.validate_context.assert_not_called()
+
+    def test_missing_locations(self):
+        for item in [{'ddotLocation': {}, 'transactionType': 'add'}, ['not', 'a', 'dict']]:
+            response = validate_batch_item(self.error_validator, self.warning_validator, item)
+            self.assertIn('error_message', response)
+        self.error_validator.validate_context.assert_not_called()
+
+
+    def test_locations_not_objects(self):
+        for item in [{'ddotLocation': 'x', 'existingLocation': {}, 'transactionType': 'add'},
+                     {'ddotLocation': {}, 'existingLocation': None, 'transactionType': 'update'},
+                     {'ddotLocation': ['a'], 'existingLocation': {}, 'transactionType': 'add'}]:
+            response = validate_batch_item(self.error_validator, self.warning_validator, item)
+            self.assertEqual(response, {'error_message': 'Item ddotLocation and existingLocation must be json objects.'})
+        self.error_validator.validate_context.assert_not_called()
+
+
+class ValidateBatchTestCase(TestCase):
+
+    def test_bad_item_in_good_batch(self):
+        error_validator = ErrorValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'])
+        warning_validator = WarningValidator(application.config['SCHEMA_DIR'],
+                                             application.config['REFERENCE_FILE_DIR'])
+        items = [
+            {'ddotLocation': {'agencyCode': 'USGS '}, 'existingLocation': {}, 'transactionType': 'add'},
+            {'ddotLocation': 'x', 'existingLocation': {}, 'transactionType': 'add'},
+            {'ddotLocation': {'agencyCode': 'USGS '}, 'existingLocation': None, 'transactionType': 'update'},
+            {'ddotLocation': {'agencyCode': 'XYZ'}, 'existingLocation': {}, 'transactionType': 'add'}
+        ]
+        results = validate_batch(error_validator, warning_validator, items)
+
+        self.assertEqual(len(results), 4)
+        self.assertNotIn('error_message', results[0])
+        self.assertIn('error_message', results[1])
+        self.assertIn('error_message', results[2])
+        self.assertIn('agencyCode', results[3]['fatal_error_message'])
+
+
+class ValidateStreamTestCase(TestCase):
+
+    def setUp(self):
+        self.error_validator = mock.Mock()
+        self.error_validator.validate_context.return_value = ValidationResult()
+        self.warning_validator = mock.Mock()
+        self.warning_validator.validate_context.return_value = ValidationResult()
+        self.item = {'ddotLocation': {}, 'existingLocation': {}, 'transactionType': 'add'}
+
+    def test_result_per_line(self):
+        lines = [json.dumps(self.item).encode('utf-8'), b'\n', b'{"ddotLocation": \n', json.dumps(self.item)]
+        results = [json.loads(line) for line in validate_stream(self.error_validator, self.warning_validator, lines)]
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], {'validation_passed_message': 'Validations Passed'})
+        self.assertIn('error_message', results[1])
+        self.assertEqual(results[2], {'validation_passed_message': 'Validations Passed'})
+
+    def test_bad_lines_do_not_end_the_stream(self):
+        lines = [b'\xff\xfe\n', json.dumps(self.item).encode('utf-8'),
+                 b'{"ddotLocation": "x", "existingLocation": {}, "transactionType": "add"}\n',
+                 b'{"ddotLocation": {}, "existingLocation": null, "transactionType": "add"}\n',
+                 json.dumps(self.item).encode('utf-8')]
+        results = [json.loads(line) for line in validate_stream(self.error_validator, self.warning_validator, lines)]
+
+        self.assertEqual(len(results), 5)
+        self.assertIn('utf-8', results[0]['error_message'])
+        self.assertEqual(results[1], {'validation_passed_message': 'Validations Passed'})
+        self.assertIn('error_message', results[2])
+        self.assertIn('error_message', results[3])
+        self.assertEqual(results[4], {'validation_passed_message': 'Validations Passed'})
+
+    def test_results_are_written_as_lines_are_read(self):
+        lines_read = []
+
+        def lines():
+            for index in range(3):
+                lines_read.append(index)
+                yield json.dumps(self.item) + '\n'
+
+        results = validate_stream(self.error_validator, self.warning_validator, lines())
+
+        next(results)
+        self.assertEqual(lines_read, [0])
+        next(results)
+        self.assertEqual(lines_read, [0, 1])
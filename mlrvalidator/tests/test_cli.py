@@ -0,0 +1,132 @@
+from contextlib import redirect_stdout
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from ..cli import get_file_format, main, make_item, read_records, ValidationSummary
+
+
+class ReadRecordsTestCase(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.locations = [{'agencyCode': 'USGS ', 'siteNumber': '12345678'},
+                          {'agencyCode': 'USGS ', 'siteNumber': '87654321', 'stationName': 'Station'}]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w') as fd:
+            fd.write(contents)
+        return path
+
+    def test_json(self):
+        path = self._write('locations.json', json.dumps(self.locations))
+        self.assertEqual(list(read_records(path, get_file_format(path))), self.locations)
+
+    def test_ndjson(self):
+        path = self._write('locations.ndjson', '\n'.join(json.dumps(location) for location in self.locations) + '\n\n')
+        self.assertEqual(list(read_records(path, get_file_format(path))), self.locations)
+
+    def test_csv(self):
+        path = self._write('locations.csv', 'agencyCode,siteNumber,stationName\nUSGS ,12345678,\nUSGS ,87654321,Station\n')
+        self.assertEqual(list(read_records(path, get_file_format(path))), self.locations)
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, get_file_format, 'locations.txt')
+
+
+class MakeItemTestCase(TestCase):
+
+    def setUp(self):
+        self.existing = {('USGS', '12345678'): {'agencyCode': 'USGS ', 'siteNumber': '12345678', 'stationName': 'Old'}}
+
+    def test_add(self):
+        item = make_item({'agencyCode': 'USGS', 'siteNumber': '11111111'}, self.existing)
+        self.assertEqual(item, {'ddotLocation': {'agencyCode': 'USGS', 'siteNumber': '11111111'},
+                                'existingLocation': {},
+                                'transactionType': 'add'})
+
+    def test_update(self):
+        item = make_item({'agencyCode': 'USGS', 'siteNumber': '12345678'}, self.existing)
+        self.assertEqual(item['existingLocation']['stationName'], 'Old')
+        self.assertEqual(item['transactionType'], 'update')
+
+    def test_transaction_type(self):
+        self.assertEqual(make_item({'agencyCode': 'USGS', 'siteNumber': '12345678'}, self.existing, 'add')['transactionType'],
+                         'add')
+        item = make_item({'agencyCode': 'USGS', 'siteNumber': '11111111', 'transactionType': 'update'}, {}, 'add')
+        self.assertEqual(item['transactionType'], 'update')
+        self.assertNotIn('transactionType', item['ddotLocation'])
+
+    def test_batch_item(self):
+        record = {'ddotLocation': {'agencyCode': 'USGS', 'siteNumber': '12345678'}, 'existingLocation': {},
+                  'transactionType': 'add'}
+        self.assertEqual(make_item(record, self.existing), record)
+
+
+class ValidationSummaryTestCase(TestCase):
+
+    def test_add(self):
+        summary = ValidationSummary()
+        summary.add({'validation_passed_message': 'Validations Passed'})
+        summary.add({'fatal_error_message': {'A': ['Bad'], 'B': ['Bad']}, 'warning_message': {'A': ['Odd']}})
+        summary.add({'fatal_error_message': {'A': ['Bad']}})
+        summary.add({'error_message': 'Invalid item'})
+
+        self.assertEqual(summary.to_dict(), {
+            'records': 4,
+            'passed': 1,
+            'recordsWithErrors': 2,
+            'recordsWithWarnings': 1,
+            'invalidRecords': 1,
+            'errorsByField': {'A': 2, 'B': 1},
+            'warningsByField': {'A': 1}
+        })
+
+
+class MainTestCase(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_main(self):
+        input_file = os.path.join(self.temp_dir, 'locations.ndjson')
+        with open(input_file, 'w') as fd:
+            fd.write(json.dumps({'agencyCode': 'usgs', 'siteNumber': '1234'}) + '\n')
+            fd.write(json.dumps({'ddotLocation': {}, 'transactionType': 'delete'}) + '\n')
+
+        with redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(main([input_file, '--processes', '1']), 0)
+        self.assertIn('records/sec', stdout.getvalue())
+
+        with open(os.path.join(self.temp_dir, 'locations.results.ndjson')) as fd:
+            results = [json.loads(line) for line in fd]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['record'], 0)
+        self.assertIn('agencyCode', results[0]['fatal_error_message'])
+        self.assertIn('error_message', results[1])
+
+        with open(os.path.join(self.temp_dir, 'locations.results.summary.json')) as fd:
+            summary = json.load(fd)
+        self.assertEqual(summary['records'], 2)
+        self.assertEqual(summary['errorsByField']['agencyCode'], 1)
+
+    def test_does_not_import_web_service(self):
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, mlrvalidator.cli; print(" ".join(sorted(sys.modules)))'
+        ]).decode('utf-8').split()
+
+        for module in ['flask', 'flask_restplus', 'flask_jwt_simple', 'jwt', 'app']:
+            self.assertNotIn(module, modules)
@@ -0,0 +1,387 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase, mock
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+import jwt
+from jwt.algorithms import RSAAlgorithm
+
+import app
+from ..flask_restplus_jwt import JWTKeyProvider, VerifiedTokenCache, parse_token_keys, token_digest
+
+
+def make_key_pair():
+    private_key = rsa.generate_private_key(65537, 2048, default_backend())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_key, public_pem.decode('utf-8')
+
+
+class KeyServer:
+    '''
+    Serves key_response as json from a local port, or responds with status when it is set
+    '''
+
+    def __init__(self, key_response):
+        self.key_response = key_response
+        self.status = 200
+        self.requests = 0
+        key_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                status = key_server.status
+                body = json.dumps(key_server.key_response).encode('utf-8')
+                key_server.requests += 1
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{0}/oauth/token_key'.format(self._server.server_port)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ParseTokenKeysTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key, cls.public_pem = make_key_pair()
+
+    def test_single_key(self):
+        self.assertEqual(parse_token_keys({'alg': 'SHA256withRSA', 'value': self.public_pem}),
+                         {None: self.public_pem})
+        self.assertEqual(parse_token_keys({'kid': 'k1', 'value': self.public_pem}), {'k1': self.public_pem})
+
+    def test_key_set(self):
+        jwk = json.loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        jwk['kid'] = 'k2'
+        keys = parse_token_keys({'keys': [{'kid': 'k1', 'value': self.public_pem}, jwk]})
+
+        self.assertEqual(sorted(keys), ['k1', 'k2'])
+        token = jwt.encode({'sub': 'user'}, self.private_key, algorithm='RS256')
+        self.assertEqual(jwt.decode(token, keys['k2'], algorithms=['RS256']), {'sub': 'user'})
+
+    def test_no_keys(self):
+        with self.assertRaises(ValueError):
+            parse_token_keys({'keys': []})
+        with self.assertRaises(ValueError):
+            parse_token_keys({'error': 'unauthorized'})
+
+
+class JWTKeyProviderTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key, cls.public_pem = make_key_pair()
+
+    def setUp(self):
+        self.key_server = KeyServer({'value': self.public_pem})
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, 'token_keys.json')
+        self.provider = JWTKeyProvider(self.key_server.url, cache_path=self.cache_path, timeout=2,
+                                       refresh_seconds=60, min_backoff_seconds=0.05, max_backoff_seconds=0.2)
+
+    def tearDown(self):
+        self.provider.stop()
+        self.key_server.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_refresh(self):
+        self.assertFalse(self.provider.has_keys)
+        self.assertTrue(self.provider.refresh())
+
+        self.assertEqual(self.provider.get_key(), self.public_pem)
+        # A single key without a key id is used for every token
+        self.assertEqual(self.provider.get_key('any'), self.public_pem)
+        with open(self.cache_path) as fd:
+            self.assertEqual(json.load(fd), {'value': self.public_pem})
+
+    def test_load_cache(self):
+        self.provider.refresh()
+        self.key_server.close()
+
+        provider = JWTKeyProvider(self.key_server.url, cache_path=self.cache_path)
+        self.assertTrue(provider.load_cache())
+        self.assertEqual(provider.get_key(), self.public_pem)
+
+    def test_load_missing_or_invalid_cache(self):
+        self.assertFalse(self.provider.load_cache())
+        with open(self.cache_path, 'w') as fd:
+            fd.write('{"val')
+        self.assertFalse(self.provider.load_cache())
+        self.assertFalse(self.provider.has_keys)
+
+    def test_failed_refresh_keeps_keys(self):
+        self.provider.refresh()
+        self.key_server.status = 500
+
+        self.assertFalse(self.provider.refresh())
+        self.assertFalse(self.provider.refresh())
+        self.assertEqual(self.provider.get_key(), self.public_pem)
+        self.assertEqual(self.provider.failures, 2)
+        self.assertIsNotNone(self.provider.last_error)
+
+        self.key_server.status = 200
+        self.assertTrue(self.provider.refresh())
+        self.assertEqual(self.provider.failures, 0)
+        self.assertIsNone(self.provider.last_error)
+
+    def test_next_delay(self):
+        self.assertEqual(self.provider.next_delay(), 60)
+        self.provider.failures = 1
+        self.assertEqual(self.provider.next_delay(), 0.05)
+        self.provider.failures = 2
+        self.assertEqual(self.provider.next_delay(), 0.1)
+        self.provider.failures = 10
+        self.assertEqual(self.provider.next_delay(), 0.2)
+
+    def test_key_ids(self):
+        _, other_pem = make_key_pair()
+        self.key_server.key_response = {'keys': [{'kid': 'new', 'value': other_pem},
+                                                 {'kid': 'old', 'value': self.public_pem}]}
+        self.provider.refresh()
+
+        self.assertEqual(self.provider.key_ids, ['new', 'old'])
+        self.assertEqual(self.provider.get_key('old'), self.public_pem)
+        self.assertEqual(self.provider.get_key('new'), other_pem)
+        self.assertIsNone(self.provider.get_key('unknown'))
+        self.assertIsNone(self.provider.get_key())
+
+    def test_start_does_not_wait_for_the_server(self):
+        self.key_server.status = 500
+        started = time.monotonic()
+        self.provider.start()
+
+        self.assertLess(time.monotonic() - started, 1)
+        for _ in range(100):
+            if self.key_server.requests:
+                break
+            time.sleep(0.05)
+        # The fetch is retried with backoff until it succeeds
+        self.key_server.status = 200
+        for _ in range(100):
+            if self.provider.has_keys:
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.provider.get_key(), self.public_pem)
+        self.assertGreaterEqual(self.key_server.requests, 2)
+
+    def test_request_refresh(self):
+        self.key_server.key_response = {'kid': 'old', 'value': self.public_pem}
+        self.provider.start()
+        for _ in range(100):
+            if self.provider.has_keys:
+                break
+            time.sleep(0.05)
+        self.assertIsNone(self.provider.get_key('rotated'))
+        _, other_pem = make_key_pair()
+        self.key_server.key_response = {'keys': [{'kid': 'rotated', 'value': other_pem}]}
+        time.sleep(0.1)
+        self.provider.request_refresh()
+
+        for _ in range(100):
+            if self.provider.get_key('rotated') is not None:
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.provider.get_key('rotated'), other_pem)
+
+
+class KeyProviderAuthenticationTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key, cls.public_pem = make_key_pair()
+
+    def setUp(self):
+        self.key_server = KeyServer({'keys': [{'kid': 'k1', 'value': self.public_pem}]})
+        self.provider = JWTKeyProvider(self.key_server.url, min_backoff_seconds=60)
+        app.application.config['JWT_ALGORITHM'] = 'RS256'
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+        self.jwt_manager_patch = mock.patch.object(app.application.extensions['flask-jwt-simple'], 'key_provider',
+                                                   self.provider)
+        self.jwt_manager_patch.start()
+        self.location = json.dumps({'ddotLocation': {'agencyCode': 'USGS '}, 'existingLocation': {}})
+
+    def tearDown(self):
+        self.jwt_manager_patch.stop()
+        self.key_server.close()
+        app.application.config['JWT_ALGORITHM'] = 'HS256'
+
+    def _post(self, token):
+        return self.app_client.post('/validators/add', content_type='application/json', data=self.location,
+                                    headers={'Authorization': 'Bearer {0}'.format(token.decode('utf-8'))})
+
+    def test_keys_not_loaded(self):
+        response = self._post(jwt.encode({}, self.private_key, algorithm='RS256', headers={'kid': 'k1'}))
+        self.assertEqual(response.status_code, 503)
+
+    def test_token_with_known_key(self):
+        self.provider.refresh()
+        response = self._post(jwt.encode({}, self.private_key, algorithm='RS256', headers={'kid': 'k1'}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_with_unknown_key(self):
+        self.provider.refresh()
+        with mock.patch.object(self.provider, 'request_refresh') as mrequest_refresh:
+            response = self._post(jwt.encode({}, self.private_key, algorithm='RS256', headers={'kid': 'k2'}))
+
+        self.assertEqual(response.status_code, 422)
+        mrequest_refresh.assert_called_once_with()
+
+    def test_token_with_wrong_signature(self):
+        self.provider.refresh()
+        other_private_key, _ = make_key_pair()
+        response = self._post(jwt.encode({}, other_private_key, algorithm='RS256', headers={'kid': 'k1'}))
+        self.assertEqual(response.status_code, 422)
+
+
+class VerifiedTokenCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.now = 1000
+        self.cache = VerifiedTokenCache(2, clock=lambda: self.now)
+
+    def test_token_digest(self):
+        self.assertEqual(token_digest('token', 'RS256', None), token_digest('token', 'RS256', None))
+        self.assertNotEqual(token_digest('token', 'RS256', None), token_digest('token', 'RS256', 'mlr'))
+        self.assertNotEqual(token_digest('token', 'RS256', None), token_digest('token', 'HS256', None))
+
+    def test_get(self):
+        self.assertIsNone(self.cache.get('a', 'key'))
+        self.cache.put('a', 'key', {'sub': 'user'})
+
+        self.assertEqual(self.cache.get('a', 'key'), {'sub': 'user'})
+        self.assertEqual(self.cache.stats(), {'entries': 1, 'maxEntries': 2, 'hits': 1, 'misses': 1, 'evictions': 0,
+                                              'hitRate': 0.5})
+
+    def test_key_changed(self):
+        self.cache.put('a', 'key', {'sub': 'user'})
+
+        self.assertIsNone(self.cache.get('a', 'rotated key'))
+        # The token is dropped, so it is verified again even with the original key
+        self.assertIsNone(self.cache.get('a', 'key'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_expired(self):
+        self.cache.put('a', 'key', {'exp': 1010})
+        self.now = 1010
+        self.assertIsNotNone(self.cache.get('a', 'key'))
+        self.now = 1011
+        self.assertIsNone(self.cache.get('a', 'key'))
+
+    def test_not_yet_valid(self):
+        self.cache.put('a', 'key', {'nbf': 1000})
+        self.assertIsNotNone(self.cache.get('a', 'key'))
+        self.now = 999
+        self.assertIsNone(self.cache.get('a', 'key'))
+
+    def test_evict_least_recently_used(self):
+        self.cache.put('a', 'key', {})
+        self.cache.put('b', 'key', {})
+        self.cache.get('a', 'key')
+        self.cache.put('c', 'key', {})
+
+        self.assertIsNone(self.cache.get('b', 'key'))
+        self.assertIsNotNone(self.cache.get('a', 'key'))
+        self.assertIsNotNone(self.cache.get('c', 'key'))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+
+class TokenCacheAuthenticationTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key, cls.public_pem = make_key_pair()
+
+    def setUp(self):
+        self.key_server = KeyServer({'keys': [{'kid': 'k1', 'value': self.public_pem}]})
+        self.provider = JWTKeyProvider(self.key_server.url, min_backoff_seconds=60)
+        self.provider.refresh()
+        self.clock_offset = 0
+        self.token_cache = VerifiedTokenCache(10, clock=lambda: time.time() + self.clock_offset)
+        app.application.config['JWT_ALGORITHM'] = 'RS256'
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+        jwt_manager = app.application.extensions['flask-jwt-simple']
+        self.patches = [mock.patch.object(jwt_manager, 'key_provider', self.provider),
+                        mock.patch.object(jwt_manager, 'token_cache', self.token_cache)]
+        for patch in self.patches:
+            patch.start()
+        self.location = json.dumps({'ddotLocation': {'agencyCode': 'USGS '}, 'existingLocation': {}})
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.key_server.close()
+        app.application.config['JWT_ALGORITHM'] = 'HS256'
+
+    def _post(self, token):
+        return self.app_client.post('/validators/add', content_type='application/json', data=self.location,
+                                    headers={'Authorization': 'Bearer {0}'.format(token.decode('utf-8'))})
+
+    def test_repeated_token(self):
+        token = jwt.encode({'sub': 'user'}, self.private_key, algorithm='RS256', headers={'kid': 'k1'})
+        with mock.patch('mlrvalidator.flask_restplus_jwt.jwt.decode', wraps=jwt.decode) as mdecode:
+            for _ in range(3):
+                self.assertEqual(self._post(token).status_code, 200)
+
+        self.assertEqual(mdecode.call_count, 1)
+        stats = self.token_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_expired_token(self):
+        token = jwt.encode({'exp': int(time.time()) + 60}, self.private_key, algorithm='RS256', headers={'kid': 'k1'})
+        self.assertEqual(self._post(token).status_code, 200)
+
+        # Once the cache's clock is past the expiry the token is verified again
+        self.clock_offset = 120
+        with mock.patch('mlrvalidator.flask_restplus_jwt.jwt.decode', wraps=jwt.decode) as mdecode:
+            self.assertEqual(self._post(token).status_code, 200)
+        self.assertEqual(mdecode.call_count, 1)
+
+        expired_token = jwt.encode({'exp': int(time.time()) - 60}, self.private_key, algorithm='RS256',
+                                   headers={'kid': 'k1'})
+        self.assertEqual(self._post(expired_token).status_code, 401)
+
+    def test_rotated_key(self):
+        token = jwt.encode({'sub': 'user'}, self.private_key, algorithm='RS256', headers={'kid': 'k1'})
+        self.assertEqual(self._post(token).status_code, 200)
+
+        # The key id is reused for a different key, so the cached token must not be accepted
+        _, other_pem = make_key_pair()
+        self.key_server.key_response = {'keys': [{'kid': 'k1', 'value': other_pem}]}
+        self.provider.refresh()
+
+        self.assertEqual(self._post(token).status_code, 422)
+        self.assertEqual(self.token_cache.stats()['hits'], 0)
+
+    def test_audience(self):
+        token = jwt.encode({'aud': 'mlr'}, self.private_key, algorithm='RS256', headers={'kid': 'k1'})
+        app.application.config['JWT_DECODE_AUDIENCE'] = 'mlr'
+        self.assertEqual(self._post(token).status_code, 200)
+
+        app.application.config['JWT_DECODE_AUDIENCE'] = 'other'
+        self.assertEqual(self._post(token).status_code, 422)
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from app import application
+from ..metrics import RULE_METRIC, STAGE_METRIC, ValidationMetrics
+from ..validators.error_validator import ErrorValidator
+from ..validators.warning_validator import WarningValidator
+
+
+class ValidationMetricsRenderTestCase(TestCase):
+
+    def test_render(self):
+        metrics = ValidationMetrics(buckets=(0.01, 0.001))
+        metrics.observe(RULE_METRIC, ('Validator', 'rule'), 0.0005, False)
+        metrics.observe(RULE_METRIC, ('Validator', 'rule'), 0.005, True)
+        metrics.observe(RULE_METRIC, ('Validator', 'rule'), 0.5, False)
+        metrics.observe(STAGE_METRIC, ('Validator', 'stage'), 0.005, False)
+
+        lines = metrics.render().splitlines()
+
+        self.assertIn('# TYPE mlr_validator_rule_calls_total counter', lines)
+        self.assertIn('mlr_validator_rule_calls_total{validator="Validator",rule="rule"} 3', lines)
+        self.assertIn('mlr_validator_rule_failures_total{validator="Validator",rule="rule"} 1', lines)
+        self.assertIn('# TYPE mlr_validator_rule_duration_seconds histogram', lines)
+        self.assertIn('mlr_validator_rule_duration_seconds_bucket{validator="Validator",rule="rule",le="0.001"} 1', lines)
+        self.assertIn('mlr_validator_rule_duration_seconds_bucket{validator="Validator",rule="rule",le="0.01"} 2', lines)
+        self.assertIn('mlr_validator_rule_duration_seconds_bucket{validator="Validator",rule="rule",le="+Inf"} 3', lines)
+        self.assertIn('mlr_validator_rule_duration_seconds_count{validator="Validator",rule="rule"} 3', lines)
+        self.assertIn('mlr_validator_stage_calls_total{validator="Validator",stage="stage"} 1', lines)
+        self.assertIn('mlr_validator_stage_failures_total{validator="Validator",stage="stage"} 0', lines)
+
+
+class InstrumentedValidatorTestCase(TestCase):
+
+    def setUp(self):
+        self.metrics = ValidationMetrics()
+
+    def test_error_validator(self):
+        validator = ErrorValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'],
+                                   metrics=self.metrics)
+        result = validator.validate({'agencyCode': 'XYZ', 'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '999'},
+                                    {}, update=True)
+        self.assertFalse(result)
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn('mlr_validator_stage_calls_total{validator="ErrorValidator",stage="single_field_validator"} 1', lines)
+        self.assertIn('mlr_validator_stage_failures_total{validator="ErrorValidator",stage="single_field_validator"} 1', lines)
+        self.assertIn('mlr_validator_stage_calls_total{validator="ErrorValidator",stage="transition_validator"} 1', lines)
+        self.assertIn('mlr_validator_rule_failures_total{validator="CrossFieldRefErrorValidator",rule="counties"} 1', lines)
+        self.assertIn('mlr_validator_rule_failures_total{validator="CrossFieldRefErrorValidator",rule="states"} 0', lines)
+        self.assertIn('mlr_validator_rule_calls_total{validator="CrossFieldRefErrorValidator",rule="huc_ref_validator"} 1', lines)
+        # The update does not contain any use codes so the use code rules are not run
+        self.assertFalse([line for line in lines if 'rule="use_code"' in line])
+        self.assertIn('mlr_validator_rule_failures_total{validator="SingleFieldValidator",rule="valid_reference"} 1', lines)
+
+    def test_warning_validator(self):
+        validator = WarningValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'],
+                                     metrics=self.metrics)
+        validator.validate({'stationName': "'Station"}, {})
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn('mlr_validator_stage_calls_total{validator="WarningValidator",stage="cross_field_ref_validator"} 1', lines)
+        self.assertIn('mlr_validator_rule_failures_total{validator="SingleFieldValidator",rule="valid_single_quotes"} 1', lines)
+
+    def test_not_instrumented(self):
+        validator = ErrorValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'])
+
+        self.assertNotIn('_validate_counties', vars(validator.cross_field_ref_validator))
+        self.assertNotIn('validate_context', vars(validator.cross_field_validator))
+        self.assertNotIn('_validate_valid_reference', vars(validator.single_field_validator))
@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from app import application
+from ..reference_lookup import ReferenceLookup, reference_etag
+from ..validators.error_validator import ErrorValidator
+from ..validators.reference import ReferenceRegistry
+
+
+class ReferenceEtagTestCase(TestCase):
+
+    def test_etag_depends_on_version_and_request(self):
+        etag = reference_etag('v1', '/references/counties?country=US&state=55')
+
+        self.assertEqual(etag, reference_etag('v1', '/references/counties?country=US&state=55'))
+        self.assertNotEqual(etag, reference_etag('v2', '/references/counties?country=US&state=55'))
+        self.assertNotEqual(etag, reference_etag('v1', '/references/counties?country=US&state=01'))
+
+
+class ReferenceLookupTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.references = ReferenceLookup(ErrorValidator(application.config['SCHEMA_DIR'],
+                                                        application.config['REFERENCE_FILE_DIR'],
+                                                        reference_registry=ReferenceRegistry()))
+
+    def test_lists(self):
+        self.assertIn('siteTypeCode', self.references.get_list_names())
+        self.assertIn('GW', self.references.get_list('siteTypeCode'))
+        self.assertEqual(self.references.get_list('siteTypeCode'), sorted(self.references.get_list('siteTypeCode')))
+        self.assertIsNone(self.references.get_list('siteNumber'))
+
+    def test_state_codes(self):
+        self.assertIn('55', self.references.get_state_codes('US'))
+        self.assertEqual(self.references.get_state_codes('XY'), [])
+
+    def test_counties(self):
+        counties = self.references.get_country_state_list('counties', 'US', '55')
+
+        self.assertIn('025', [county['countyCode'] for county in counties])
+        self.assertEqual(self.references.get_country_state_list('counties', 'US', 'XY'), [])
+
+    def test_mcds(self):
+        mcds = self.references.get_country_state_list('mcds', 'US', '55')
+
+        self.assertIn('minorCivilDivisionCodes', mcds[0])
+
+    def test_huc_prefix(self):
+        codes = self.references.get_country_state_list('huc', 'US', '55', prefix='070900')
+
+        self.assertIn('070900020604', codes)
+        self.assertEqual(codes, sorted(codes))
+        self.assertTrue(all(code.startswith('070900') for code in codes))
+        self.assertGreater(len(self.references.get_country_state_list('huc', 'US', '55')), len(codes))
+
+    def test_site_type_transitions(self):
+        self.assertIn('GW', self.references.get_site_type_transitions('AG')['AG'])
+        self.assertEqual(self.references.get_site_type_transitions('XY'), {'XY': []})
+        self.assertIn('AG', self.references.get_site_type_transitions())
+
+    def test_national_water_use_codes(self):
+        self.assertIn('DO', self.references.get_national_water_use_codes('AG'))
+        self.assertEqual(self.references.get_national_water_use_codes('XY'), [])
@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from app import application
+from ..reference_reload import ValidatorReloader, ValidatorSet, check_validator_set, load_validator_set
+
+
+def _validator_set(version):
+    return ValidatorSet(mock.Mock(), mock.Mock(), version)
+
+
+class ValidatorReloaderTestCase(TestCase):
+
+    def test_reload_replaces_current_set(self):
+        on_swap = mock.Mock()
+        validator_sets = [_validator_set('v1'), _validator_set('v2')]
+        reloader = ValidatorReloader(mock.Mock(side_effect=validator_sets), on_swap=on_swap)
+        in_flight = reloader.current
+
+        self.assertTrue(reloader.reload(wait=True))
+
+        self.assertIs(reloader.current, validator_sets[1])
+        self.assertIs(in_flight, validator_sets[0])
+        on_swap.assert_called_once_with(validator_sets[1])
+        status = reloader.status()
+        self.assertEqual(status['referenceVersion'], 'v2')
+        self.assertEqual(status['reloadCount'], 1)
+        self.assertIsNone(status['lastError'])
+
+    def test_failed_load_keeps_current_set(self):
+        on_swap = mock.Mock()
+        load = mock.Mock(side_effect=[_validator_set('v1'), ValueError('bad reference file')])
+        reloader = ValidatorReloader(load, on_swap=on_swap)
+
+        reloader.reload(wait=True)
+
+        self.assertEqual(reloader.current.version, 'v1')
+        self.assertEqual(reloader.status()['lastError'], 'ValueError: bad reference file')
+        on_swap.assert_not_called()
+
+    def test_failed_check_keeps_current_set(self):
+        broken_set = _validator_set('v2')
+        broken_set.error_validator.validate.side_effect = KeyError('countryCode')
+        reloader = ValidatorReloader(mock.Mock(return_value=broken_set), validator_set=_validator_set('v1'))
+
+        reloader.reload(wait=True)
+
+        self.assertEqual(reloader.current.version, 'v1')
+        self.assertIn('KeyError', reloader.status()['lastError'])
+
+    def test_only_one_reload_at_a_time(self):
+        loading = threading.Event()
+        finish = threading.Event()
+
+        def load():
+            loading.set()
+            finish.wait(5)
+            return _validator_set('v2')
+
+        reloader = ValidatorReloader(load, validator_set=_validator_set('v1'))
+        self.assertTrue(reloader.reload())
+        loading.wait(5)
+        self.assertTrue(reloader.status()['reloading'])
+        self.assertFalse(reloader.reload())
+
+        finish.set()
+        reloader._thread.join(5)
+        self.assertEqual(reloader.current.version, 'v2')
+
+    def test_old_validation_pool_is_closed(self):
+        old_set = _validator_set('v1')
+        old_set.validation_pool = mock.Mock()
+        reloader = ValidatorReloader(mock.Mock(return_value=_validator_set('v2')), validator_set=old_set)
+
+        reloader.reload(wait=True)
+
+        old_set.validation_pool.close.assert_called_once_with()
+
+    def test_batch_after_swap_does_not_start_a_pool(self):
+        old_set = load_validator_set(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'],
+                                     processes=2)
+        reloader = ValidatorReloader(mock.Mock(return_value=_validator_set('v2')), validator_set=old_set)
+        in_flight = reloader.current
+        location = {'stationName': 'A station', 'agencyCode': 'USGS ', 'siteNumber': '12345678'}
+        items = [{'transactionType': 'add', 'ddotLocation': location, 'existingLocation': {}}] * 3
+
+        reloader.reload(wait=True)
+        results = in_flight.validation_pool.validate_batch(items)
+
+        self.assertEqual(len(results), 3)
+        self.assertIsNone(in_flight.validation_pool._pool)
+
+
+class LoadValidatorSetTestCase(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.reference_dir = os.path.join(self.temp_dir, 'references')
+        shutil.copytree(application.config['REFERENCE_FILE_DIR'], self.reference_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_version_changes_with_reference_files(self):
+        validator_set = load_validator_set(application.config['SCHEMA_DIR'], self.reference_dir)
+        self.assertFalse(validator_set.checked)
+        check_validator_set(validator_set)
+        self.assertTrue(validator_set.checked)
+        self.assertIsNone(validator_set.validation_pool)
+
+        with open(os.path.join(self.reference_dir, 'state.json'), 'a') as fd:
+            fd.write('\n')
+        new_validator_set = load_validator_set(application.config['SCHEMA_DIR'], self.reference_dir)
+
+        self.assertNotEqual(new_validator_set.version, validator_set.version)
+
+    def test_empty_reference_file_is_rejected(self):
+        with open(os.path.join(self.reference_dir, 'county.json'), 'w') as fd:
+            fd.write('{}')
+
+        with self.assertRaisesRegex(ValueError, 'county.json'):
+            load_validator_set(application.config['SCHEMA_DIR'], self.reference_dir)
@@ -0,0 +1,100 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from ..result_cache import ResultCache, file_fingerprint, payload_hash
+
+
+class PayloadHashTestCase(TestCase):
+
+    def test_key_order_does_not_change_hash(self):
+        self.assertEqual(payload_hash({'a': 1, 'b': {'c': '2', 'd': '3'}}),
+                         payload_hash({'b': {'d': '3', 'c': '2'}, 'a': 1}))
+
+    def test_different_payloads_have_different_hashes(self):
+        self.assertNotEqual(payload_hash({'ddotLocation': {'a': '1'}, 'update': False}),
+                            payload_hash({'ddotLocation': {'a': '1'}, 'update': True}))
+
+
+class FileFingerprintTestCase(TestCase):
+
+    def test_fingerprint_changes_with_contents(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'state.json')
+            with open(path, 'w') as fd:
+                fd.write('{"countries": []}')
+            fingerprint = file_fingerprint([path])
+            self.assertEqual(file_fingerprint([path]), fingerprint)
+
+            with open(path, 'w') as fd:
+                fd.write('{"countries": [{}]}')
+            self.assertNotEqual(file_fingerprint([path]), fingerprint)
+
+
+class ResultCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.validate = mock.Mock(side_effect=lambda: {'validation_passed_message': 'Validations Passed'})
+
+    def test_hit_and_miss(self):
+        cache = ResultCache('v1', 10)
+
+        first = cache.get_or_validate({'a': '1'}, self.validate)
+        second = cache.get_or_validate({'a': '1'}, self.validate)
+
+        self.assertEqual(first, {'validation_passed_message': 'Validations Passed'})
+        self.assertIs(second, first)
+        self.assertEqual(self.validate.call_count, 1)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(stats['hitRate'], 0.5)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResultCache('v1', 2)
+        cache.get_or_validate({'a': '1'}, self.validate)
+        cache.get_or_validate({'a': '2'}, self.validate)
+        cache.get_or_validate({'a': '1'}, self.validate)
+        cache.get_or_validate({'a': '3'}, self.validate)
+        self.assertEqual(self.validate.call_count, 3)
+
+        cache.get_or_validate({'a': '1'}, self.validate)
+        self.assertEqual(self.validate.call_count, 3)
+        cache.get_or_validate({'a': '2'}, self.validate)
+        self.assertEqual(self.validate.call_count, 4)
+        self.assertEqual(cache.stats()['evictions'], 2)
+
+    def test_expired_responses_are_not_used(self):
+        now = [100.0]
+        cache = ResultCache('v1', 10, ttl_seconds=60, clock=lambda: now[0])
+        cache.get_or_validate({'a': '1'}, self.validate)
+
+        now[0] = 159.0
+        cache.get_or_validate({'a': '1'}, self.validate)
+        self.assertEqual(self.validate.call_count, 1)
+
+        now[0] = 161.0
+        cache.get_or_validate({'a': '1'}, self.validate)
+        self.assertEqual(self.validate.call_count, 2)
+
+    def test_changing_fingerprint_invalidates_all_entries(self):
+        cache = ResultCache('v1', 10)
+        cache.get_or_validate({'a': '1'}, self.validate)
+
+        cache.set_fingerprint('v1')
+        cache.get_or_validate({'a': '1'}, self.validate)
+        self.assertEqual(self.validate.call_count, 1)
+
+        cache.set_fingerprint('v2')
+        self.assertEqual(cache.stats()['entries'], 0)
+        cache.get_or_validate({'a': '1'}, self.validate)
+        self.assertEqual(self.validate.call_count, 2)
+
+    def test_response_is_not_cached_if_fingerprint_changes_while_validating(self):
+        cache = ResultCache('v1', 10)
+
+        def validate():
+            cache.set_fingerprint('v2')
+            return {}
+
+        cache.get_or_validate({'a': '1'}, validate)
+        self.assertEqual(cache.stats()['entries'], 0)
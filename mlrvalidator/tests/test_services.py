@@ -4,9 +4,13 @@ from unittest import TestCase, mock
 import jwt
 
 import app
+from mlrvalidator.metrics import STAGE_METRIC, ValidationMetrics
+from mlrvalidator.flask_restplus_jwt import VerifiedTokenCache
+from mlrvalidator.result_cache import ResultCache
+from mlrvalidator.validators.validation_result import ValidationResult
 
-@mock.patch('mlrvalidator.services.warning_validator')
-@mock.patch('mlrvalidator.services.error_validator')
+@mock.patch.object(app.validator_reloader.current, 'warning_validator')
+@mock.patch.object(app.validator_reloader.current, 'error_validator')
 class AddValidateTransactionTestCase(TestCase):
 
     def setUp(self):
@@ -29,28 +33,27 @@ class AddValidateTransactionTestCase(TestCase):
 
     def test_valid_transaction(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = True
-        merror_validator.errors = {}
-        mwarning_validator.validate.return_value = True
-        mwarning_validator.warnings = {}
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
 
         response = self.app_client.post('/validators/add',
                                         content_type='application/json',
                                         headers={'Authorization': 'Bearer {0}'.format(good_token.decode('utf-8'))},
                                         data=json.dumps(self.location))
         self.assertEqual(response.status_code, 200)
-        merror_validator.validate.assert_called_with(self.location.get('ddotLocation'), {}, update=False)
-        mwarning_validator.validate.assert_called_with(self.location.get('ddotLocation'), {})
+        context = merror_validator.validate_context.call_args[0][0]
+        self.assertEqual(context.document, self.location.get('ddotLocation'))
+        self.assertEqual(context.existing_document, {})
+        self.assertFalse(context.update)
+        mwarning_validator.validate_context.assert_called_with(context)
         resp_data = json.loads(response.data)
         self.assertEqual(len(resp_data), 1)
         self.assertEqual({'validation_passed_message': 'Validations Passed'}, resp_data)
 
     def test_transaction_with_error(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = False
-        merror_validator.errors = {'stationName': ['Invalid value']}
-        mwarning_validator.validate.return_value = True
-        mwarning_validator.warnings = {}
+        merror_validator.validate_context.return_value = ValidationResult(errors={'stationName': ['Invalid value']})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
 
         response = self.app_client.post('/validators/add',
                                         content_type='application/json',
@@ -64,10 +67,8 @@ class AddValidateTransactionTestCase(TestCase):
 
     def test_transaction_with_warning(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = True
-        merror_validator.errors = {}
-        mwarning_validator.validate.return_value = False
-        mwarning_validator.warnings = {'stationName': ['Contains quotes']}
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={'stationName': ['Contains quotes']})
 
         response = self.app_client.post('/validators/add',
                                         content_type='application/json',
@@ -80,10 +81,8 @@ class AddValidateTransactionTestCase(TestCase):
 
     def test_transaction_with_error_and_warning(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = False
-        merror_validator.errors = {'agencyCode': ['Bad value']}
-        mwarning_validator.validate.return_value = False
-        mwarning_validator.warnings = {'stationName': ['Contains quotes']}
+        merror_validator.validate_context.return_value = ValidationResult(errors={'agencyCode': ['Bad value']})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={'stationName': ['Contains quotes']})
 
         response = self.app_client.post('/validators/add',
                                         content_type='application/json',
@@ -128,8 +127,8 @@ class AddValidateTransactionTestCase(TestCase):
         self.assertEqual(response.status_code, 422)
 
 
-@mock.patch('mlrvalidator.services.warning_validator')
-@mock.patch('mlrvalidator.services.error_validator')
+@mock.patch.object(app.validator_reloader.current, 'warning_validator')
+@mock.patch.object(app.validator_reloader.current, 'error_validator')
 class UpdateValidateTransactionTestCase(TestCase):
 
     def setUp(self):
@@ -156,28 +155,27 @@ class UpdateValidateTransactionTestCase(TestCase):
 
     def test_valid_transaction(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = True
-        merror_validator.errors = {}
-        mwarning_validator.validate.return_value = True
-        mwarning_validator.warnings = {}
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
 
         response = self.app_client.post('/validators/update',
                                         content_type='application/json',
                                         headers={'Authorization': 'Bearer {0}'.format(good_token.decode('utf-8'))},
                                         data=json.dumps(self.location))
         self.assertEqual(response.status_code, 200)
-        merror_validator.validate.assert_called_with(self.location.get('ddotLocation'), self.location.get('existingLocation'), update=True)
-        mwarning_validator.validate.assert_called_with(self.location.get('ddotLocation'), self.location.get('existingLocation'))
+        context = merror_validator.validate_context.call_args[0][0]
+        self.assertEqual(context.document, self.location.get('ddotLocation'))
+        self.assertEqual(context.existing_document, self.location.get('existingLocation'))
+        self.assertTrue(context.update)
+        mwarning_validator.validate_context.assert_called_with(context)
         resp_data = json.loads(response.data)
         self.assertEqual(len(resp_data), 1)
         self.assertEqual({'validation_passed_message': 'Validations Passed'}, resp_data)
 
     def test_transaction_with_error(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = False
-        merror_validator.errors = {'stationName': ['Invalid value']}
-        mwarning_validator.validate.return_value = True
-        mwarning_validator.warnings = {}
+        merror_validator.validate_context.return_value = ValidationResult(errors={'stationName': ['Invalid value']})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
 
         response = self.app_client.post('/validators/update',
                                         content_type='application/json',
@@ -191,10 +189,8 @@ class UpdateValidateTransactionTestCase(TestCase):
 
     def test_transaction_with_warning(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = True
-        merror_validator.errors = {}
-        mwarning_validator.validate.return_value = False
-        mwarning_validator.warnings = {'stationName': ['Contains quotes']}
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={'stationName': ['Contains quotes']})
 
         response = self.app_client.post('/validators/update',
                                         content_type='application/json',
@@ -207,10 +203,8 @@ class UpdateValidateTransactionTestCase(TestCase):
 
     def test_transaction_with_error_and_warning(self, merror_validator, mwarning_validator):
         good_token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret')
-        merror_validator.validate.return_value = False
-        merror_validator.errors = {'agencyCode': ['Bad value']}
-        mwarning_validator.validate.return_value = False
-        mwarning_validator.warnings = {'stationName': ['Contains quotes']}
+        merror_validator.validate_context.return_value = ValidationResult(errors={'agencyCode': ['Bad value']})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={'stationName': ['Contains quotes']})
 
         response = self.app_client.post('/validators/update',
                                         content_type='application/json',
@@ -252,4 +246,473 @@ class UpdateValidateTransactionTestCase(TestCase):
                                         headers={'Authorization': 'Bearer {0}'.format(bad_token.decode('utf-8'))},
                                         data=json.dumps({'ddotLocation': {}})
                                         )
-        self.assertEqual(response.status_code, 422)
\ No newline at end of file
+        self.assertEqual(response.status_code, 422)
+
+
+@mock.patch.object(app.validator_reloader.current, 'warning_validator')
+@mock.patch.object(app.validator_reloader.current, 'error_validator')
+class BatchValidateTransactionTestCase(TestCase):
+
+    def setUp(self):
+        app.application.config['JWT_SECRET_KEY'] = 'secret'
+        app.application.config['JWT_PUBLIC_KEY'] = None
+        app.application.config['JWT_ALGORITHM'] = 'HS256'
+        app.application.config['AUTH_TOKEN_KEY_URL'] = ''
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
+        app.application.config['BATCH_MAX_ITEMS'] = 3
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+        self.token = jwt.encode({'authorities': ['one_role', 'two_role']}, 'secret').decode('utf-8')
+        self.items = [
+            {'ddotLocation': {'stationName': 'Add'}, 'existingLocation': {}, 'transactionType': 'add'},
+            {'ddotLocation': {'stationName': 'Update'}, 'existingLocation': {'stationName': 'Old'}, 'transactionType': 'update'}
+        ]
+
+    def test_get_max_items(self, merror_validator, mwarning_validator):
+        response = self.app_client.get('/validators/batch')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), {'maxItems': 3})
+
+    def test_json_array(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.side_effect = [ValidationResult(errors={}),
+                                                         ValidationResult(errors={'stationName': ['Invalid value']})]
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
+
+        response = self.app_client.post('/validators/batch',
+                                        content_type='application/json',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data=json.dumps(self.items))
+        self.assertEqual(response.status_code, 200)
+        contexts = [call[0][0] for call in merror_validator.validate_context.call_args_list]
+        self.assertEqual([(context.document, context.existing_document, context.update) for context in contexts], [
+            ({'stationName': 'Add'}, {}, False),
+            ({'stationName': 'Update'}, {'stationName': 'Old'}, True)
+        ])
+        self.assertEqual(json.loads(response.data), {'results': [
+            {'validation_passed_message': 'Validations Passed'},
+            {'fatal_error_message': {'stationName': ['Invalid value']}}
+        ]})
+
+    def test_item_with_location_not_an_object(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
+        items = [self.items[0], {'ddotLocation': 'x', 'existingLocation': {}, 'transactionType': 'add'},
+                 self.items[1]]
+
+        response = self.app_client.post('/validators/batch',
+                                        content_type='application/json',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data=json.dumps(items))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), {'results': [
+            {'validation_passed_message': 'Validations Passed'},
+            {'error_message': 'Item ddotLocation and existingLocation must be json objects.'},
+            {'validation_passed_message': 'Validations Passed'}
+        ]})
+
+    def test_validation_pool(self, merror_validator, mwarning_validator):
+        results = [{'validation_passed_message': 'Validations Passed'},
+                   {'fatal_error_message': {'stationName': ['Invalid value']}}]
+        with mock.patch.object(app.validator_reloader.current, 'validation_pool') as mvalidation_pool:
+            mvalidation_pool.validate_batch.return_value = results
+            response = self.app_client.post('/validators/batch',
+                                            content_type='application/json',
+                                            headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                            data=json.dumps(self.items))
+
+        self.assertEqual(response.status_code, 200)
+        mvalidation_pool.validate_batch.assert_called_with(self.items)
+        merror_validator.validate_context.assert_not_called()
+        self.assertEqual(json.loads(response.data), {'results': results})
+
+    def test_ndjson(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.side_effect = [ValidationResult(warnings={'stationName': ['Contains quotes']}),
+                                                           ValidationResult(warnings={})]
+
+        response = self.app_client.post('/validators/batch',
+                                        content_type='application/x-ndjson',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data='\n'.join(json.dumps(item) for item in self.items) + '\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), {'results': [
+            {'warning_message': {'stationName': ['Contains quotes']}},
+            {'validation_passed_message': 'Validations Passed'}
+        ]})
+
+    def test_invalid_item(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
+
+        response = self.app_client.post('/validators/batch',
+                                        content_type='application/json',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data=json.dumps([{'ddotLocation': {}}, self.items[0]]))
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)['results']
+        self.assertEqual(len(results), 2)
+        self.assertIn('error_message', results[0])
+        self.assertEqual(results[1], {'validation_passed_message': 'Validations Passed'})
+
+    def test_stream(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.side_effect = [ValidationResult(errors={}),
+                                                         ValidationResult(errors={'stationName': ['Invalid value']})]
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
+
+        response = self.app_client.post('/validators/stream',
+                                        content_type='application/x-ndjson',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data='\n'.join(json.dumps(item) for item in self.items) + '\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in response.data.decode('utf-8').splitlines()], [
+            {'validation_passed_message': 'Validations Passed'},
+            {'fatal_error_message': {'stationName': ['Invalid value']}}
+        ])
+
+    def test_stream_bad_lines(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.return_value = ValidationResult(errors={})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
+        data = b'\n'.join([b'\xff\xfe', b'{"ddotLocation": "x", "existingLocation": {}, "transactionType": "add"}',
+                           json.dumps(self.items[0]).encode('utf-8')]) + b'\n'
+
+        response = self.app_client.post('/validators/stream',
+                                        content_type='application/x-ndjson',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data=data)
+        self.assertEqual(response.status_code, 200)
+        results = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual(len(results), 3)
+        self.assertIn('error_message', results[0])
+        self.assertIn('error_message', results[1])
+        self.assertEqual(results[2], {'validation_passed_message': 'Validations Passed'})
+
+    def test_stream_no_auth_header(self, merror_validator, mwarning_validator):
+        response = self.app_client.post('/validators/stream',
+                                        content_type='application/x-ndjson',
+                                        data=json.dumps(self.items[0]))
+        self.assertEqual(response.status_code, 401)
+
+    def test_too_many_items(self, merror_validator, mwarning_validator):
+        response = self.app_client.post('/validators/batch',
+                                        content_type='application/json',
+                                        headers={'Authorization': 'Bearer {0}'.format(self.token)},
+                                        data=json.dumps(self.items * 2))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error_message', json.loads(response.data))
+        merror_validator.validate_context.assert_not_called()
+
+    def test_no_auth_header(self, merror_validator, mwarning_validator):
+        response = self.app_client.post('/validators/batch',
+                                        content_type='application/json',
+                                        data=json.dumps(self.items))
+        self.assertEqual(response.status_code, 401)
+
+
+class MetricsTestCase(TestCase):
+
+    def setUp(self):
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+
+    def test_metrics_disabled(self):
+        with mock.patch('mlrvalidator.services.validation_metrics', None):
+            response = self.app_client.get('/metrics')
+        self.assertEqual(response.status_code, 404)
+
+    def test_metrics(self):
+        metrics = ValidationMetrics()
+        metrics.observe(STAGE_METRIC, ('ErrorValidator', 'single_field_validator'), 0.001, True)
+        with mock.patch('mlrvalidator.services.validation_metrics', metrics):
+            response = self.app_client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('mlr_validator_stage_failures_total{validator="ErrorValidator",stage="single_field_validator"} 1',
+                      response.data.decode('utf-8').splitlines())
+
+
+
+@mock.patch.object(app.validator_reloader.current, 'warning_validator')
+@mock.patch.object(app.validator_reloader.current, 'error_validator')
+class ResultCacheTestCase(TestCase):
+
+    def setUp(self):
+        app.application.config['JWT_SECRET_KEY'] = 'secret'
+        app.application.config['JWT_PUBLIC_KEY'] = None
+        app.application.config['JWT_ALGORITHM'] = 'HS256'
+        app.application.config['AUTH_TOKEN_KEY_URL'] = ''
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+        self.headers = {'Authorization': 'Bearer {0}'.format(jwt.encode({}, 'secret').decode('utf-8'))}
+        self.location = {
+            "ddotLocation": {"agencyCode": "USGS ", "siteNumber": "123456789012345"},
+            "existingLocation": {}
+        }
+
+    def test_repeated_request_is_served_from_cache(self, merror_validator, mwarning_validator):
+        merror_validator.validate_context.return_value = ValidationResult(errors={'siteNumber': ['Invalid']})
+        mwarning_validator.validate_context.return_value = ValidationResult(warnings={})
+
+        with mock.patch('mlrvalidator.services.result_cache',
+                        ResultCache(app.validator_reloader.current.version, 10)) as result_cache:
+            responses = [self.app_client.post('/validators/add', content_type='application/json',
+                                              headers=self.headers, data=json.dumps(self.location))
+                         for _ in range(2)]
+            self.app_client.post('/validators/update', content_type='application/json',
+                                 headers=self.headers, data=json.dumps(self.location))
+            stats_response = self.app_client.get('/validators/cache')
+
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(json.loads(responses[0].data), json.loads(responses[1].data))
+        self.assertEqual(json.loads(responses[1].data), {'fatal_error_message': {'siteNumber': ['Invalid']}})
+        self.assertEqual(merror_validator.validate_context.call_count, 2)
+        stats = json.loads(stats_response.data)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(result_cache.stats()['entries'], 2)
+
+    def test_cache_disabled(self, merror_validator, mwarning_validator):
+        with mock.patch('mlrvalidator.services.result_cache', None):
+            response = self.app_client.get('/validators/cache')
+        self.assertEqual(response.status_code, 404)
+
+
+class ReloadTestCase(TestCase):
+
+    def setUp(self):
+        app.application.config['JWT_SECRET_KEY'] = 'secret'
+        app.application.config['JWT_PUBLIC_KEY'] = None
+        app.application.config['JWT_ALGORITHM'] = 'HS256'
+        app.application.config['AUTH_TOKEN_KEY_URL'] = ''
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+        self.headers = {'Authorization': 'Bearer {0}'.format(jwt.encode({}, 'secret').decode('utf-8'))}
+
+    def test_reload(self):
+        with mock.patch('mlrvalidator.services.validator_reloader') as mvalidator_reloader:
+            mvalidator_reloader.reload.return_value = True
+            mvalidator_reloader.status.return_value = {'referenceVersion': 'v1', 'reloading': True}
+            response = self.app_client.post('/admin/reload', headers=self.headers)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(json.loads(response.data), {'referenceVersion': 'v1', 'reloading': True})
+        mvalidator_reloader.reload.assert_called_once_with()
+
+    def test_reload_in_progress(self):
+        with mock.patch('mlrvalidator.services.validator_reloader') as mvalidator_reloader:
+            mvalidator_reloader.reload.return_value = False
+            mvalidator_reloader.status.return_value = {'referenceVersion': 'v1', 'reloading': True}
+            response = self.app_client.post('/admin/reload', headers=self.headers)
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_reload_no_auth_header(self):
+        with mock.patch('mlrvalidator.services.validator_reloader') as mvalidator_reloader:
+            response = self.app_client.post('/admin/reload')
+
+        self.assertEqual(response.status_code, 401)
+        mvalidator_reloader.reload.assert_not_called()
+
+    def test_reload_status(self):
+        response = self.app_client.get('/admin/reload')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['referenceVersion'], app.validator_reloader.current.version)
+
+    def test_reference_version(self):
+        location = {'ddotLocation': {'agencyCode': 'USGS '}, 'existingLocation': {}}
+        response = self.app_client.post('/validators/add', content_type='application/json', headers=self.headers,
+                                        data=json.dumps(location))
+        self.assertEqual(response.headers['X-Reference-Version'], app.validator_reloader.current.version)
+
+        response = self.app_client.get('/version')
+        self.assertEqual(json.loads(response.data)['referenceVersion'], app.validator_reloader.current.version)
+
+
+class CandidateCountiesTestCase(TestCase):
+
+    def setUp(self):
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+
+    def test_candidate_counties(self):
+        response = self.app_client.get('/references/candidate_counties?latitude=%20430400&longitude=%200892400')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn({'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025'},
+                      json.loads(response.data)['counties'])
+
+    def test_invalid_coordinate(self):
+        response = self.app_client.get('/references/candidate_counties?latitude=north&longitude=0892400')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error_message', json.loads(response.data))
+
+
+class ReferenceEndpointsTestCase(TestCase):
+
+    def setUp(self):
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+
+    def test_counties(self):
+        response = self.app_client.get('/references/counties?country=US&state=55')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('025', [county['countyCode'] for county in json.loads(response.data)['counties']])
+        self.assertIn('max-age', response.headers['Cache-Control'])
+        self.assertEqual(response.headers['X-Reference-Version'], app.validator_reloader.current.version)
+
+    def test_not_modified(self):
+        response = self.app_client.get('/references/huc?country=US&state=55&prefix=0709')
+        etag = response.headers['ETag']
+
+        with mock.patch('mlrvalidator.services.ReferenceLookup') as mreference_lookup:
+            response = self.app_client.get('/references/huc?country=US&state=55&prefix=0709',
+                                           headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        mreference_lookup.assert_not_called()
+
+        response = self.app_client.get('/references/huc?country=US&state=55&prefix=0710',
+                                       headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_reference_version(self):
+        etag = self.app_client.get('/references/siteTypeCode').headers['ETag']
+
+        with mock.patch.object(app.validator_reloader.current, 'version', 'new version'):
+            response = self.app_client.get('/references/siteTypeCode', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_reference_list(self):
+        response = self.app_client.get('/references/siteTypeCode')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('GW', json.loads(response.data)['values'])
+
+        response = self.app_client.get('/references/notAField')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_missing_parameters(self):
+        response = self.app_client.get('/references/counties?country=US')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('state', json.loads(response.data)['error_message'])
+
+
+class StartupProfileTestCase(TestCase):
+
+    def setUp(self):
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+
+    def test_startup_profile(self):
+        response = self.app_client.get('/diagnostics/startup')
+
+        self.assertEqual(response.status_code, 200)
+        report = json.loads(response.data)
+        self.assertGreater(report['totalSeconds'], 0)
+        self.assertIn('imports', [phase['name'] for phase in report['phases']])
+        self.assertEqual(report['exceeded'], [])
+
+    def test_exceeded_budgets(self):
+        with mock.patch('mlrvalidator.services.startup_budgets', {'total': 0}):
+            response = self.app_client.get('/diagnostics/startup')
+
+        report = json.loads(response.data)
+        self.assertEqual(report['budgets'], {'total': 0})
+        self.assertEqual([budget['name'] for budget in report['exceeded']], ['total'])
+
+
+class TokenCacheTestCase(TestCase):
+
+    def setUp(self):
+        app.application.config['JWT_SECRET_KEY'] = 'secret'
+        app.application.config['JWT_PUBLIC_KEY'] = None
+        app.application.config['JWT_ALGORITHM'] = 'HS256'
+        app.application.config['JWT_DECODE_AUDIENCE'] = None
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+        self.headers = {'Authorization': 'Bearer {0}'.format(jwt.encode({}, 'secret').decode('utf-8'))}
+
+    def test_token_cache_stats(self):
+        token_cache = VerifiedTokenCache(10)
+        location = json.dumps({'ddotLocation': {'agencyCode': 'USGS '}, 'existingLocation': {}})
+        with mock.patch.object(app.application.extensions['flask-jwt-simple'], 'token_cache', token_cache), \
+                mock.patch('mlrvalidator.services.token_cache', token_cache):
+            for _ in range(4):
+                self.app_client.post('/validators/add', content_type='application/json', headers=self.headers,
+                                     data=location)
+            response = self.app_client.get('/diagnostics/token_cache')
+
+        self.assertEqual(response.status_code, 200)
+        stats = json.loads(response.data)
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses']), (1, 3, 1))
+        self.assertEqual(stats['hitRate'], 0.75)
+
+    def test_token_cache_disabled(self):
+        with mock.patch('mlrvalidator.services.token_cache', None):
+            response = self.app_client.get('/diagnostics/token_cache')
+        self.assertEqual(response.status_code, 404)
+
+
+class HealthTestCase(TestCase):
+
+    def setUp(self):
+        app.application.testing = True
+        self.app_client = app.application.test_client()
+
+    def test_live(self):
+        response = self.app_client.get('/health/live')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), {'status': 'UP'})
+
+    def test_ready(self):
+        response = self.app_client.get('/health/ready')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), {
+            'ready': True,
+            'referencesLoaded': True,
+            'warm': True,
+            'tokenKeysLoaded': True,
+            'referenceVersion': app.validator_reloader.current.version
+        })
+
+    def test_not_ready_until_checked(self):
+        with mock.patch.object(app.validator_reloader.current, 'checked', False):
+            response = self.app_client.get('/health/ready')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(json.loads(response.data)['ready'])
+        self.assertFalse(json.loads(response.data)['warm'])
+
+    def test_version_not_looked_up_per_request(self):
+        with mock.patch('mlrvalidator.services.pkg_resources.get_distribution') as mget_distribution:
+            response = self.app_client.get('/version')
+
+        self.assertEqual(response.status_code, 200)
+        mget_distribution.assert_not_called()
+        self.assertIn('version', json.loads(response.data))
+
+    def test_swagger_document_cached(self):
+        with mock.patch('mlrvalidator.services.Swagger') as mswagger:
+            response = self.app_client.get('/swagger.json')
+
+        self.assertEqual(response.status_code, 200)
+        mswagger.assert_not_called()
+        document = json.loads(response.data)
+        self.assertIn('/health/ready', document['paths'])
+        self.assertIn('/validators/add', document['paths'])
+
+    def test_swagger_batch_item_model(self):
+        response = self.app_client.get('/swagger.json')
+
+        properties = json.loads(response.data)['definitions']['BatchItemModel']['properties']
+        self.assertEqual(properties['ddotLocation']['$ref'], '#/definitions/DdotLocationModel')
+        self.assertEqual(properties['existingLocation']['$ref'], '#/definitions/LocationModel')
@@ -0,0 +1,138 @@
+import os
+from unittest import TestCase, mock
+
+from app import application
+from ..startup_profile import StartupProfiler, parse_budgets
+from ..validators.reference import ReferenceLists, ReferenceRegistry
+
+
+class ParseBudgetsTestCase(TestCase):
+
+    def test_budgets(self):
+        self.assertEqual(parse_budgets('imports=3, reference:*=2.5,total=20'),
+                         {'imports': 3.0, 'reference:*': 2.5, 'total': 20.0})
+
+    def test_empty(self):
+        self.assertEqual(parse_budgets(''), {})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_budgets('imports')
+        with self.assertRaises(ValueError):
+            parse_budgets('imports=fast')
+        with self.assertRaises(ValueError):
+            parse_budgets('=3')
+
+
+class StartupProfilerTestCase(TestCase):
+
+    def setUp(self):
+        self.profiler = StartupProfiler()
+
+    def test_phases_not_recorded_before_start(self):
+        with self.profiler.phase('imports'):
+            pass
+        self.assertEqual(self.profiler.phases, [])
+
+    def test_nested_phases(self):
+        self.profiler.start()
+        with self.profiler.phase('validators'):
+            with self.profiler.phase('reference:state.json'):
+                pass
+        with self.profiler.phase('services'):
+            pass
+        self.profiler.finish()
+
+        report = self.profiler.report()
+        self.assertEqual([(phase['name'], phase['depth']) for phase in report['phases']],
+                         [('validators', 0), ('reference:state.json', 1), ('services', 0)])
+        self.assertGreaterEqual(report['phases'][0]['seconds'], report['phases'][1]['seconds'])
+        self.assertGreaterEqual(report['totalSeconds'], report['phases'][0]['seconds'])
+        self.assertIsNone(report['phases'][0]['allocatedBytes'])
+
+    def test_phases_not_recorded_after_finish(self):
+        self.profiler.start()
+        self.profiler.finish()
+        with self.profiler.phase('reference:state.json'):
+            pass
+        self.assertEqual(self.profiler.phases, [])
+
+    def test_phase_recorded_when_it_raises(self):
+        self.profiler.start()
+        with self.assertRaises(ValueError):
+            with self.profiler.phase('key_fetch'):
+                raise ValueError()
+        with self.profiler.phase('validators'):
+            pass
+
+        self.assertIsNotNone(self.profiler.phases[0].seconds)
+        self.assertEqual(self.profiler.phases[1].depth, 0)
+
+    def test_trace_memory(self):
+        self.profiler.start(trace_memory=True)
+        with self.profiler.phase('reference:big.json'):
+            data = [str(i) for i in range(100000)]
+        self.profiler.finish()
+
+        self.assertGreater(self.profiler.phases[0].allocated_bytes, 1000000)
+        self.assertEqual(len(data), 100000)
+
+    def test_check_budgets(self):
+        self.profiler.start()
+        for name in ['imports', 'reference:county.json', 'reference:state.json']:
+            with self.profiler.phase(name):
+                pass
+        self.profiler.finish()
+        self.profiler.phases[0].seconds = 2.0
+        self.profiler.phases[1].seconds = 1.5
+        self.profiler.phases[2].seconds = 0.5
+        self.profiler.total_seconds = 4.0
+
+        self.assertEqual(self.profiler.check_budgets({}), [])
+        self.assertEqual(self.profiler.check_budgets({'imports': 3, 'reference:*': 1, 'total': 5}),
+                         [('reference:county.json', 1.5, 1)])
+        # The smallest of the matching budgets is used
+        self.assertEqual(self.profiler.check_budgets({'reference:*': 2, 'reference:state*': 0.25, 'total': 3}),
+                         [('reference:state.json', 0.5, 0.25), ('total', 4.0, 3)])
+
+    def test_report_budgets(self):
+        self.profiler.start()
+        with self.profiler.phase('imports'):
+            pass
+        self.profiler.finish()
+        self.profiler.phases[0].seconds = 2.0
+
+        report = self.profiler.report({'imports': 1})
+        self.assertEqual(report['budgets'], {'imports': 1})
+        self.assertEqual(report['exceeded'], [{'name': 'imports', 'seconds': 2.0, 'budget': 1}])
+
+        lines = self.profiler.format_report({'imports': 1}).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].strip().startswith('imports'))
+        self.assertTrue(lines[1].endswith('OVER BUDGET'))
+        self.assertTrue(lines[2].strip().startswith('total'))
+
+
+class ApplicationStartupProfileTestCase(TestCase):
+
+    def test_reference_loads_recorded(self):
+        profiler = StartupProfiler()
+        path = os.path.join(application.config['REFERENCE_FILE_DIR'], 'reference_lists.json')
+        with mock.patch('mlrvalidator.startup_profile.startup_profiler', profiler):
+            profiler.start()
+            registry = ReferenceRegistry()
+            registry.get(ReferenceLists, path)
+            # References which are reused are not loaded again
+            registry.get(ReferenceLists, path)
+            profiler.finish()
+
+        self.assertEqual([phase.name for phase in profiler.phases], ['reference:reference_lists.json:ReferenceLists'])
+
+    def test_application_profile(self):
+        from app import startup_profiler
+
+        self.assertFalse(startup_profiler.active)
+        names = [phase.name for phase in startup_profiler.phases]
+        for name in ['imports', 'config', 'validators', 'schema:error_schema.yml', 'schema:warning_schema.yml',
+                     'reference:county.json:Counties', 'services']:
+            self.assertIn(name, names)
@@ -1,7 +1,7 @@
 
 from unittest import TestCase
 
-from ..utils import get_dict
+from ..utils import get_dict, index_dicts
 
 class GetDictTestCase(TestCase):
 
@@ -34,3 +34,27 @@ class GetDictTestCase(TestCase):
             'a': 'B',
             'b': 2
         }], 'c', 'C'), {})
+
+
+class IndexDictsTestCase(TestCase):
+
+    def test_empty_dictlist(self):
+        self.assertEqual(index_dicts([], 'a'), {})
+
+    def test_index_matches_get_dict(self):
+        dictlist = [{
+            'a': 'A',
+            'b': 1
+        }, {
+            'a': 'B',
+            'b': 2
+        }, {
+            'a': 'A',
+            'b': 3
+        }]
+        index = index_dicts(dictlist, 'a')
+        self.assertEqual(index, {'A': {'a': 'A', 'b': 1}, 'B': {'a': 'B', 'b': 2}})
+        self.assertEqual(index['A'], get_dict(dictlist, 'a', 'A'))
+
+    def test_entries_missing_parent_key_skipped(self):
+        self.assertEqual(index_dicts([{'b': 1}, 'A', {'a': 'A', 'b': 2}], 'a'), {'A': {'a': 'A', 'b': 2}})
@@ -0,0 +1,80 @@
+import os
+from unittest import TestCase, mock
+
+from ..validation_pool import ValidationPool
+from ..validators.validation_result import ValidationResult
+
+
+class ProcessErrorValidator:
+    '''
+    Reports the process used to validate each location as an error
+    '''
+
+    def validate_context(self, context):
+        return ValidationResult(errors={'pid': [os.getpid()], 'stationName': [context.document['stationName']]})
+
+
+class NoWarningValidator:
+
+    def validate_context(self, context):
+        return ValidationResult()
+
+
+class ValidationPoolTestCase(TestCase):
+
+    def setUp(self):
+        self.items = [{'ddotLocation': {'stationName': str(index)}, 'existingLocation': {}, 'transactionType': 'add'}
+                      for index in range(50)]
+
+    def test_results_in_order(self):
+        pool = ValidationPool(ProcessErrorValidator(), NoWarningValidator(), 3)
+        try:
+            results = pool.validate_batch(self.items)
+        finally:
+            pool.close()
+
+        self.assertEqual([result['fatal_error_message']['stationName'][0] for result in results],
+                         [str(index) for index in range(50)])
+        pids = set(result['fatal_error_message']['pid'][0] for result in results)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_invalid_items(self):
+        pool = ValidationPool(ProcessErrorValidator(), NoWarningValidator(), 2)
+        try:
+            results = pool.validate_batch([self.items[0], {'ddotLocation': {}}, self.items[1]])
+        finally:
+            pool.close()
+
+        self.assertEqual(len(results), 3)
+        self.assertIn('error_message', results[1])
+        self.assertEqual(results[2]['fatal_error_message']['stationName'], ['1'])
+
+    def test_single_process(self):
+        pool = ValidationPool(ProcessErrorValidator(), NoWarningValidator(), 1)
+        results = pool.validate_batch(self.items[:2])
+
+        self.assertEqual([result['fatal_error_message']['pid'][0] for result in results], [os.getpid(), os.getpid()])
+        self.assertIsNone(pool._pool)
+
+    def test_batch_after_close(self):
+        pool = ValidationPool(ProcessErrorValidator(), NoWarningValidator(), 2)
+        pool.validate_batch(self.items[:4])
+        pool.close()
+
+        with mock.patch('multiprocessing.get_context') as mock_get_context:
+            results = pool.validate_batch(self.items[:4])
+
+        mock_get_context.assert_not_called()
+        self.assertIsNone(pool._pool)
+        self.assertEqual([result['fatal_error_message']['pid'][0] for result in results], [os.getpid()] * 4)
+
+    def test_batch_with_pool_closed_after_it_was_taken(self):
+        pool = ValidationPool(ProcessErrorValidator(), NoWarningValidator(), 2)
+        taken_pool = pool._get_pool()
+        pool.close()
+
+        with mock.patch.object(pool, '_get_pool', return_value=taken_pool):
+            results = pool.validate_batch(self.items[:4])
+
+        self.assertEqual([result['fatal_error_message']['stationName'][0] for result in results], ['0', '1', '2', '3'])
+        self.assertIsNone(pool._pool)
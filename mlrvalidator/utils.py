@@ -18,3 +18,17 @@ def get_dict(dictlist, parent_key, parent_value):
     return result
 
 
+def index_dicts(dictlist, parent_key):
+    '''
+    Builds a lookup table equivalent to calling get_dict for every value of parent_key.
+    :param dictlist: list of dictionaries, in the form described in get_dict
+    :param parent_key: the key of the dictionary key whose value is used as the lookup key.
+    :return: dictionary mapping each value of parent_key to the first dictionary in dictlist with that value. Entries
+        which are not dictionaries or which do not contain parent_key are skipped.
+    '''
+    result = {}
+    for d in dictlist:
+        if isinstance(d, dict) and parent_key in d:
+            result.setdefault(d[parent_key], d)
+
+    return result
@@ -0,0 +1,99 @@
+'''
+Validates batches of locations on several cores.
+'''
+import math
+import multiprocessing
+import os
+import threading
+
+from .batch import validate_batch, validate_batch_item
+
+# Set in each worker process by _init_worker
+_worker_validators = None
+
+
+def _init_worker(error_validator, warning_validator):
+    global _worker_validators
+    _worker_validators = (error_validator, warning_validator)
+
+
+def _validate_worker_item(item):
+    error_validator, warning_validator = _worker_validators
+    return validate_batch_item(error_validator, warning_validator, item)
+
+
+class ValidationPool:
+    '''
+    Splits batches of locations across a pool of worker processes. The workers are forked from the process which
+    created the validators, so the loaded reference data is shared copy-on-write rather than being loaded or pickled
+    for each worker. Only the items and their results are sent between processes.
+
+    The worker processes are started when the first batch is validated. If the process which owns the pool forks, the
+    child process starts its own workers. Once the pool is closed no workers are started again and batches are
+    validated in the calling process, so a request which was still using a replaced validator set does not leak a pool.
+    '''
+
+    # Each worker is given about this many chunks of a batch so that a slow chunk does not leave the other workers idle
+    CHUNKS_PER_PROCESS = 4
+
+    def __init__(self, error_validator, warning_validator, processes):
+        '''
+        :param ErrorValidator error_validator:
+        :param WarningValidator warning_validator:
+        :param int processes: number of worker processes. If one or less, batches are validated in the calling process.
+        '''
+        self.error_validator = error_validator
+        self.warning_validator = warning_validator
+        self.processes = processes
+        self._pool = None
+        self._pool_pid = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        '''
+        :return: multiprocessing.Pool or None if the pool has been closed
+        '''
+        with self._lock:
+            if self._closed:
+                return None
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = multiprocessing.get_context('fork').Pool(
+                    self.processes,
+                    initializer=_init_worker,
+                    initargs=(self.error_validator, self.warning_validator)
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def validate_batch(self, items):
+        '''
+        :param list of dict items: items in the form accepted by batch.validate_batch_item
+        :return: list of dict - the validation response for each item in the same order as items.
+        '''
+        if self.processes <= 1 or len(items) <= 1:
+            return validate_batch(self.error_validator, self.warning_validator, items)
+
+        pool = self._get_pool()
+        if pool is not None:
+            chunksize = max(1, math.ceil(len(items) / (self.processes * self.CHUNKS_PER_PROCESS)))
+            try:
+                return pool.map(_validate_worker_item, items, chunksize=chunksize)
+            except ValueError:
+                # The pool was closed after it was taken, so it no longer accepts work
+                if not self._closed:
+                    raise
+        return validate_batch(self.error_validator, self.warning_validator, items)
+
+    def close(self):
+        '''
+        Stops the worker processes once they have finished any outstanding work. Batches validated after the pool is
+        closed are validated in the calling process.
+        '''
+        with self._lock:
+            self._closed = True
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.close()
+                self._pool.join()
+            self._pool = None
+            self._pool_pid = None
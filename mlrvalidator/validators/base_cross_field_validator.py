@@ -1,35 +1,61 @@
+import threading
+
+from .rule_registry import RuleRegistry
+from .validation_context import ValidationContext
+
 
 class BaseCrossFieldValidator:
     '''
     Extends validate to add an argument for the existing_document. Typically for an add this will be empty.
+
+    Subclasses either return their rules and the fields that each rule uses from _get_rules, so that only the rules
+    using the fields in the document are run, or implement _validate, which adds the errors found in a
+    ValidationContext to a dictionary. Validators do not keep any per-request state so validate_context can be called
+    from several threads at once.
     '''
 
     def __init__(self):
-        self._errors = {}
-
-    def validate(self, document, existing_document):
-        self.document = document
-        self.existing_document = existing_document
-        self.merged_document = existing_document.copy()
-        self.merged_document.update(document)
+        self._local = threading.local()
+        self.rule_registry = RuleRegistry(self._get_rules())
 
-        self._errors = {}
-
-        return True
+    def _get_rules(self):
+        '''
+        Subclasses should override this to register their rules. It is called by __init__, so anything the rules
+        depend on, such as reference data, must be loaded before calling super().__init__().
+        :return: list of CrossFieldRule in the order in which they should be run
+        '''
+        return []
 
-    @property
-    def errors(self):
-        return self._errors
+    def validate_context(self, context):
+        '''
+        :param ValidationContext context:
+        :return: dict of errors found. Empty if the location is valid.
+        '''
+        errors = {}
+        self._validate(context, errors)
+        return errors
 
-    def _any_fields_in_document(self, keys):
+    def _validate(self, context, errors):
+        '''
+        Runs the registered rules which use any of the fields in the document. Subclasses can override this to run
+        their validations.
+        :param ValidationContext context:
+        :param dict errors: the validation should add error messages to this dictionary
         '''
+        self.rule_registry.run(self, context, errors)
 
-        :param list of str keys:
+    def validate(self, document, existing_document):
+        '''
+        After validate is called the errors property will reflect the errors generated by the last call to validate
+        made by the calling thread.
+        :param dict document:
+        :param dict existing_document:
         :return: boolean
         '''
-        document_keys = self.document.keys()
-        return any(key in self.document for key in keys)
-
-
+        self._local.errors = self.validate_context(ValidationContext(document, existing_document))
 
+        return self._local.errors == {}
 
+    @property
+    def errors(self):
+        return getattr(self._local, 'errors', {})
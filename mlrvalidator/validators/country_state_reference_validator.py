@@ -1,48 +1,48 @@
 
 
-from .reference import CountryStateReference
+from .reference import CountryStateReference, ReferenceRegistry
 from .base_cross_field_validator import BaseCrossFieldValidator
+from .rule_registry import CrossFieldRule
 
 
 class CountryStateReferenceValidator(BaseCrossFieldValidator):
 
-    def __init__(self, path_to_reference_file, ref_list_key, document_key):
+    def __init__(self, path_to_reference_file, ref_list_key, document_key, reference_registry=None,
+                 reference_class=CountryStateReference):
         '''
 
         :param str path_to_reference_file:
         :param str ref_list_key: key to use in reference list.
         :param str document_key: key to use in the merged document to get the value to match
+        :param ReferenceRegistry reference_registry: If not specified a new registry is used.
+        :param class reference_class: CountryStateReference or one of its subclasses
         '''
-        self.country_state_ref = CountryStateReference(path_to_reference_file, ref_list_key)
+        if reference_registry is None:
+            reference_registry = ReferenceRegistry()
+        self.country_state_ref = reference_registry.get(reference_class, path_to_reference_file, ref_list_key)
         self.document_key = document_key
         self.country_key = 'countryCode'
         self.state_key = 'stateFipsCode'
+        self.fields = [self.country_key, self.state_key, self.document_key]
 
         super().__init__()
 
-    def validate(self, document, existing_document):
-        """
-
-        :param dict document:
-        :param dict existing_document:
-        :return: boolean
-        The object's errors property will contain a dictionary describing the error if the validation is False
-        """
-        super().validate(document, existing_document)
-        keys = ['countryCode', 'stateFipsCode', self.document_key]
-        if self._any_fields_in_document(keys):
-            country, state, value_to_check = [self.merged_document.get(key, '').strip() for key in keys]
-
-            if country and state and value_to_check:
-                ref_list = self.country_state_ref.get_list_by_country_state(country, state)
-                if value_to_check not in ref_list:
-                    self._errors[self.document_key] = ['{0} is not in the reference list for country {1}, state {2}'.format(value_to_check, country, state)]
-
-        return self._errors == {}
-
-    @property
-    def errors(self):
-        return self._errors
+    def _validate_reference(self, context, errors):
+        country, state, value_to_check = context.get_stripped_values(self.fields)
+
+        if country and state and value_to_check:
+            ref_list = self.country_state_ref.get_set_by_country_state(country, state)
+            if value_to_check not in ref_list:
+                error_message = '{0} is not in the reference list for country {1}, state {2}'.format(value_to_check, country, state)
+                valid_prefix = self.country_state_ref.get_longest_valid_prefix(country, state, value_to_check)
+                if valid_prefix:
+                    error_message += '. The longest valid prefix is {0} ({1} digits)'.format(valid_prefix, len(valid_prefix))
+                errors[self.document_key] = [error_message]
+
+    def _get_rules(self):
+        return [
+            CrossFieldRule('_validate_reference', self.fields)
+        ]
 
 
 
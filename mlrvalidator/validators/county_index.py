@@ -0,0 +1,115 @@
+'''
+Grid index of the bounding boxes of the counties in county.json, used to find the counties whose boxes contain a
+coordinate. Coordinates are compared in hundredths of a second, see dms.
+'''
+from collections import defaultdict
+import math
+
+from .dms import HUNDREDTHS_PER_DEGREE, MAX_LONGITUDE, CoordinateBounds, parse_latitude, parse_longitude
+from .reference import ReferenceInfo
+
+
+class CountyGridIndex:
+    '''
+    Each bounding box is added to every cell of a grid of CELL_DEGREES square cells which it overlaps, so only the
+    boxes in the cell of a coordinate need to be compared with it.
+    '''
+
+    CELL_DEGREES = 1
+
+    def __init__(self, boxes):
+        '''
+        :param list of tuple boxes: (min latitude, max latitude, min longitude, max longitude, county) with the
+            coordinates in hundredths of a second. county can be any value and is returned by get_candidates.
+        '''
+        self._boxes = []
+        self._cells = defaultdict(list)
+        for box in boxes:
+            self._add(*box)
+        self._cells = {cell: tuple(indexes) for cell, indexes in self._cells.items()}
+
+    def _cell(self, value):
+        return math.floor(value / (self.CELL_DEGREES * HUNDREDTHS_PER_DEGREE))
+
+    def _add(self, min_latitude, max_latitude, min_longitude, max_longitude, county):
+        index = len(self._boxes)
+        self._boxes.append((min_latitude, max_latitude, min_longitude, max_longitude, county))
+        for latitude_cell in range(self._cell(min_latitude), self._cell(max_latitude) + 1):
+            for longitude_cell in range(self._cell(min_longitude), self._cell(max_longitude) + 1):
+                self._cells[(latitude_cell, longitude_cell)].append(index)
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def get_candidates(self, latitude, longitude):
+        '''
+        :param int latitude: in hundredths of a second
+        :param int longitude: in hundredths of a second
+        :return: list of the county of each box which contains the coordinate, in the order the boxes were added.
+        '''
+        indexes = self._cells.get((self._cell(latitude), self._cell(longitude)), ())
+        candidates = []
+        for index in indexes:
+            min_latitude, max_latitude, min_longitude, max_longitude, county = self._boxes[index]
+            if min_latitude <= latitude <= max_latitude and min_longitude <= longitude <= max_longitude:
+                candidates.append(county)
+        return candidates
+
+
+class CountyBoundingBoxes(ReferenceInfo):
+    '''
+    Finds the counties whose bounding boxes in county.json contain a coordinate. Counties without a complete box and
+    county code 000, which has the box of a whole state or country, are left out. Boxes which cross the 180th meridian
+    are added as two boxes.
+    '''
+
+    def _build_index(self):
+        boxes = []
+        for country in self.reference_info.get('countries', []):
+            for state in country.get('states', []):
+                for county in state.get('counties', []):
+                    if county.get('countyCode') == '000':
+                        continue
+                    bounds = CoordinateBounds.from_attributes(county, 'county')
+                    if not (bounds.has_latitudes and bounds.has_longitudes):
+                        continue
+                    county_key = (country['countryCode'], state['stateFipsCode'], county['countyCode'])
+
+                    if bounds.crosses_180th_meridian:
+                        boxes.append((bounds.min_latitude, bounds.max_latitude, bounds.min_longitude, MAX_LONGITUDE,
+                                      county_key))
+                        boxes.append((bounds.min_latitude, bounds.max_latitude, -MAX_LONGITUDE, bounds.max_longitude,
+                                      county_key))
+                    else:
+                        boxes.append(tuple(bounds) + (county_key,))
+
+        self._index = CountyGridIndex(boxes)
+        # Only the boxes are needed, so the loaded json is not kept
+        self.reference_info = {}
+
+    def is_empty(self):
+        return len(self._index) == 0
+
+    def get_candidate_counties(self, latitude, longitude):
+        '''
+        :param str latitude: a sign or space followed by DDMMSS[.ss], as in a location
+        :param str longitude: a sign or space followed by DDDMMSS[.ss], positive to the west
+        :return: list of dict with the countryCode, stateFipsCode and countyCode of each county whose bounding box
+            contains the coordinate, sorted by country, state and county. None if either coordinate is rejected by
+            parse_latitude or parse_longitude, as it is by the valid_latitude_dms and valid_longitude_dms rules.
+        '''
+        latitude_value = parse_latitude(latitude)
+        longitude_value = parse_longitude(longitude)
+        if latitude_value is None or longitude_value is None:
+            return None
+        return self.get_counties_at(latitude_value, longitude_value)
+
+    def get_counties_at(self, latitude, longitude):
+        '''
+        :param int latitude: in hundredths of a second
+        :param int longitude: in hundredths of a second
+        :return: list of dict, as for get_candidate_counties
+        '''
+        counties = sorted(set(self._index.get_candidates(latitude, longitude)))
+        return [{'countryCode': country_code, 'stateFipsCode': state_code, 'countyCode': county_code}
+                for country_code, state_code, county_code in counties]
@@ -1,92 +1,69 @@
 
 from .base_cross_field_validator import BaseCrossFieldValidator
+from .rule_registry import CrossFieldRule
+
+LOCATION_KEYS = ['latitude', 'longitude', 'coordinateAccuracyCode', 'coordinateDatumCode', 'coordinateMethodCode']
+ALTITUDE_KEYS = ['altitude', 'altitudeDatumCode', 'altitudeMethodCode', 'altitudeAccuracyValue']
+SITE_USE_KEYS = ['primaryUseOfSiteCode', 'secondaryUseOfSiteCode', 'tertiaryUseOfSiteCode']
+WATER_USE_KEYS = ['primaryUseOfWaterCode', 'secondaryUseOfWaterCode', 'tertiaryUseOfWaterCode']
+SITE_DATE_KEYS = ['firstConstructionDate', 'siteEstablishmentDate']
+DEPTH_KEYS = ['holeDepth', 'wellDepth']
+DRAINAGE_AREA_KEYS = ['drainageArea', 'contributingDrainageArea']
 
 class CrossFieldErrorValidator(BaseCrossFieldValidator):
 
-    def _validate_reciprocal_dependency(self, keys, error_key):
+    def _validate_reciprocal_dependency(self, context, errors, keys, error_key):
         '''
         If not all values null or all non null an error will be
-        added to self._errors using error_key as the object key
+        added to errors using error_key as the object key
         :param list of str keys:
         :param str error_key: key to be used if an error is found
         '''
-        if self._any_fields_in_document(keys):
-            values = [self.merged_document.get(key, '').strip() for key in keys]
-            all_null = [value for value in values if value != '' ] == []
-            all_not_null = [value for value in values if value == ''] == []
-            if not (all_null or all_not_null):
-                self._errors[error_key] = \
-                    ['The following fields must all be empty or all must not be empty: {0}'.format(', '.join(keys))]
-
-    def _validate_use_code(self, primaryKey, secondaryKey, tertiaryKey):
-        keys = [primaryKey, secondaryKey, tertiaryKey]
-        if self._any_fields_in_document(keys):
-            primary, secondary, tertiary = [self.merged_document.get(key, '').strip() for key in keys]
-
-            if tertiary and (not primary or not secondary):
-                self._errors[tertiaryKey] =['Primary and secondary must be non null if tertiary is non null']
-            elif secondary and not primary:
-                self._errors[secondaryKey] = ['Primary must be non null if secondary is non null']
-
-    def _validate_site_dates(self):
-        keys = ['firstConstructionDate', 'siteEstablishmentDate']
-        if self._any_fields_in_document(keys):
-            construction_date, inventory_date = [self.merged_document.get(key, '').strip() for key in keys]
-            if (construction_date and inventory_date) and (construction_date > inventory_date):
-                self._errors['site_dates'] = ["firstConstructionDate cannot be more recent than siteEstablishmentDate"]
+        values = context.get_stripped_values(keys)
+        all_null = [value for value in values if value != '' ] == []
+        all_not_null = [value for value in values if value == ''] == []
+        if not (all_null or all_not_null):
+            errors[error_key] = \
+                ['The following fields must all be empty or all must not be empty: {0}'.format(', '.join(keys))]
 
-    def _validate_depths(self):
-        keys = ['holeDepth', 'wellDepth']
-        if self._any_fields_in_document(keys):
-            try:
-                hole_depth, well_depth = [float(self.merged_document.get(key, '').strip()) for key in keys]
-            except ValueError:
-                pass
-            else:
-                if (hole_depth and well_depth) and (well_depth > hole_depth):
-                    self._errors['depths'] = ["wellDepth cannot be greater than holeDepth"]
+    def _validate_use_code(self, context, errors, keys):
+        primary, secondary, tertiary = context.get_stripped_values(keys)
 
-    def _validate_drainage_area(self):
-        keys = ['drainageArea', 'contributingDrainageArea']
-        if self._any_fields_in_document(keys):
-            drainage_area, contributing_drainage_area = [self.merged_document.get(key, '').strip() for key in keys]
-            if contributing_drainage_area and not drainage_area:
-                self._errors['contributingDrainageArea'] = ['Can not have contributingDrainageArea without drainageArea']
-            else:
-                try:
-                    if (drainage_area and contributing_drainage_area) and float(contributing_drainage_area) > float(drainage_area):
-                        self._errors['drainageArea'] = ['contributingDrainageArea can not be larger than drainageArea']
-                except ValueError:
-                    pass
+        if tertiary and (not primary or not secondary):
+            errors[keys[2]] =['Primary and secondary must be non null if tertiary is non null']
+        elif secondary and not primary:
+            errors[keys[1]] = ['Primary must be non null if secondary is non null']
 
+    def _validate_site_dates(self, context, errors):
+        construction_date, inventory_date = context.get_stripped_values(SITE_DATE_KEYS)
+        if (construction_date and inventory_date) and (construction_date > inventory_date):
+            errors['site_dates'] = ["firstConstructionDate cannot be more recent than siteEstablishmentDate"]
 
-    def validate(self, document, existing_document):
-        '''
-        After validate is called the error property will reflect the errors generated by the last call to validate
-        :param dict document:
-        :param dict existing_document:
-        :return: boolean
-        '''
-
-        super().validate(document, existing_document)
-        self._validate_reciprocal_dependency([
-            'latitude',
-            'longitude',
-            'coordinateAccuracyCode',
-            'coordinateDatumCode',
-            'coordinateMethodCode'
-        ], 'location')
-        self._validate_reciprocal_dependency([
-            'altitude',
-            'altitudeDatumCode',
-            'altitudeMethodCode',
-            'altitudeAccuracyValue'
-            ], 'altitude')
-        self._validate_use_code('primaryUseOfSiteCode', 'secondaryUseOfSiteCode', 'tertiaryUseOfSiteCode')
-        self._validate_use_code('primaryUseOfWaterCode', 'secondaryUseOfWaterCode', 'tertiaryUseOfWaterCode')
-        self._validate_site_dates()
-        self._validate_depths()
-        self._validate_drainage_area()
+    def _validate_depths(self, context, errors):
+        hole_depth, well_depth = [context.get_number(key) for key in DEPTH_KEYS]
+        if hole_depth is not None and well_depth is not None:
+            if (hole_depth and well_depth) and (well_depth > hole_depth):
+                errors['depths'] = ["wellDepth cannot be greater than holeDepth"]
 
-        return self._errors == {}
+    def _validate_drainage_area(self, context, errors):
+        drainage_area, contributing_drainage_area = context.get_stripped_values(DRAINAGE_AREA_KEYS)
+        if contributing_drainage_area and not drainage_area:
+            errors['contributingDrainageArea'] = ['Can not have contributingDrainageArea without drainageArea']
+        elif drainage_area and contributing_drainage_area:
+            drainage_area_number, contributing_drainage_area_number = [context.get_number(key) for key in DRAINAGE_AREA_KEYS]
+            if drainage_area_number is not None and contributing_drainage_area_number is not None and \
+                    contributing_drainage_area_number > drainage_area_number:
+                errors['drainageArea'] = ['contributingDrainageArea can not be larger than drainageArea']
 
+    def _get_rules(self):
+        return [
+            CrossFieldRule('_validate_reciprocal_dependency', LOCATION_KEYS, LOCATION_KEYS, 'location',
+                           name='location'),
+            CrossFieldRule('_validate_reciprocal_dependency', ALTITUDE_KEYS, ALTITUDE_KEYS, 'altitude',
+                           name='altitude'),
+            CrossFieldRule('_validate_use_code', SITE_USE_KEYS, SITE_USE_KEYS, name='use_of_site_codes'),
+            CrossFieldRule('_validate_use_code', WATER_USE_KEYS, WATER_USE_KEYS, name='use_of_water_codes'),
+            CrossFieldRule('_validate_site_dates', SITE_DATE_KEYS),
+            CrossFieldRule('_validate_depths', DEPTH_KEYS),
+            CrossFieldRule('_validate_drainage_area', DRAINAGE_AREA_KEYS)
+        ]
@@ -5,112 +5,124 @@ import re
 
 from .base_cross_field_validator import BaseCrossFieldValidator
 from .country_state_reference_validator import CountryStateReferenceValidator
-from .reference import States, NationalWaterUseCodes, SiteTypesCrossField, Counties, LandNetCrossField, SiteNumberFormat
+from .reference import States, NationalWaterUseCodes, SiteTypesCrossField, Counties, LandNetCrossField, SiteNumberFormat, \
+    ReferenceRegistry, HydrologicUnitCodes
+from .rule_registry import CrossFieldRule
+
+COUNTY_KEYS = ['countryCode', 'stateFipsCode', 'countyCode']
+MCD_KEYS = ['countryCode', 'stateFipsCode', 'countyCode', 'minorCivilDivisionCode']
+STATE_KEYS = ['countryCode', 'stateFipsCode']
+NATIONAL_WATER_USE_KEYS = ['siteTypeCode', 'nationalWaterUseCode']
+STATE_LATITUDE_KEYS = ['latitude', 'countryCode', 'stateFipsCode']
+STATE_LONGITUDE_KEYS = ['longitude', 'countryCode', 'stateFipsCode']
 
 
 class CrossFieldRefErrorValidator(BaseCrossFieldValidator):
 
-    def __init__(self, reference_dir):
+    def __init__(self, reference_dir, reference_registry=None):
+        '''
+        :param str reference_dir:
+        :param ReferenceRegistry reference_registry: If not specified a new registry is used.
+        '''
+        if reference_registry is None:
+            reference_registry = ReferenceRegistry()
+        self.aquifer_ref_validator = CountryStateReferenceValidator(os.path.join(reference_dir, 'aquifer.json'), 'aquiferCodes', 'aquiferCode',
+                                                                    reference_registry=reference_registry)
+        self.huc_ref_validator = CountryStateReferenceValidator(os.path.join(reference_dir, 'huc.json'), 'hydrologicUnitCodes', 'hydrologicUnitCode',
+                                                                reference_registry=reference_registry,
+                                                                reference_class=HydrologicUnitCodes)
+        self.national_aquifer_ref_validator = CountryStateReferenceValidator(os.path.join(reference_dir, 'national_aquifer.json'), 'nationalAquiferCodes', 'nationalAquiferCode',
+                                                                             reference_registry=reference_registry)
+
+        self.counties_ref = reference_registry.get(Counties, os.path.join(reference_dir, 'county.json'))
+        self.mcd_ref = reference_registry.get(Counties, os.path.join(reference_dir, 'mcd.json'))
+        self.states_ref = reference_registry.get(States, os.path.join(reference_dir, 'state.json'))
+        self.national_water_use_ref = reference_registry.get(NationalWaterUseCodes, os.path.join(reference_dir, 'national_water_use.json'))
+        self.land_net_ref = reference_registry.get(LandNetCrossField, os.path.join(reference_dir, 'land_net.json'))
+        self.site_number_format_ref = reference_registry.get(SiteNumberFormat, os.path.join(reference_dir,'site_number_format.json'))
+        self.site_type_ref = reference_registry.get(SiteTypesCrossField, os.path.join(reference_dir, 'site_type_cross_field.json'))
+
         super().__init__()
-        self.aquifer_ref_validator = CountryStateReferenceValidator(os.path.join(reference_dir, 'aquifer.json'), 'aquiferCodes', 'aquiferCode')
-        self.huc_ref_validator = CountryStateReferenceValidator(os.path.join(reference_dir, 'huc.json'), 'hydrologicUnitCodes', 'hydrologicUnitCode')
-        self.national_aquifer_ref_validator = CountryStateReferenceValidator(os.path.join(reference_dir, 'national_aquifer.json'), 'nationalAquiferCodes', 'nationalAquiferCode')
-
-        self.counties_ref = Counties(os.path.join(reference_dir, 'county.json'))
-        self.mcd_ref = Counties(os.path.join(reference_dir, 'mcd.json'))
-        self.states_ref = States(os.path.join(reference_dir, 'state.json'))
-        self.national_water_use_ref = NationalWaterUseCodes(os.path.join(reference_dir, 'national_water_use.json'))
-        self.land_net_ref = LandNetCrossField(os.path.join(reference_dir, 'land_net.json'))
-        self.site_number_format_ref = SiteNumberFormat(os.path.join(reference_dir,'site_number_format.json'))
-        self.site_type_ref = SiteTypesCrossField(os.path.join(reference_dir, 'site_type_cross_field.json'))
-
-    def _validate_counties(self):
-        keys = ['countryCode', 'stateFipsCode', 'countyCode']
-        if self._any_fields_in_document(keys):
-            country, state, county = [self.merged_document.get(key, '').strip() for key in keys]
-
-            if country and state and county:
-                county_list = self.counties_ref.get_county_codes(country, state)
-                if county_list and county not in county_list:
-                    self._errors['countyCode'] = ['County {0} is not in the reference list for country {1} and state {2}'.format(county, country, state)]
-
-    def _validate_mcd(self):
-        keys = ['countryCode', 'stateFipsCode', 'countyCode', 'minorCivilDivisionCode']
-        if self._any_fields_in_document(keys):
-            if self.merged_document.get('minorCivilDivisionCode') is not None:
-                country, state, county, mcd = [self.merged_document.get(key, '').strip() for key in keys]
-
-                if country and state and county and mcd:
-                    allowed_mcds = self.mcd_ref.get_county_attributes(country, state, county).get('minorCivilDivisionCodes', [])
-
-                    if mcd not in allowed_mcds:
-                        self._errors['minorCivilDivisionCode'] = \
-                            ['MCD {0} is not in the list for country {1}, state {2} and county {3}'.format(mcd, country, state, county)]
-
-
-    def _validate_states(self):
+
+    def _validate_counties(self, context, errors):
+        country, state, county = context.get_stripped_values(COUNTY_KEYS)
+
+        if country and state and county:
+            county_list = context.get_reference(self.counties_ref.get_county_code_set, country, state)
+            if county_list and county not in county_list:
+                errors['countyCode'] = ['County {0} is not in the reference list for country {1} and state {2}'.format(county, country, state)]
+
+    def _validate_mcd(self, context, errors):
+        if context.merged_document.get('minorCivilDivisionCode') is not None:
+            country, state, county, mcd = context.get_stripped_values(MCD_KEYS)
+
+            if country and state and county and mcd:
+                allowed_mcds = context.get_reference(self.mcd_ref.get_county_attributes, country, state, county).get('minorCivilDivisionCodes', [])
+
+                if mcd not in allowed_mcds:
+                    errors['minorCivilDivisionCode'] = \
+                        ['MCD {0} is not in the list for country {1}, state {2} and county {3}'.format(mcd, country, state, county)]
+
+
+    def _validate_states(self, context, errors):
         '''
         :return: boolean
         '''
-        keys = ['countryCode', 'stateFipsCode']
-        if self._any_fields_in_document(keys):
-            country, state = [self.merged_document.get(key, '').strip() for key in keys]
+        country, state = context.get_stripped_values(STATE_KEYS)
 
-            if country and state:
-                state_list = self.states_ref.get_state_codes(country)
-                if state_list and state not in state_list:
-                    self._errors['stateFipsCode'] = ['{0} is not in the reference list for country {1}.'.format(state, country)]
+        if country and state:
+            state_list = context.get_reference(self.states_ref.get_state_code_set, country)
+            if state_list and state not in state_list:
+                errors['stateFipsCode'] = ['{0} is not in the reference list for country {1}.'.format(state, country)]
 
 
-    def _validate_national_water_use_code(self):
+    def _validate_national_water_use_code(self, context, errors):
         '''
         :return: boolean
         '''
-        keys = ['siteTypeCode', 'nationalWaterUseCode']
-        if self._any_fields_in_document(keys):
-            site_type, water_use = [self.merged_document.get(key, '').strip() for key in keys]
+        site_type, water_use = context.get_stripped_values(NATIONAL_WATER_USE_KEYS)
 
-            if site_type and water_use:
-                if water_use not in self.national_water_use_ref.get_national_water_use_codes(site_type):
-                    self._errors['nationalWaterUseCode'] = ['{0} is not in the references list for siteTypeCode {1}'.format(water_use, site_type)]
+        if site_type and water_use:
+            if water_use not in self.national_water_use_ref.get_national_water_use_code_set(site_type):
+                errors['nationalWaterUseCode'] = ['{0} is not in the references list for siteTypeCode {1}'.format(water_use, site_type)]
 
-    def _validate_site_type(self):
-        site_type = self.merged_document.get('siteTypeCode', '').strip()
+    def _validate_site_type(self, context, errors):
+        site_type = context.get_stripped('siteTypeCode')
 
         if site_type:
             site_type_attr = self.site_type_ref.get_site_type_field_dependencies(site_type)
-            if 'siteTypeCode' in self.document:
+            if 'siteTypeCode' in context.document:
                 # Should check all fields in site_type_attr
                 not_null_attrs = site_type_attr.get('notNullAttrs', [])
                 null_attrs = site_type_attr.get('nullAttrs', [])
             else:
                 # Only check fields that are in the document
                 not_null_attrs = [not_null_attr for not_null_attr in site_type_attr.get('notNullAttrs', [])
-                                  if not_null_attr in self.document]
+                                  if not_null_attr in context.document]
                 null_attrs = [null_attr for null_attr in site_type_attr.get('nullAttrs', [])
-                              if null_attr in self.document]
+                              if null_attr in context.document]
 
             # Should check all fields in site_type_attr
             not_null_errors = []
             null_errors = []
             for not_null_attr in not_null_attrs:
-                if not self.merged_document.get(not_null_attr, '').strip():
+                if not context.get_stripped(not_null_attr):
                     not_null_errors.append(not_null_attr)
 
             for null_attr in null_attrs:
-                if self.merged_document.get(null_attr, '').strip():
+                if context.get_stripped(null_attr):
                     null_errors.append(null_attr)
 
             if not_null_errors or null_errors:
-                self._errors['siteTypeCode'] = []
+                errors['siteTypeCode'] = []
                 if not_null_errors:
-                    self._errors['siteTypeCode'].append(
+                    errors['siteTypeCode'].append(
                         'Site type {0} must not have the following attributes null: {1}'.format(site_type, ', '.join(not_null_errors)))
                 if null_errors:
-                    self._errors['siteTypeCode'].append(
+                    errors['siteTypeCode'].append(
                         'Site type {0} must have the following attributes null: {1}'.format(site_type, ', '.join(null_errors)))
 
-    def _validate_land_net(self):
+    def _validate_land_net(self, context, errors):
         # Check that the land net description field follows the correct template
         """
         The rule's arguments are validated against this schema:
@@ -118,8 +130,8 @@ class CrossFieldRefErrorValidator(BaseCrossFieldValidator):
         """
         error_message = "Invalid format - Land Net does not fit template"
         keys = ['districtCode', 'landNet']
-        if self._any_fields_in_document(keys):
-             district_code, land_net = [self.merged_document.get(key, '') for key in keys]
+        if context.any_fields_in_document(keys):
+             district_code, land_net = [context.merged_document.get(key, '') for key in keys]
 
              if district_code and land_net:
                  land_net_template = self.land_net_ref.get_land_net_templates(district_code)
@@ -132,62 +144,59 @@ class CrossFieldRefErrorValidator(BaseCrossFieldValidator):
                          if land_net[section] == "S" and land_net[township] == "T" and land_net[lrange] == "R":
                              test_match = re.search('[^a-zA-Z0-9 ]', land_net[section:value_end])
                              if test_match is not None:
-                                 self._errors['landNet'] = [error_message]
+                                 errors['landNet'] = [error_message]
                          else:
-                             self._errors['landNet'] = [error_message]
+                             errors['landNet'] = [error_message]
                      except IndexError:
-                         self._errors['landNet'] = [error_message]
-
-    def _validate_state_latitude_range(self):
-        keys = ['latitude', 'countryCode', 'stateFipsCode']
-        if self._any_fields_in_document(keys):
-            lat, country, state = [self.merged_document.get(key, '').strip() for key in keys]
-
-            if lat and country and state:
-                # Do a check for lat range using the country and state codes
-                state_attr = self.states_ref.get_state_attributes(country, state)
-                if state_attr and 'state_min_lat_va' in state_attr and 'state_max_lat_va' in state_attr:
-                    if not (state_attr['state_min_lat_va'] <= lat < state_attr['state_max_lat_va']):
-                        self._errors['latitude'] = ['Latitude is out of range for state {0}'.format(state)]
-
-    def _validate_state_longitude_range(self):
-        keys = ['longitude', 'countryCode', 'stateFipsCode']
-        if self._any_fields_in_document(keys):
-            lat, country, state = [self.merged_document.get(key, '').strip() for key in keys]
-
-            if lat and country and state:
-                # Do a check for lat range using the country and state codes
-                state_attr = self.states_ref.get_state_attributes(country, state)
-                if state_attr and 'state_min_long_va' in state_attr and 'state_max_long_va' in state_attr:
-                    if not (state_attr['state_min_long_va'] <= lat < state_attr['state_max_long_va']):
-                        self._errors['longitude'] = ['Longitude is out of range for state {0}'.format(state)]
-
-    def validate(self, document, existing_document):
-        '''
-        :param dict document:
-        :param dict existing_document:
-        :return: boolean
-        '''
-        super().validate(document, existing_document)
+                         errors['landNet'] = [error_message]
 
-        self.aquifer_ref_validator.validate(document, existing_document)
-        # A huc of 99999999 is always allowed
-        if self.merged_document.get('hydrologicUnitCode', '').strip() != '99999999':
-            self.huc_ref_validator.validate(document, existing_document)
-        self.national_aquifer_ref_validator.validate(document, existing_document)
+    def _validate_state_latitude_range(self, context, errors):
+        latitude = context.get_coordinate('latitude')
+        country, state = context.get_stripped_values(['countryCode', 'stateFipsCode'])
 
-        self._validate_counties()
-        self._validate_mcd()
-        self._validate_states()
-        self._validate_national_water_use_code()
+        # Invalid coordinates are reported by the single field rules
+        if latitude is not None and country and state:
+            state_bounds = context.get_reference(self.states_ref.get_state_bounds, country, state)
+            if not state_bounds.contains_latitude(latitude):
+                errors['latitude'] = ['Latitude is out of range for state {0}'.format(state)]
 
-        self._validate_site_type()
-        #self._validate_land_net()
-        self._validate_state_latitude_range()
-        self._validate_state_longitude_range()
+    def _validate_state_longitude_range(self, context, errors):
+        longitude = context.get_coordinate('longitude')
+        country, state = context.get_stripped_values(['countryCode', 'stateFipsCode'])
 
-        self._errors.update(self.aquifer_ref_validator.errors)
-        self._errors.update(self.huc_ref_validator.errors)
-        self._errors.update(self.national_aquifer_ref_validator.errors)
+        if longitude is not None and country and state:
+            state_bounds = context.get_reference(self.states_ref.get_state_bounds, country, state)
+            if not state_bounds.contains_longitude(longitude):
+                errors['longitude'] = ['Longitude is out of range for state {0}'.format(state)]
+
+    def _validate_country_state_reference(self, context, errors, validator_name):
+        '''
+        Runs one of the CountryStateReferenceValidators
+        :param str validator_name: name of the attribute holding the CountryStateReferenceValidator
+        '''
+        errors.update(getattr(self, validator_name).validate_context(context))
+
+    def _validate_hydrologic_unit_code(self, context, errors):
+        # A huc of 99999999 is always allowed
+        if context.get_stripped('hydrologicUnitCode') != '99999999':
+            self._validate_country_state_reference(context, errors, 'huc_ref_validator')
+
+    def _get_rules(self):
+        # The site type rule uses siteTypeCode and every attribute which any site type requires to be null or not null
+        site_type_keys = ['siteTypeCode'] + self.site_type_ref.get_site_type_dependent_fields()
+        return [
+            CrossFieldRule('_validate_counties', COUNTY_KEYS),
+            CrossFieldRule('_validate_mcd', MCD_KEYS),
+            CrossFieldRule('_validate_states', STATE_KEYS),
+            CrossFieldRule('_validate_national_water_use_code', NATIONAL_WATER_USE_KEYS),
+            CrossFieldRule('_validate_site_type', site_type_keys),
+            CrossFieldRule('_validate_state_latitude_range', STATE_LATITUDE_KEYS),
+            CrossFieldRule('_validate_state_longitude_range', STATE_LONGITUDE_KEYS),
+            # The country and state reference errors replace any other errors for their fields, so they run last
+            CrossFieldRule('_validate_country_state_reference', self.aquifer_ref_validator.fields,
+                           'aquifer_ref_validator', name='aquifer_reference'),
+            CrossFieldRule('_validate_hydrologic_unit_code', self.huc_ref_validator.fields),
+            CrossFieldRule('_validate_country_state_reference', self.national_aquifer_ref_validator.fields,
+                           'national_aquifer_ref_validator', name='national_aquifer_reference')
+        ]
 
-        return self._errors == {}
@@ -0,0 +1,132 @@
+'''
+Parses the degrees, minutes and seconds (DMS) coordinates of locations and references into integer hundredths of a
+second so that coordinates can be compared exactly, whatever their sign or padding.
+
+Latitudes are [-]DDMMSS[.ss] and longitudes are [-]DDDMMSS[.ss], with longitudes positive to the west. Locations pad
+positive values with a leading space while the reference files do not.
+'''
+from collections import namedtuple
+import re
+
+HUNDREDTHS_PER_DEGREE = 360000
+MAX_LONGITUDE = 180 * HUNDREDTHS_PER_DEGREE
+
+_DMS_PATTERN = re.compile(r'^(-?)(\d{5,7})(?:\.(\d+))?$')
+_LATITUDE_PATTERN = re.compile(r'^[ -](\d{2})(\d{2})(\d{2})(?:\.(\d+))?$')
+_LONGITUDE_PATTERN = re.compile(r'^[ -](\d{3})(\d{2})(\d{2})(?:\.(\d+))?$')
+
+
+def _to_hundredths(negative, degrees, minutes, seconds, fraction):
+    if minutes >= 60 or seconds >= 60:
+        return None
+    # Digits after the hundredths are dropped
+    total = ((degrees * 60 + minutes) * 60 + seconds) * 100 + int((fraction or '0')[:2].ljust(2, '0'))
+    return -total if negative else total
+
+
+def parse_dms(value):
+    '''
+    :param str value: latitude or longitude. Surrounding white space is ignored.
+    :return: int - value in hundredths of a second or None if value is not a DMS coordinate
+    '''
+    match = _DMS_PATTERN.match(value.strip())
+    if match is None:
+        return None
+    sign, digits, fraction = match.groups()
+    return _to_hundredths(sign == '-', int(digits[:-4]), int(digits[-4:-2]), int(digits[-2:]), fraction)
+
+
+def _parse_padded(pattern, max_degrees, value):
+    match = pattern.match(value.rstrip())
+    if match is None:
+        return None
+    degrees, minutes, seconds, fraction = match.groups()
+    if int(degrees) > max_degrees:
+        return None
+    return _to_hundredths(value[0] == '-', int(degrees), int(minutes), int(seconds), fraction)
+
+
+def parse_latitude(value):
+    '''
+    :param str value: latitude as sent by a location: a sign or space followed by DDMMSS[.ss]. Trailing white space is
+        ignored.
+    :return: int - value in hundredths of a second or None if value is not in this format or is more than 90 degrees.
+    '''
+    return _parse_padded(_LATITUDE_PATTERN, 90, value)
+
+
+def parse_longitude(value):
+    '''
+    :param str value: longitude as sent by a location: a sign or space followed by DDDMMSS[.ss]. Trailing white space
+        is ignored.
+    :return: int - value in hundredths of a second or None if value is not in this format or is more than 180 degrees.
+    '''
+    return _parse_padded(_LONGITUDE_PATTERN, 180, value)
+
+
+class CoordinateBounds(namedtuple('CoordinateBounds',
+                                  ['min_latitude', 'max_latitude', 'min_longitude', 'max_longitude'])):
+    '''
+    Bounding box of a state or county in hundredths of a second. A latitude or longitude range is None if either of
+    its bounds is missing or not a DMS coordinate.
+    '''
+
+    @classmethod
+    def from_attributes(cls, attributes, prefix):
+        '''
+        Latitudes given with the minimum greater than the maximum are swapped. Longitudes which go from a positive
+        (west) minimum to a negative (east) maximum cross the 180th meridian and are kept as they are. Other
+        longitudes with the minimum greater than the maximum are swapped.
+        :param dict attributes: state or county from state.json or county.json
+        :param str prefix: 'state' or 'county'
+        :return: CoordinateBounds
+        '''
+        min_latitude, max_latitude, min_longitude, max_longitude = [
+            parse_dms(attributes.get('{0}_{1}_va'.format(prefix, name)) or '')
+            for name in ['min_lat', 'max_lat', 'min_long', 'max_long']]
+
+        if min_latitude is None or max_latitude is None:
+            min_latitude = max_latitude = None
+        elif min_latitude > max_latitude:
+            min_latitude, max_latitude = max_latitude, min_latitude
+
+        if min_longitude is None or max_longitude is None:
+            min_longitude = max_longitude = None
+        elif min_longitude > max_longitude and not max_longitude < 0 <= min_longitude:
+            min_longitude, max_longitude = max_longitude, min_longitude
+
+        return cls(min_latitude, max_latitude, min_longitude, max_longitude)
+
+    @property
+    def has_latitudes(self):
+        return self.min_latitude is not None
+
+    @property
+    def has_longitudes(self):
+        return self.min_longitude is not None
+
+    @property
+    def crosses_180th_meridian(self):
+        return self.has_longitudes and self.min_longitude > self.max_longitude
+
+    def contains_latitude(self, latitude):
+        '''
+        :param int latitude: in hundredths of a second
+        :return: boolean - True if latitude is within the bounds, inclusive. Also True if there are no latitude bounds.
+        '''
+        return not self.has_latitudes or self.min_latitude <= latitude <= self.max_latitude
+
+    def contains_longitude(self, longitude):
+        '''
+        :param int longitude: in hundredths of a second
+        :return: boolean - True if longitude is within the bounds, inclusive. Also True if there are no longitude
+            bounds.
+        '''
+        if not self.has_longitudes:
+            return True
+        if self.crosses_180th_meridian:
+            return longitude >= self.min_longitude or longitude <= self.max_longitude
+        return self.min_longitude <= longitude <= self.max_longitude
+
+
+NO_BOUNDS = CoordinateBounds(None, None, None, None)
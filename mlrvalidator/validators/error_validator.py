@@ -2,25 +2,48 @@
 from collections import defaultdict
 from itertools import chain
 import os
+import threading
 import yaml
 
+from mlrvalidator.startup_profile import profile_phase
 from .cross_field_error_validator import CrossFieldErrorValidator
 from .cross_field_ref_error_validator import CrossFieldRefErrorValidator
+from .reference import ReferenceRegistry
 from .single_field_validator import SingleFieldValidator
 from .transition_validator import TransitionValidator
+from .validation_context import ValidationContext
+from .validation_result import ValidationResult
 
 
 class ErrorValidator:
 
-    def __init__(self, schema_dir, reference_file_dir):
-        with open(os.path.join(schema_dir, 'error_schema.yml')) as fd:
-            error_schema = yaml.load(fd.read())
+    def __init__(self, schema_dir, reference_file_dir, reference_registry=None, metrics=None):
+        '''
+        :param str schema_dir:
+        :param str reference_file_dir:
+        :param ReferenceRegistry reference_registry: Registry used to load the reference files. Pass the same
+            registry to other validators to share the loaded references. If not specified a new registry is used.
+        :param ValidationMetrics metrics: If specified, the stages and rules of the validator are timed.
+        '''
+        if reference_registry is None:
+            reference_registry = ReferenceRegistry()
 
-        self.single_field_validator = SingleFieldValidator(error_schema, reference_dir=reference_file_dir, allow_unknown=True)
+        # Loading the schema includes its validation by Cerberus and its compilation into checks
+        with profile_phase('schema:error_schema.yml'):
+            with open(os.path.join(schema_dir, 'error_schema.yml')) as fd:
+                error_schema = yaml.load(fd.read())
+            self.single_field_validator = SingleFieldValidator(error_schema, reference_dir=reference_file_dir,
+                                                               reference_registry=reference_registry,
+                                                               metrics=metrics, allow_unknown=True)
         self.cross_field_validator = CrossFieldErrorValidator()
-        self.cross_field_ref_validator = CrossFieldRefErrorValidator(reference_file_dir)
-        self.transition_validator = TransitionValidator(reference_file_dir)
-        self._errors = defaultdict(list)
+        self.cross_field_ref_validator = CrossFieldRefErrorValidator(reference_file_dir, reference_registry=reference_registry)
+        self.transition_validator = TransitionValidator(reference_file_dir, reference_registry=reference_registry)
+        self._local = threading.local()
+
+        if metrics is not None:
+            metrics.instrument_cross_field_validator(self.cross_field_validator)
+            metrics.instrument_cross_field_validator(self.cross_field_ref_validator)
+            metrics.instrument_stages(self)
 
     def validate(self, ddot_location, existing_location, update=False):
         """
@@ -30,31 +53,51 @@ class ErrorValidator:
         :param existing_location: dict describing properties of an existing location. Cannot be None, even if there is no existing location. Specify an empty dict instead.
         :param update: Boolean True if the properties in ddot_location should be merged into existing_location. False otherwise.
                         If this is False and existing_location is non-empty, this method returns False because it is considered a duplicate
-        :return: Boolean True if valid, False if invalid.
+        :return: ValidationResult containing the errors found. The result is truthy if the location is valid.
+            The validator does not keep any state between calls so it can be used from several threads at once. The
+            errors property will reflect the errors generated by the last call to validate made by the calling thread.
         """
-        self.single_field_validator.validate(ddot_location, update=update)
-        self.cross_field_validator.validate(ddot_location, existing_location)
-        self.cross_field_ref_validator.validate(ddot_location, existing_location)
+        return self.validate_context(ValidationContext(ddot_location, existing_location, update=update))
+
+    def validate_context(self, context):
+        '''
+        Validates the location in context. The context can be shared with a WarningValidator so that the merged
+        document and the stripped values are only computed once.
+        :param ValidationContext context:
+        :return: ValidationResult containing the errors found
+        '''
+        single_field_errors = self.single_field_validator.validate_context(context)
+        cross_field_errors = self.cross_field_validator.validate_context(context)
+        cross_field_ref_errors = self.cross_field_ref_validator.validate_context(context)
 
-        if update:
-            self.transition_validator.validate(ddot_location, existing_location)
-            transition_errors = self.transition_validator.errors
+        if context.update:
+            transition_errors = self.transition_validator.validate_context(context)
         else:
             transition_errors = {}
 
-        self._errors = defaultdict(list)
+        errors = defaultdict(list)
         all_errors = chain(
-            self.single_field_validator.errors.items(),
-            self.cross_field_validator.errors.items(),
-            self.cross_field_ref_validator.errors.items(),
+            single_field_errors.items(),
+            cross_field_errors.items(),
+            cross_field_ref_errors.items(),
             transition_errors.items(),
         )
 
         for k, v in chain(all_errors):
-            self.errors[k].extend(v)
-        return self._errors == {}
+            errors[k].extend(v)
+
+        self._local.errors = errors
+        return ValidationResult(errors=errors)
+
+    def rule_coverage(self):
+        '''
+        :return: dict of the coverage statistics of the rule registry of each cross field stage, keyed by the stage
+            attribute name. Useful for checking which rules are run by the locations being validated.
+        '''
+        return {name: getattr(self, name).rule_registry.coverage()
+                for name in ['cross_field_validator', 'cross_field_ref_validator']}
 
     @property
     def errors(self):
-        return self._errors
+        return getattr(self._local, 'errors', defaultdict(list))
 
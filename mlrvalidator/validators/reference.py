@@ -1,16 +1,142 @@
+from collections import defaultdict
 import json
+import os
+
+from mlrvalidator.startup_profile import profile_phase
+from mlrvalidator.utils import index_dicts
+from .dms import CoordinateBounds, NO_BOUNDS
+from .reference_snapshot import get_snapshot
+from .reference_store import get_store, StoreCountryStateReference, StoreCounties, StoreHydrologicUnitCodes
+
+
+def load_reference_file(path_to_file):
+    '''
+    :param str path_to_file: path of a json reference file
+    :return: the contents of the file. These are read from the reference snapshot in the same directory when the
+        snapshot is current, otherwise the json file is parsed.
+    '''
+    snapshot = get_snapshot(os.path.dirname(path_to_file))
+    if snapshot is not None:
+        reference_info = snapshot.load(path_to_file)
+        if reference_info is not None:
+            return reference_info
+
+    fd = open(path_to_file)
+    with fd:
+        return json.loads(fd.read())
+
+
+class ReferenceRegistry:
+    '''
+    Shares reference objects between validators so that each reference file is parsed and indexed once per process.
+    References are keyed by the reference class, the absolute path of the file and any additional constructor
+    arguments.
+    '''
+
+    def __init__(self, use_store=False):
+        '''
+        :param boolean use_store: If True, references which are in a current ReferenceStore in the directory of their
+            file are read from the store rather than loaded into dictionaries, see STORE_CLASSES.
+        '''
+        self.use_store = use_store
+        self._references = {}
+        self._reuse_counts = defaultdict(int)
+
+    def get(self, reference_class, path_to_file, *args):
+        '''
+        :param class reference_class: ReferenceInfo or one of its subclasses
+        :param str path_to_file:
+        :param args: any additional arguments needed to construct reference_class
+        :return: the instance of reference_class for path_to_file, creating it on first use.
+        '''
+        key = (reference_class, os.path.abspath(path_to_file), args)
+        try:
+            reference = self._references[key]
+        except KeyError:
+            reference = None
+            phase_name = 'reference:{0}:{1}'.format(os.path.basename(path_to_file),
+                                                    getattr(reference_class, '__name__', reference_class))
+            with profile_phase(phase_name):
+                if self.use_store and reference_class in STORE_CLASSES:
+                    store = get_store(os.path.dirname(path_to_file))
+                    if store is not None and store.is_current(path_to_file):
+                        reference = STORE_CLASSES[reference_class](store, path_to_file, *args)
+                if reference is None:
+                    reference = reference_class(path_to_file, *args)
+            self._references[key] = reference
+        else:
+            self._reuse_counts[key] += 1
+
+        return reference
+
+    @property
+    def paths(self):
+        return sorted(set(path for (reference_class, path, args) in self._references))
+
+    def get_empty_paths(self):
+        '''
+        :return: list of str - the paths of the loaded reference files which contain no data
+        '''
+        return sorted(set(path for (reference_class, path, args), reference in self._references.items()
+                          if reference.is_empty()))
+
+    @property
+    def bytes_saved(self):
+        '''
+        :return: int - the number of bytes of reference files that were not read and parsed again because an
+            already loaded reference was reused.
+        '''
+        bytes_saved = 0
+        for (reference_class, path, args), count in self._reuse_counts.items():
+            try:
+                bytes_saved += os.path.getsize(path) * count
+            except OSError:
+                pass
+        return bytes_saved
 
-from mlrvalidator.utils import get_dict
 
 class ReferenceInfo:
     def __init__(self, path_to_file):
-        fd = open(path_to_file)
-        with fd:
-            self.reference_info = json.loads(fd.read())
+        self.reference_info = load_reference_file(path_to_file)
+        self._build_index()
+
+    def _build_index(self):
+        '''
+        Called once after the reference file has been loaded. Subclasses override this to build the lookup tables
+        used by their get methods so that lookups do not have to scan self.reference_info.
+        '''
+        pass
 
     def get_reference_info(self):
         return self.reference_info
 
+    def is_empty(self):
+        return not self.reference_info
+
+
+class ReferenceLists(ReferenceInfo):
+    '''
+    The json in the file is assumed to have the following form:
+    {"fieldName": ["A", "B"]}
+    '''
+
+    def _build_index(self):
+        self._reference_sets = {field: frozenset(ref_list) for field, ref_list in self.reference_info.items()
+                                if isinstance(ref_list, list)}
+
+    def get_reference_set(self, field):
+        '''
+        :param str field:
+        :return: frozenset of the allowed values for field. Empty if field has no reference list.
+        '''
+        return self._reference_sets.get(field, frozenset())
+
+    def get_field_names(self):
+        '''
+        :return: sorted list of str - the fields which have a reference list
+        '''
+        return sorted(self._reference_sets)
+
 
 class CountryStateReference(ReferenceInfo):
 
@@ -24,17 +150,135 @@ class CountryStateReference(ReferenceInfo):
         self.ref_list_key = ref_list_key
         super().__init__(path_to_file)
 
+    def _build_index(self):
+        # Nested dictionaries of country code -> state code -> state dictionary
+        self._states_by_country = {}
+        for country_code, country in index_dicts(self.reference_info.get('countries', []), 'countryCode').items():
+            self._states_by_country[country_code] = index_dicts(country.get('states', []), 'stateFipsCode')
+
+        self._ref_sets = {}
+        for country_code, states in self._states_by_country.items():
+            for state_code, state in states.items():
+                self._ref_sets[(country_code, state_code)] = self._build_ref_set(state.get(self.ref_list_key, []))
+
+    def _build_ref_set(self, ref_list):
+        return frozenset(ref_list)
+
+    def _get_state(self, country_code, state_code):
+        return self._states_by_country.get(country_code, {}).get(state_code, {})
+
     def get_list_by_country_state(self, country_code, state_code):
-        country_list = self.reference_info['countries']
-        state_list = get_dict(country_list, 'countryCode', country_code).get('states', [])
+        return self._get_state(country_code, state_code).get(self.ref_list_key, [])
+
+    def get_set_by_country_state(self, country_code, state_code):
+        '''
+        :return: frozenset containing the same values as get_list_by_country_state.
+        '''
+        return self._ref_sets.get((country_code, state_code), frozenset())
+
+    def get_longest_valid_prefix(self, country_code, state_code, value):
+        '''
+        Reference lists which are hierarchical override this method.
+        :return: str - the longest prefix of value which is in the reference list for country and state. Empty if
+            there is none.
+        '''
+        return ''
+
+
+class HydrologicUnitCodeIndex:
+    '''
+    Sorted array index of hydrologic unit codes. The codes of each length are sorted and concatenated into a single
+    string so that membership is a binary search over fixed width slices rather than a scan of a list of strings.
+    Iterating over the index yields the codes in sorted order.
+    '''
+
+    def __init__(self, codes):
+        codes_by_length = defaultdict(set)
+        for code in codes:
+            codes_by_length[len(code)].add(code)
+        self._codes_by_length = {length: ''.join(sorted(codes)) for length, codes in codes_by_length.items() if length}
+        self._count = sum(len(codes) for codes in codes_by_length.values())
+
+    def __contains__(self, code):
+        width = len(code)
+        codes = self._codes_by_length.get(width)
+        if codes is None:
+            return False
+
+        low = 0
+        high = len(codes) // width
+        while low < high:
+            middle = (low + high) // 2
+            start = middle * width
+            if codes[start:start + width] < code:
+                low = middle + 1
+            else:
+                high = middle
+        start = low * width
+        return codes[start:start + width] == code
+
+    def __iter__(self):
+        all_codes = []
+        for width, codes in self._codes_by_length.items():
+            all_codes.extend(codes[start:start + width] for start in range(0, len(codes), width))
+        return iter(sorted(all_codes))
+
+    def __len__(self):
+        return self._count
+
+    def longest_prefix(self, code):
+        '''
+        Hydrologic unit codes are hierarchical with each level adding two digits to the code of its parent.
+        :param str code:
+        :return: str - the longest proper prefix of code, at a level boundary, which is in the index. Empty if there is none.
+        '''
+        for width in range(len(code) - 2, 0, -2):
+            if code[:width] in self:
+                return code[:width]
+        return ''
+
+
+class HydrologicUnitCodes(CountryStateReference):
+    '''
+    The code lists are held in a HydrologicUnitCodeIndex for each country and state. The loaded json is not kept once
+    the index has been built.
+    '''
+
+    def __init__(self, path_to_file, ref_list_key='hydrologicUnitCodes'):
+        super().__init__(path_to_file, ref_list_key)
+
+    def _build_index(self):
+        super()._build_index()
+        # The loaded json may be shared with other readers, so it is dropped rather than stripped of the code lists
+        self.reference_info = {}
+        self._states_by_country = {}
 
-        return get_dict(state_list, 'stateFipsCode', state_code).get(self.ref_list_key, [])
+    def is_empty(self):
+        return not self._ref_sets
+
+    def _build_ref_set(self, ref_list):
+        return HydrologicUnitCodeIndex(ref_list)
+
+    def get_list_by_country_state(self, country_code, state_code):
+        return list(self.get_set_by_country_state(country_code, state_code))
+
+    def get_longest_valid_prefix(self, country_code, state_code, value):
+        huc_index = self.get_set_by_country_state(country_code, state_code)
+        return huc_index.longest_prefix(value) if huc_index else ''
 
 
 class NationalWaterUseCodes(ReferenceInfo):
+
+    def _build_index(self):
+        self._site_types = index_dicts(self.reference_info.get('siteTypeCodes', []), 'siteTypeCode')
+        self._water_use_sets = {site_type_code: frozenset(site_type.get('nationalWaterUseCodes', []))
+                                for site_type_code, site_type in self._site_types.items()}
+
     def get_national_water_use_codes(self, site_type_code):
-        site_type_list = self.reference_info['siteTypeCodes']
-        return get_dict(site_type_list, 'siteTypeCode', site_type_code).get('nationalWaterUseCodes', [])
+        return self._site_types.get(site_type_code, {}).get('nationalWaterUseCodes', [])
+
+    def get_national_water_use_code_set(self, site_type_code):
+        return self._water_use_sets.get(site_type_code, frozenset())
 
 class SiteTypeInvalidCodes(ReferenceInfo):
     def get_site_type_invalid_codes(self):
@@ -46,6 +290,20 @@ class Counties(CountryStateReference):
     def __init__(self, path_to_file):
         super().__init__(path_to_file, 'counties')
 
+    def _build_index(self):
+        super()._build_index()
+
+        self._counties = {}
+        for country_code, states in self._states_by_country.items():
+            for state_code, state in states.items():
+                for county_code, county in index_dicts(state.get('counties', []), 'countyCode').items():
+                    self._counties[(country_code, state_code, county_code)] = county
+
+        self._county_bounds = {key: CoordinateBounds.from_attributes(county, 'county')
+                               for key, county in self._counties.items()}
+
+    def _build_ref_set(self, ref_list):
+        return frozenset(d['countyCode'] for d in ref_list)
 
     def get_county_codes(self, country_code, state_code):
         county_list = self.get_list_by_country_state(country_code, state_code)
@@ -53,72 +311,135 @@ class Counties(CountryStateReference):
 
         return county_code_list
 
+    def get_county_code_set(self, country_code, state_code):
+        '''
+        :return: frozenset containing the same values as get_county_codes
+        '''
+        return self.get_set_by_country_state(country_code, state_code)
+
     def get_county_attributes(self, country_code, state_code, county_code):
-        county_list = self.get_list_by_country_state(country_code, state_code)
-        try:
-            county_attributes = list(filter(lambda cc: cc['countyCode'] == county_code, county_list))[0]
-        except IndexError:
-            county_attributes = {}
+        return self._counties.get((country_code, state_code, county_code), {})
 
-        return county_attributes
+    def get_county_bounds(self, country_code, state_code, county_code):
+        '''
+        :return: CoordinateBounds of the county, converted when the reference file was loaded
+        '''
+        return self._county_bounds.get((country_code, state_code, county_code), NO_BOUNDS)
 
 
 class States(ReferenceInfo):
 
+    def _build_index(self):
+        self._state_lists = {}
+        self._states = {}
+        for country_code, country in index_dicts(self.reference_info.get('countries', []), 'countryCode').items():
+            self._state_lists[country_code] = country.get('states', [])
+            for state_code, state in index_dicts(self._state_lists[country_code], 'stateFipsCode').items():
+                self._states[(country_code, state_code)] = state
+
+        self._state_bounds = {key: CoordinateBounds.from_attributes(state, 'state')
+                              for key, state in self._states.items()}
+
+        self._state_code_sets = {country_code: frozenset(d['stateFipsCode'] for d in state_list)
+                                 for country_code, state_list in self._state_lists.items()}
+
     def get_state_codes(self, country_code):
-        country_list = self.reference_info['countries']
-        state_list = get_dict(country_list, 'countryCode', country_code).get('states', [])
+        state_list = self._state_lists.get(country_code, [])
         state_code_list = [d['stateFipsCode'] for d in state_list]
 
         return state_code_list
 
+    def get_state_code_set(self, country_code):
+        '''
+        :return: frozenset containing the same values as get_state_codes
+        '''
+        return self._state_code_sets.get(country_code, frozenset())
+
     def get_state_attributes(self, country_code, state_code):
-        country_list = self.reference_info['countries']
-        state_list = get_dict(country_list, 'countryCode', country_code).get('states', [])
-        return get_dict(state_list, 'stateFipsCode', state_code)
+        return self._states.get((country_code, state_code), {})
+
+    def get_state_bounds(self, country_code, state_code):
+        '''
+        :return: CoordinateBounds of the state, converted when the reference file was loaded
+        '''
+        return self._state_bounds.get((country_code, state_code), NO_BOUNDS)
 
 
 class FieldTransitions(ReferenceInfo):
 
+    def _build_index(self):
+        self._transitions = index_dicts(self.reference_info, 'existingField')
+        self._transition_sets = {existing_field: frozenset(transition.get('newFields', []))
+                                 for existing_field, transition in self._transitions.items()}
+
     def get_allowed_transitions(self, existing_field_value):
         '''
         :return list of allowed new values. Return an empty list if the existing_field_value isn't in the reference list.
         :param string existing_field_value:
         '''
-        return get_dict(self.reference_info, 'existingField', existing_field_value).get('newFields', [])
+        return self._transitions.get(existing_field_value, {}).get('newFields', [])
+
+    def get_allowed_transition_set(self, existing_field_value):
+        '''
+        :return frozenset containing the same values as get_allowed_transitions
+        :param string existing_field_value:
+        '''
+        return self._transition_sets.get(existing_field_value, frozenset())
+
+    def get_all_transition_sets(self):
+        '''
+        :return dict of each existing value to the frozenset of the new values it can be changed to
+        '''
+        return self._transition_sets
 
 
 class SiteTypesCrossField(ReferenceInfo):
 
+    def _build_index(self):
+        self._site_types = index_dicts(self.reference_info.get('siteTypeCodes', []), 'siteTypeCode')
+
+    def get_site_type_dependent_fields(self):
+        '''
+        :return: sorted list of str - every field which any site type requires to be null or not null
+        '''
+        fields = set()
+        for site_type in self._site_types.values():
+            fields.update(site_type.get('notNullAttrs', []))
+            fields.update(site_type.get('nullAttrs', []))
+        return sorted(fields)
+
     def get_site_type_field_dependencies(self, site_type_code):
-        site_type_cross_field_refs = self.reference_info['siteTypeCodes']
         try:
-            site_type_field_ref = next((site_type_d for site_type_d in site_type_cross_field_refs if site_type_d['siteTypeCode'] == site_type_code.strip()))
-        except StopIteration:
+            site_type_field_ref = self._site_types[site_type_code.strip()]
+        except KeyError:
             site_type_field_ref = {'siteTypeCode': site_type_code, 'notNullAttrs': [], 'nullAttrs': []}
         return site_type_field_ref
 
 
 class LandNetCrossField(ReferenceInfo):
 
+    def _build_index(self):
+        self._land_net_templates = index_dicts(self.reference_info.get('landNetTemplates', []), 'districtCode')
+
     def get_land_net_templates(self, district_code):
-        land_net_templates = self.reference_info['landNetTemplates']
-        try:
-            land_net_template = get_dict(land_net_templates, 'districtCode', district_code.strip()).get('landNetTemplate', {})
-        except StopIteration:
-            land_net_template = {}
-        return land_net_template
+        return self._land_net_templates.get(district_code.strip(), {}).get('landNetTemplate', {})
 
 
 class SiteNumberFormat(ReferenceInfo):
+
+    def _build_index(self):
+        self._site_number_formats = {}
+        for site_number_format in self.reference_info.get('siteNumberFormatCodes', []):
+            for site_type_code in site_number_format.get('siteTypeCode', []):
+                self._site_number_formats.setdefault(site_type_code, site_number_format['siteNumberFormatCode'])
+
     def get_site_number_template(self, site_type_code):
-        site_number_format_refs = self.reference_info['siteNumberFormatCodes']
+        return self._site_number_formats.get(site_type_code, '')
 
-        try:
-            idx = next(index for (index, d) in enumerate(site_number_format_refs) if site_type_code in d['siteTypeCode'])
-        except StopIteration:
-            site_number_format_ref = ''
-        else:
-            site_number_format_ref = site_number_format_refs[idx]['siteNumberFormatCode']
-        return site_number_format_ref
 
+# The classes used instead of each reference class when a ReferenceRegistry reads references from a ReferenceStore
+STORE_CLASSES = {
+    CountryStateReference: StoreCountryStateReference,
+    HydrologicUnitCodes: StoreHydrologicUnitCodes,
+    Counties: StoreCounties
+}
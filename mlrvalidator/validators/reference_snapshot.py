@@ -0,0 +1,162 @@
+'''
+Compiles the json reference files into a single binary snapshot which can be loaded without parsing json.
+
+The json files remain the source of truth. The snapshot records the size and crc32 checksum of each json file it was
+built from and a file is only read from the snapshot when the json file still matches. Build the snapshot with:
+    python -m mlrvalidator.validators.reference_snapshot [reference_dir]
+
+Snapshot layout:
+    MAGIC | struct HEADER_FORMAT (format version, marshal version, length of header) | marshal(header) | sections
+where header is a dict containing the python version used to write the snapshot and, for each json file name, the
+offset (from the start of the sections) and length of its marshal encoded section along with the size and checksum of
+the json file.
+'''
+import argparse
+import glob
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+SNAPSHOT_FILE_NAME = 'references.snapshot'
+MAGIC = b'MLRREFS\x00'
+FORMAT_VERSION = 1
+HEADER_FORMAT = '<HHI'
+
+_snapshots = {}
+
+
+def checksum(path_to_file):
+    '''
+    :param str path_to_file:
+    :return: int - crc32 of the contents of path_to_file
+    '''
+    with open(path_to_file, 'rb') as fd:
+        return zlib.crc32(fd.read())
+
+
+class ReferenceSnapshot:
+    '''
+    Read only view of a snapshot file. The file is memory mapped and a reference file's section is only decoded when
+    it is requested, so the mapped pages are shared by every process which opens the same snapshot.
+    '''
+
+    def __init__(self, path_to_snapshot):
+        '''
+        :param str path_to_snapshot:
+        :raises ValueError: if the file is not a snapshot which can be read by this version of python
+        '''
+        with open(path_to_snapshot, 'rb') as fd:
+            self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+        prefix_length = len(MAGIC) + struct.calcsize(HEADER_FORMAT)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('{0} is not a reference snapshot'.format(path_to_snapshot))
+        format_version, marshal_version, header_length = struct.unpack(HEADER_FORMAT, self._mmap[len(MAGIC):prefix_length])
+        if format_version != FORMAT_VERSION or marshal_version != marshal.version:
+            raise ValueError('{0} was written with an incompatible snapshot format'.format(path_to_snapshot))
+
+        header = marshal.loads(self._mmap[prefix_length:prefix_length + header_length])
+        self._sections_offset = prefix_length + header_length
+        if header['python'] != list(sys.version_info[:2]):
+            raise ValueError('{0} was written by a different version of python'.format(path_to_snapshot))
+        self.files = header['files']
+
+    def is_current(self, path_to_file):
+        '''
+        :param str path_to_file: path of the json reference file
+        :return: boolean True if the snapshot contains path_to_file and was built from its current contents.
+        '''
+        entry = self.files.get(os.path.basename(path_to_file))
+        try:
+            return entry is not None and \
+                os.path.getsize(path_to_file) == entry['size'] and \
+                checksum(path_to_file) == entry['checksum']
+        except OSError:
+            return False
+
+    def load(self, path_to_file):
+        '''
+        :param str path_to_file: path of the json reference file
+        :return: the decoded contents of path_to_file or None if the snapshot is stale or does not contain the file.
+        '''
+        if not self.is_current(path_to_file):
+            return None
+        entry = self.files[os.path.basename(path_to_file)]
+        start = self._sections_offset + entry['offset']
+        return marshal.loads(memoryview(self._mmap)[start:start + entry['length']])
+
+
+def get_snapshot(reference_dir, reopen=False):
+    '''
+    :param str reference_dir:
+    :param boolean reopen: If True, the snapshot is opened again even if it has already been opened, so that a
+        snapshot which has been rebuilt by another process is used.
+    :return: ReferenceSnapshot for the snapshot in reference_dir or None if there is no readable snapshot. The snapshot
+        is only opened once per process.
+    '''
+    reference_dir = os.path.abspath(reference_dir)
+    if reopen or reference_dir not in _snapshots:
+        try:
+            _snapshots[reference_dir] = ReferenceSnapshot(os.path.join(reference_dir, SNAPSHOT_FILE_NAME))
+        except (OSError, ValueError, EOFError, KeyError, TypeError):
+            _snapshots[reference_dir] = None
+
+    return _snapshots[reference_dir]
+
+
+def build_snapshot(reference_dir, path_to_snapshot=None):
+    '''
+    Compiles every json file in reference_dir into a snapshot.
+    :param str reference_dir:
+    :param str path_to_snapshot: defaults to SNAPSHOT_FILE_NAME in reference_dir
+    :return: str - path of the snapshot that was written
+    '''
+    if path_to_snapshot is None:
+        path_to_snapshot = os.path.join(reference_dir, SNAPSHOT_FILE_NAME)
+
+    files = {}
+    sections = []
+    offset = 0
+    for path_to_file in sorted(glob.glob(os.path.join(reference_dir, '*.json'))):
+        with open(path_to_file, 'rb') as fd:
+            contents = fd.read()
+        section = marshal.dumps(json.loads(contents.decode('utf-8')))
+        files[os.path.basename(path_to_file)] = {
+            'size': len(contents),
+            'checksum': zlib.crc32(contents),
+            'offset': offset,
+            'length': len(section)
+        }
+        sections.append(section)
+        offset += len(section)
+    encoded_header = marshal.dumps({'python': list(sys.version_info[:2]), 'files': files})
+
+    tmp_path = path_to_snapshot + '.tmp'
+    with open(tmp_path, 'wb') as fd:
+        fd.write(MAGIC)
+        fd.write(struct.pack(HEADER_FORMAT, FORMAT_VERSION, marshal.version, len(encoded_header)))
+        fd.write(encoded_header)
+        for section in sections:
+            fd.write(section)
+    os.replace(tmp_path, path_to_snapshot)
+    _snapshots.pop(os.path.abspath(os.path.dirname(path_to_snapshot)), None)
+
+    return path_to_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the json reference files into a binary snapshot')
+    parser.add_argument('reference_dir', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'references'))
+    args = parser.parse_args()
+
+    path_to_snapshot = build_snapshot(args.reference_dir)
+    print('Wrote {0} ({1} bytes)'.format(path_to_snapshot, os.path.getsize(path_to_snapshot)))
+
+
+if __name__ == '__main__':
+    main()
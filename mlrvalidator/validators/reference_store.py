@@ -0,0 +1,382 @@
+'''
+Read only store of the large country and state reference files (counties, minor civil divisions, hydrologic unit codes
+and aquifers) which is shared between processes.
+
+Each worker of a pre-forking server imports the application and builds its own validators, so each has a private copy
+of the dictionaries built from the reference files. Reference counting writes to every object that is used, so even
+dictionaries built before forking are copied into each worker. The store keeps the references in a single memory
+mapped file which is searched in place, so every worker shares the same pages and only the entries which are looked
+up are decoded. Build the store with:
+    python -m mlrvalidator.validators.reference_store [reference_dir]
+
+Store layout:
+    MAGIC | struct HEADER_FORMAT (format version, marshal version, length of header) | marshal(header) | tables
+where header is a dict containing the python version used to write the store and, for each json file name, the size
+and checksum of the json file and the offset and number of entries of its table. A table is an array of
+ENTRY_FORMAT structs sorted by key followed by the keys and the marshal encoded values. A key is the country code,
+state code and code of an entry joined by KEY_SEPARATOR.
+'''
+import argparse
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+
+from .dms import CoordinateBounds
+from .reference_snapshot import checksum
+
+STORE_FILE_NAME = 'references.store'
+MAGIC = b'MLRSTORE'
+FORMAT_VERSION = 1
+HEADER_FORMAT = '<HHI'
+# Offset and length of the key followed by the offset and length of the value, from the start of the table
+ENTRY_FORMAT = '<IIII'
+KEY_SEPARATOR = '\x1f'
+
+# The list in each state which is stored for each reference file and, for lists of objects, the key of each object
+STORE_FILES = {
+    'county.json': ('counties', 'countyCode'),
+    'mcd.json': ('counties', 'countyCode'),
+    'huc.json': ('hydrologicUnitCodes', None),
+    'aquifer.json': ('aquiferCodes', None),
+    'national_aquifer.json': ('nationalAquiferCodes', None)
+}
+
+_stores = {}
+
+
+def _encode_key(parts):
+    return KEY_SEPARATOR.join(parts).encode('utf-8')
+
+
+class ReferenceStore:
+    '''
+    Memory mapped view of a store file
+    '''
+
+    def __init__(self, path_to_store):
+        '''
+        :param str path_to_store:
+        :raises ValueError: if the file is not a store which can be read by this version of python
+        '''
+        with open(path_to_store, 'rb') as fd:
+            self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+        prefix_length = len(MAGIC) + struct.calcsize(HEADER_FORMAT)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('{0} is not a reference store'.format(path_to_store))
+        format_version, marshal_version, header_length = struct.unpack(HEADER_FORMAT, self._mmap[len(MAGIC):prefix_length])
+        if format_version != FORMAT_VERSION or marshal_version != marshal.version:
+            raise ValueError('{0} was written with an incompatible store format'.format(path_to_store))
+
+        header = marshal.loads(self._mmap[prefix_length:prefix_length + header_length])
+        if header['python'] != list(sys.version_info[:2]):
+            raise ValueError('{0} was written by a different version of python'.format(path_to_store))
+        self._tables_offset = prefix_length + header_length
+        self.files = header['files']
+        self._entry_size = struct.calcsize(ENTRY_FORMAT)
+
+    def is_current(self, path_to_file):
+        '''
+        :param str path_to_file: path of the json reference file
+        :return: boolean True if the store contains path_to_file and was built from its current contents.
+        '''
+        entry = self.files.get(os.path.basename(path_to_file))
+        try:
+            return entry is not None and \
+                os.path.getsize(path_to_file) == entry['size'] and \
+                checksum(path_to_file) == entry['checksum']
+        except OSError:
+            return False
+
+    def get_table(self, path_to_file):
+        '''
+        :param str path_to_file: path of the json reference file
+        :return: StoreTable for path_to_file
+        '''
+        entry = self.files[os.path.basename(path_to_file)]
+        return StoreTable(self, self._tables_offset + entry['offset'], entry['count'])
+
+    def _entry(self, table_offset, index):
+        start = table_offset + index * self._entry_size
+        return struct.unpack(ENTRY_FORMAT, self._mmap[start:start + self._entry_size])
+
+    def _key(self, table_offset, index):
+        key_offset, key_length, value_offset, value_length = self._entry(table_offset, index)
+        start = table_offset + key_offset
+        return self._mmap[start:start + key_length]
+
+    def _value(self, table_offset, index):
+        key_offset, key_length, value_offset, value_length = self._entry(table_offset, index)
+        start = table_offset + value_offset
+        return marshal.loads(self._mmap[start:start + value_length])
+
+
+class StoreTable:
+    '''
+    The sorted entries of one reference file in a ReferenceStore
+    '''
+
+    def __init__(self, store, offset, count):
+        self._store = store
+        self._offset = offset
+        self.count = count
+
+    def _bisect(self, key):
+        '''
+        :param bytes key:
+        :return: int - index of the first entry whose key is not less than key
+        '''
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._store._key(self._offset, middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, parts):
+        key = _encode_key(parts)
+        index = self._bisect(key)
+        if index < self.count and self._store._key(self._offset, index) == key:
+            return index
+        return None
+
+    def _prefix_range(self, parts):
+        prefix = _encode_key(parts) + KEY_SEPARATOR.encode('utf-8')
+        # The separator is the largest character below the space, so this bounds every key which starts with prefix
+        return self._bisect(prefix), self._bisect(prefix[:-1] + b'\x20')
+
+    def contains(self, *parts):
+        '''
+        :param parts: country code, state code and code
+        :return: boolean
+        '''
+        return self._find(parts) is not None
+
+    def get(self, *parts, default=None):
+        '''
+        :param parts: country code, state code and code
+        :param default: returned when there is no entry for parts
+        :return: the value of the entry for parts
+        '''
+        index = self._find(parts)
+        return default if index is None else self._store._value(self._offset, index)
+
+    def count_prefix(self, *parts):
+        '''
+        :param parts: country code and state code
+        :return: int - the number of entries for the country and state
+        '''
+        start, end = self._prefix_range(parts)
+        return end - start
+
+    def iter_prefix(self, *parts):
+        '''
+        :param parts: country code and state code
+        :return: iterator of (code, value) for each entry of the country and state, sorted by code
+        '''
+        start, end = self._prefix_range(parts)
+        for index in range(start, end):
+            code = self._store._key(self._offset, index).decode('utf-8').split(KEY_SEPARATOR)[-1]
+            yield code, self._store._value(self._offset, index)
+
+
+class StoreCodeSet:
+    '''
+    Set like view of the codes of one country and state in a StoreTable. Supports the operations used on the frozensets
+    returned by CountryStateReference.get_set_by_country_state.
+    '''
+
+    def __init__(self, table, country_code, state_code):
+        self._table = table
+        self._country_code = country_code
+        self._state_code = state_code
+
+    def __contains__(self, code):
+        return self._table.contains(self._country_code, self._state_code, code)
+
+    def __iter__(self):
+        return (code for code, value in self._table.iter_prefix(self._country_code, self._state_code))
+
+    def __len__(self):
+        return self._table.count_prefix(self._country_code, self._state_code)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def longest_prefix(self, code):
+        '''
+        Same as HydrologicUnitCodeIndex.longest_prefix
+        :param str code:
+        :return: str - the longest proper prefix of code, at a level boundary, which is in the set. Empty if there is none.
+        '''
+        for width in range(len(code) - 2, 0, -2):
+            if code[:width] in self:
+                return code[:width]
+        return ''
+
+
+class StoreCountryStateReference:
+    '''
+    Has the same lookup methods as CountryStateReference but reads them from a ReferenceStore
+    '''
+
+    def __init__(self, store, path_to_file, ref_list_key):
+        '''
+        :param ReferenceStore store:
+        :param str path_to_file: path of the json reference file
+        :param str ref_list_key: Key of the list to return when searching by country and state.
+        '''
+        self.ref_list_key = ref_list_key
+        self._table = store.get_table(path_to_file)
+
+    def is_empty(self):
+        return self._table.count == 0
+
+    def get_list_by_country_state(self, country_code, state_code):
+        return [value if value is not None else code
+                for code, value in self._table.iter_prefix(country_code, state_code)]
+
+    def get_set_by_country_state(self, country_code, state_code):
+        return StoreCodeSet(self._table, country_code, state_code)
+
+    def get_longest_valid_prefix(self, country_code, state_code, value):
+        return ''
+
+
+class StoreHydrologicUnitCodes(StoreCountryStateReference):
+
+    def __init__(self, store, path_to_file, ref_list_key='hydrologicUnitCodes'):
+        super().__init__(store, path_to_file, ref_list_key)
+
+    def get_longest_valid_prefix(self, country_code, state_code, value):
+        return self.get_set_by_country_state(country_code, state_code).longest_prefix(value)
+
+
+class StoreCounties(StoreCountryStateReference):
+
+    def __init__(self, store, path_to_file):
+        super().__init__(store, path_to_file, 'counties')
+
+    def get_county_codes(self, country_code, state_code):
+        return list(self.get_set_by_country_state(country_code, state_code))
+
+    def get_county_code_set(self, country_code, state_code):
+        return self.get_set_by_country_state(country_code, state_code)
+
+    def get_county_attributes(self, country_code, state_code, county_code):
+        return self._table.get(country_code, state_code, county_code, default={})
+
+    def get_county_bounds(self, country_code, state_code, county_code):
+        '''
+        :return: CoordinateBounds of the county. Unlike Counties, these are converted when they are looked up so that
+            nothing is kept per county in each process.
+        '''
+        return CoordinateBounds.from_attributes(self.get_county_attributes(country_code, state_code, county_code),
+                                                'county')
+
+
+def get_store(reference_dir, reopen=False):
+    '''
+    :param str reference_dir:
+    :param boolean reopen: If True, the store is opened again even if it has already been opened.
+    :return: ReferenceStore for the store in reference_dir or None if there is no readable store. The store is only
+        opened once per process.
+    '''
+    reference_dir = os.path.abspath(reference_dir)
+    if reopen or reference_dir not in _stores:
+        try:
+            _stores[reference_dir] = ReferenceStore(os.path.join(reference_dir, STORE_FILE_NAME))
+        except (OSError, ValueError, EOFError, KeyError, TypeError):
+            _stores[reference_dir] = None
+
+    return _stores[reference_dir]
+
+
+def _build_table(reference_info, list_key, item_key):
+    '''
+    :return: tuple of the number of entries and the bytes of the table of the entries of reference_info
+    '''
+    entries = {}
+    for country in reference_info.get('countries', []):
+        for state in country.get('states', []):
+            for item in state.get(list_key, []):
+                if item_key is None:
+                    entries[_encode_key([country['countryCode'], state['stateFipsCode'], item])] = None
+                else:
+                    entries[_encode_key([country['countryCode'], state['stateFipsCode'], item[item_key]])] = item
+
+    entry_size = struct.calcsize(ENTRY_FORMAT)
+    data = []
+    data_offset = len(entries) * entry_size
+    index = []
+    for key in sorted(entries):
+        value = marshal.dumps(entries[key])
+        index.append(struct.pack(ENTRY_FORMAT, data_offset, len(key), data_offset + len(key), len(value)))
+        data.append(key)
+        data.append(value)
+        data_offset += len(key) + len(value)
+
+    return len(entries), b''.join(index + data)
+
+
+def build_store(reference_dir, path_to_store=None):
+    '''
+    Writes the files in STORE_FILES which are in reference_dir to a store.
+    :param str reference_dir:
+    :param str path_to_store: defaults to STORE_FILE_NAME in reference_dir
+    :return: str - path of the store that was written
+    '''
+    if path_to_store is None:
+        path_to_store = os.path.join(reference_dir, STORE_FILE_NAME)
+
+    files = {}
+    tables = []
+    offset = 0
+    for file_name, (list_key, item_key) in sorted(STORE_FILES.items()):
+        path_to_file = os.path.join(reference_dir, file_name)
+        if not os.path.exists(path_to_file):
+            continue
+        with open(path_to_file, 'rb') as fd:
+            contents = fd.read()
+        count, table = _build_table(json.loads(contents.decode('utf-8')), list_key, item_key)
+        files[file_name] = {
+            'size': len(contents),
+            'checksum': checksum(path_to_file),
+            'offset': offset,
+            'count': count
+        }
+        tables.append(table)
+        offset += len(table)
+    encoded_header = marshal.dumps({'python': list(sys.version_info[:2]), 'files': files})
+
+    tmp_path = path_to_store + '.tmp'
+    with open(tmp_path, 'wb') as fd:
+        fd.write(MAGIC)
+        fd.write(struct.pack(HEADER_FORMAT, FORMAT_VERSION, marshal.version, len(encoded_header)))
+        fd.write(encoded_header)
+        for table in tables:
+            fd.write(table)
+    os.replace(tmp_path, path_to_store)
+    _stores.pop(os.path.abspath(os.path.dirname(path_to_store)), None)
+
+    return path_to_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write the large reference files to a store shared between processes')
+    parser.add_argument('reference_dir', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'references'))
+    args = parser.parse_args()
+
+    path_to_store = build_store(args.reference_dir)
+    print('Wrote {0} ({1} bytes)'.format(path_to_store, os.path.getsize(path_to_store)))
+
+
+if __name__ == '__main__':
+    main()
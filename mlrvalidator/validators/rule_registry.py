@@ -0,0 +1,111 @@
+'''
+Registry of the cross field rules of a validator and the fields that each rule reads. Rules are only run when at least
+one of their fields is in the document being validated, so an update which changes a few fields only runs the rules
+which use those fields.
+'''
+from collections import defaultdict
+import threading
+
+
+class CrossFieldRule:
+
+    def __init__(self, method_name, fields, *args, name=None):
+        '''
+        :param str method_name: name of the validator method which runs the rule. It is called with the
+            ValidationContext, the errors dictionary and args. The method is looked up on the validator each time the
+            rule is run, so instrumented methods are used.
+        :param iterable of str fields: the fields of the document which the rule uses
+        :param args: any additional arguments for the method
+        :param str name: used in the coverage statistics. Defaults to method_name without the _validate_ prefix.
+        '''
+        self.method_name = method_name
+        self.fields = frozenset(fields)
+        self.args = args
+        self.name = name or method_name[len('_validate_'):]
+
+
+class RuleRegistry:
+
+    # Locations tend to contain the same sets of fields, so the rules triggered by up to this many sets are cached
+    MAX_CACHED_FIELD_SETS = 1024
+
+    def __init__(self, rules):
+        '''
+        :param list of CrossFieldRule rules: in the order in which they should be run
+        '''
+        self.rules = list(rules)
+        self._rule_indexes_by_field = defaultdict(list)
+        for index, rule in enumerate(self.rules):
+            for field in rule.fields:
+                self._rule_indexes_by_field[field].append(index)
+
+        self._triggered_indexes = {}
+        # Number of validations which triggered each tuple of rule indexes
+        self._trigger_counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get_rules_for_field(self, field):
+        '''
+        :param str field:
+        :return: list of CrossFieldRule which use field
+        '''
+        return [self.rules[index] for index in self._rule_indexes_by_field.get(field, [])]
+
+    def _get_triggered_indexes(self, document_keys):
+        try:
+            return self._triggered_indexes[document_keys]
+        except KeyError:
+            indexes = set()
+            for key in document_keys:
+                indexes.update(self._rule_indexes_by_field.get(key, ()))
+            indexes = tuple(sorted(indexes))
+            if len(self._triggered_indexes) >= self.MAX_CACHED_FIELD_SETS:
+                self._triggered_indexes.clear()
+            self._triggered_indexes[document_keys] = indexes
+            return indexes
+
+    def get_triggered_rules(self, document_keys):
+        '''
+        :param frozenset of str document_keys: the fields in the document being validated
+        :return: list of CrossFieldRule which use any of document_keys, in the order in which they were registered
+        '''
+        indexes = self._get_triggered_indexes(document_keys)
+        with self._lock:
+            self._trigger_counts[indexes] += 1
+
+        return [self.rules[index] for index in indexes]
+
+    def run(self, validator, context, errors):
+        '''
+        Runs the rules triggered by the fields in context.document
+        :param validator: the validator which defines the rule methods
+        :param ValidationContext context:
+        :param dict errors:
+        '''
+        for rule in self.get_triggered_rules(context.document_keys):
+            getattr(validator, rule.method_name)(context, errors, *rule.args)
+
+    def coverage(self):
+        '''
+        :return: dict - the number of validations and, for each rule, its fields and the number of validations which
+            ran or skipped the rule.
+        '''
+        with self._lock:
+            trigger_counts = list(self._trigger_counts.items())
+
+        validations = 0
+        triggered_counts = [0] * len(self.rules)
+        for indexes, count in trigger_counts:
+            validations += count
+            for index in indexes:
+                triggered_counts[index] += count
+
+        return {
+            'validations': validations,
+            'rules': [{
+                'name': rule.name,
+                'fields': sorted(rule.fields),
+                'triggered': triggered,
+                'skipped': validations - triggered
+            } for rule, triggered in zip(self.rules, triggered_counts)]
+        }
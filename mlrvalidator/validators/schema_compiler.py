@@ -0,0 +1,198 @@
+'''
+Compiles the schema of a SingleFieldValidator into a list of check functions for each field so that documents can be
+validated without going through Cerberus's rule dispatch, document copying and normalization.
+
+The checks produce exactly the errors that Cerberus produces for the same document, in the same order. The custom
+rules are run by calling the rule methods of SingleFieldValidator itself, and the Cerberus rules used by the schemas
+(maxlength, regex, allowed and type) are reimplemented with the same error messages. Documents which the compiled
+checks do not handle, for instance those containing values which are not strings, are left to Cerberus.
+'''
+from collections.abc import Mapping
+import re
+import time
+
+
+class SchemaCompileError(ValueError):
+    '''
+    Raised when a schema uses a rule or option which can not be compiled.
+    '''
+    pass
+
+
+class _RuleErrors:
+    '''
+    Stands in for the SingleFieldValidator when its custom rule methods are called by the compiled checks. Errors
+    are appended to messages as (field, rule, message) tuples, where rule is None for the errors of custom rules.
+    '''
+
+    def __init__(self, rule_attributes, messages):
+        self.__dict__.update(rule_attributes)
+        self.messages = messages
+
+    def _error(self, field, message):
+        self.messages.append((field, None, message))
+
+
+def _maxlength_check(field, max_length):
+    message = 'max length is {0}'.format(max_length)
+
+    def check(rule_errors, value):
+        if len(value) > max_length:
+            rule_errors.messages.append((field, 'maxlength', message))
+    return check
+
+
+def _regex_check(field, pattern):
+    message = "value does not match regex '{0}'".format(pattern)
+    re_obj = re.compile(pattern if pattern.endswith('$') else pattern + '$')
+
+    def check(rule_errors, value):
+        if not re_obj.match(value):
+            rule_errors.messages.append((field, 'regex', message))
+    return check
+
+
+def _allowed_check(field, allowed_values):
+    def check(rule_errors, value):
+        if value not in allowed_values:
+            rule_errors.messages.append((field, 'allowed', 'unallowed value {0}'.format(value)))
+    return check
+
+
+def _type_check(validator_class, field, data_type):
+    '''
+    The check returns True when the type is invalid so that the remaining rules for the field are skipped, as they
+    are by Cerberus.
+    '''
+    types = [data_type] if isinstance(data_type, str) else data_type
+    type_functions = [getattr(validator_class, '_validate_type_' + type_name) for type_name in types]
+    message = 'must be of {0} type'.format(data_type)
+
+    def check(rule_errors, value):
+        if any(type_function(rule_errors, value) for type_function in type_functions):
+            return False
+        rule_errors.messages.append((field, 'type', message))
+        return True
+    return check
+
+
+def _custom_rule_check(rule_function, field, constraint):
+    def check(rule_errors, value):
+        rule_function(rule_errors, constraint, field, value)
+    return check
+
+
+def _timed_check(metrics, validator_name, rule, check):
+    def timed(rule_errors, value):
+        error_count = len(rule_errors.messages)
+        start = time.perf_counter()
+        result = check(rule_errors, value)
+        metrics.observe_rule(validator_name, rule, time.perf_counter() - start, len(rule_errors.messages) > error_count)
+        return result
+    return timed
+
+
+def _error_sort_key(error):
+    field, rule, message = error
+    return field, rule is not None, rule or ''
+
+
+class CompiledSchema:
+
+    # Cerberus rules which are implemented by the compiled checks. Custom rules are found on the validator class.
+    BUILTIN_CHECKS = {
+        'maxlength': _maxlength_check,
+        'regex': _regex_check,
+        'allowed': _allowed_check
+    }
+
+    def __init__(self, validator, metrics=None):
+        '''
+        :param SingleFieldValidator validator: The schema and the reference lists are taken from this validator.
+        :param ValidationMetrics metrics: If specified, the checks of custom rules and types are timed.
+        :raises SchemaCompileError: if the schema can not be compiled
+        '''
+        if validator.allow_unknown is not True or validator.ignore_none_values:
+            raise SchemaCompileError('Only validators which allow unknown fields and do not ignore None can be compiled')
+
+        validator_class = type(validator)
+        validator_name = validator_class.__name__
+        self._rule_attributes = {name: getattr(validator, name)
+                                 for name in ['reference_list', 'site_type_invalid_code_list'] if hasattr(validator, name)}
+
+        self._checks = {}
+        for field, definitions in validator.schema.items():
+            if not isinstance(definitions, Mapping):
+                raise SchemaCompileError('The rules for {0} must be a mapping'.format(field))
+            if set(definitions) & set(validator.normalization_rules):
+                raise SchemaCompileError('The rules for {0} normalize the document'.format(field))
+            checks = []
+            # The rules are put in the order in which Cerberus runs them
+            prior_rules = tuple(rule for rule in validator.priority_validations
+                                if rule in definitions or rule in validator.mandatory_validations)
+            rules = set(definitions)
+            rules |= set(validator.mandatory_validations)
+            rules -= set(prior_rules + ('allow_unknown', 'required'))
+            rules -= set(validator.normalization_rules)
+            for rule in prior_rules + tuple(rules):
+                # As with ValidationMetrics.instrument_single_field_validator, only custom rules and types are timed
+                check_name = None
+                if rule == 'nullable':
+                    # Only applies to None values, which are validated by Cerberus
+                    continue
+                elif rule == 'type':
+                    check = _type_check(validator_class, field, definitions[rule])
+                    check_name = 'type_{0}'.format(definitions[rule])
+                elif rule in self.BUILTIN_CHECKS:
+                    check = self.BUILTIN_CHECKS[rule](field, definitions[rule])
+                else:
+                    rule_function = getattr(validator_class, '_validate_' + rule.replace(' ', '_'), None)
+                    if rule_function is None:
+                        # Cerberus ignores rules which have no handler
+                        continue
+                    if rule_function.__module__.startswith('cerberus'):
+                        raise SchemaCompileError('Rule {0} can not be compiled'.format(rule))
+                    check = _custom_rule_check(rule_function, field, definitions[rule])
+                    check_name = rule
+
+                if metrics is not None and check_name is not None:
+                    check = _timed_check(metrics, validator_name, check_name, check)
+                checks.append(check)
+            self._checks[field] = checks
+
+        self._required = set(field for field, definitions in validator.schema.items()
+                             if definitions.get('required') is True)
+
+    def validate(self, document, update=False):
+        '''
+        :param dict document:
+        :param boolean update: If True, required fields are not checked.
+        :return: dict of lists of error messages keyed by field, the same as SingleFieldValidator.errors, or None if
+            the document must be validated by Cerberus instead.
+        '''
+        if not isinstance(document, dict):
+            return None
+
+        messages = []
+        rule_errors = _RuleErrors(self._rule_attributes, messages)
+        for field, value in document.items():
+            checks = self._checks.get(field)
+            if checks is None:
+                continue
+            if not isinstance(value, str):
+                return None
+            for check in checks:
+                if check(rule_errors, value):
+                    break
+
+        if not update:
+            for field in self._required - set(document):
+                messages.append((field, 'required', 'required field'))
+
+        # Cerberus sorts its errors by field and then puts the errors of custom rules, in the order in which they were
+        # found, before the errors of its own rules, which are sorted by rule name.
+        messages.sort(key=_error_sort_key)
+        errors = {}
+        for field, rule, message in messages:
+            errors.setdefault(field, []).append(message)
+        return errors
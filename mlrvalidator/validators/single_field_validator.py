@@ -2,24 +2,66 @@
 import datetime
 import os
 import re
+import threading
 
 from cerberus import Validator
 
-from .reference import SiteTypeInvalidCodes, ReferenceInfo
+from .dms import parse_latitude, parse_longitude
+from .reference import SiteTypeInvalidCodes, ReferenceLists, ReferenceRegistry
+from .schema_compiler import CompiledSchema, SchemaCompileError
 
 
 class SingleFieldValidator(Validator):
 
     def __init__(self, *args, **kwargs):
         ''''
-        Added keyword argument reference_list which should be an instance of reference.ReferenceInfo
+        Added keyword argument reference_list which should be an instance of reference.ReferenceLists
+        Added keyword argument reference_registry which should be an instance of reference.ReferenceRegistry. If not
+        specified a new registry is used.
+        Added keyword argument metrics which should be an instance of metrics.ValidationMetrics. If specified, the
+        custom rules are timed.
         '''
         self.reference_dir = kwargs.get('reference_dir', {})
+        if kwargs.get('reference_registry') is None:
+            kwargs['reference_registry'] = ReferenceRegistry()
+        self.reference_registry = kwargs['reference_registry']
         super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self.metrics = kwargs.get('metrics')
+        if self.metrics is not None:
+            self.metrics.instrument_single_field_validator(self)
 
         if self.reference_dir:
-            self.reference_list = ReferenceInfo(os.path.join(self.reference_dir, 'reference_lists.json'))
-            self.site_type_invalid_code_list = SiteTypeInvalidCodes(os.path.join(self.reference_dir, 'site_type_invalid.json'))
+            self.reference_list = self.reference_registry.get(
+                ReferenceLists, os.path.join(self.reference_dir, 'reference_lists.json'))
+            self.site_type_invalid_code_list = self.reference_registry.get(
+                SiteTypeInvalidCodes, os.path.join(self.reference_dir, 'site_type_invalid.json'))
+
+        try:
+            self.compiled_schema = CompiledSchema(self, metrics=self.metrics)
+        except SchemaCompileError:
+            self.compiled_schema = None
+
+    def validate_context(self, context):
+        '''
+        Locations are validated with the compiled schema when possible. Otherwise Cerberus is used. Cerberus validators
+        keep the document being validated and its errors on the instance, so each thread validates with its own copy
+        of this validator. The copies share the schema and the reference lists.
+        :param ValidationContext context:
+        :return: dict of errors found. Empty if the location is valid.
+        '''
+        if self.compiled_schema is not None:
+            errors = self.compiled_schema.validate(context.document, update=context.update)
+            if errors is not None:
+                return errors
+
+        validator = getattr(self._local, 'validator', None)
+        if validator is None:
+            validator = self.__class__(**self._config)
+            self._local.validator = validator
+
+        validator.validate(context.document, update=context.update)
+        return validator.errors
 
     def _validate_type_numeric(self, value):
         # check for numeric value
@@ -136,43 +178,8 @@ class SingleFieldValidator(Validator):
         The rule's arguments are validated against this schema:
         {'type': 'boolean'}
         """
-        error_message = "Invalid Degree/Minute/Second Value"
-        rstripped_value = value.rstrip()
-
-        def check_100th_seconds(val):
-            try:
-                if val[7] in ["."]:
-                    test_split = val.split(".")
-                    # There is a decimal, but have to check if anything was split from it
-                    if test_split[1] == "":
-                        return False
-                    else:
-                        # Check that only digits 0-9 exist after the decimal
-                        test_field = re.search('[^0-9]+', test_split[1])
-                        if test_field is None:
-                            # There are only digits 0-9 after the decimal
-                            return True
-                        else:
-                            # There is something besides digits 0-9 after the decimal
-                            return False
-                else:
-                    return False
-            except IndexError:
-                return True
-
-        if valid_latitude_dms and rstripped_value:
-            first_val = rstripped_value[0]
-            check_degrees = rstripped_value[1:3]
-            check_minutes = rstripped_value[3:5]
-            check_seconds = rstripped_value[5:7]
-
-            try:
-                if not ((first_val in "- ") and (0 <= int(check_degrees) <= 90) and (
-                        0 <= int(check_minutes) < 60) and (0 <= int(check_seconds) < 60)
-                        and check_100th_seconds(rstripped_value)):
-                    self._error(field, error_message)
-            except ValueError:
-                self._error(field, error_message)
+        if valid_latitude_dms and value.rstrip() and parse_latitude(value) is None:
+            self._error(field, "Invalid Degree/Minute/Second Value")
 
     def _validate_valid_longitude_dms(self, valid_longitude_dms, field, value):
         # Check that field consists of valid degrees, minutes and second values
@@ -181,42 +188,8 @@ class SingleFieldValidator(Validator):
         The rule's arguments are validated against this schema:
         {'type': 'boolean'}
         """
-        error_message = "Invalid Degree/Minute/Second Value"
-        rstripped_value = value.rstrip()
-
-        def check_100th_seconds(val):
-            try:
-                if val[8] in ["."]:
-                    test_split = val.split(".")
-                    # There is a decimal, but have to check if anything was split from it
-                    if test_split[1] == "":
-                        return False
-                    else:
-                        # Check that only digits 0-9 exist after the decimal
-                        test_field = re.search('[^0-9]+', test_split[1])
-                        if test_field is None:
-                            # There are only digits 0-9 after the decimal
-                            return True
-                        else:
-                            # There is something besides digits 0-9 after the decimal
-                            return False
-                else:
-                    return False
-            except IndexError:
-                return True
-
-        if valid_longitude_dms and rstripped_value:
-            first_val = rstripped_value[0]
-            check_degrees = rstripped_value[1:4]
-            check_minutes = rstripped_value[4:6]
-            check_seconds = rstripped_value[6:8]
-            try:
-                if not ((first_val in "- ") and (0 <= int(check_degrees) <= 180) and (
-                        0 <= int(check_minutes) < 60) and (0 <= int(check_seconds) < 60)
-                        and check_100th_seconds(rstripped_value)):
-                    self._error(field, error_message)
-            except ValueError:
-                self._error(field, error_message)
+        if valid_longitude_dms and value.rstrip() and parse_longitude(value) is None:
+            self._error(field, "Invalid Degree/Minute/Second Value")
 
     def _validate_valid_date(self, valid_date, field, value):
         # Check that field is a formatted date of YYYY, YYYYMM or YYYYMMDD
@@ -271,7 +244,7 @@ class SingleFieldValidator(Validator):
         """
         if valid_reference and self.reference_list:
             stripped_value = value.strip()
-            ref_list = self.reference_list.get_reference_info().get(field, [])
+            ref_list = self.reference_list.get_reference_set(field)
             if stripped_value and stripped_value not in ref_list:
                 self._error(field, ' \'{0}\' is not in reference list'.format(value))
 
@@ -1,23 +1,55 @@
 
+from threading import Barrier, Thread
 from unittest import TestCase
 
 from ..base_cross_field_validator import BaseCrossFieldValidator
+from ..validation_context import ValidationContext
 
-class TestAnyFieldsInDocument(TestCase):
+
+class FieldNameValidator(BaseCrossFieldValidator):
+
+    def __init__(self):
+        super().__init__()
+        self.barrier = None
+
+    def _validate(self, context, errors):
+        if self.barrier is not None:
+            self.barrier.wait()
+        for key in context.document:
+            errors[key] = ['Error for {0}'.format(key)]
+
+
+class BaseCrossFieldValidatorTestCase(TestCase):
 
     def setUp(self):
-        self.validator = BaseCrossFieldValidator()
+        self.validator = FieldNameValidator()
+
+    def test_validate_context(self):
+        errors = self.validator.validate_context(ValidationContext({'field1': 'a'}, {'field2': 'b'}))
+        self.assertEqual(errors, {'field1': ['Error for field1']})
+
+    def test_validate_sets_errors(self):
+        self.assertEqual(self.validator.errors, {})
+
+        self.assertFalse(self.validator.validate({'field1': 'a'}, {}))
+        self.assertEqual(self.validator.errors, {'field1': ['Error for field1']})
+
+        self.assertTrue(self.validator.validate({}, {'field1': 'a'}))
+        self.assertEqual(self.validator.errors, {})
 
-    def test_any_fields(self):
-        self.validator.validate({'field1': 'a', 'field2': 'b', 'field3': 'c'}, {})
-        self.assertTrue(self.validator._any_fields_in_document(['field1', 'field3']))
+    def test_errors_are_kept_per_thread(self):
+        self.validator.barrier = Barrier(2)
+        thread_errors = {}
 
-        self.validator.validate({'field1': 'a'}, {})
-        self.assertTrue(self.validator._any_fields_in_document(['field1', 'field3']))
+        def validate(key):
+            self.validator.validate({key: 'a'}, {})
+            thread_errors[key] = self.validator.errors
 
-        self.validator.validate({'field2': 'a', 'field3': 'c'}, {})
-        self.assertTrue(self.validator._any_fields_in_document(['field1', 'field3']))
+        threads = [Thread(target=validate, args=(key,)) for key in ['field1', 'field2']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
 
-    def test_all_fields_missing_in_document(self):
-        self.validator.validate({'field2': 'b'}, {'field1': 'a', 'field3': 'b'})
-        self.assertFalse(self.validator._any_fields_in_document(['field1', 'field3']))
+        self.assertEqual(thread_errors, {'field1': {'field1': ['Error for field1']},
+                                         'field2': {'field2': ['Error for field2']}})
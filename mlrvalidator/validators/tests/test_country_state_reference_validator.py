@@ -3,6 +3,7 @@ import json
 from unittest import TestCase, mock
 
 from ..country_state_reference_validator import CountryStateReferenceValidator
+from ..reference import HydrologicUnitCodes
 
 class CountryStateReferenceValidatorTestCase(TestCase):
 
@@ -66,3 +67,40 @@ class CountryStateReferenceValidatorTestCase(TestCase):
         self.assertFalse(self.validator.validate({'countryCode': 'US', 'stateFipsCode': '01', 'aquiferCode': 'A'}, {'aquiferCode': '110QRNR'}))
         self.assertIn('aquiferCode', self.validator.errors)
 
+
+class HydrologicUnitCodeReferenceValidatorTestCase(TestCase):
+
+    def setUp(self):
+        ref_list = {
+            "countries": [
+                {
+                    "countryCode": "US",
+                    "states": [
+                        {
+                            "stateFipsCode": "55",
+                            "hydrologicUnitCodes": [
+                                "07",
+                                "0701",
+                                "070102"
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+        with mock.patch('mlrvalidator.validators.reference.open', mock.mock_open(read_data=json.dumps(ref_list)), create=True):
+            self.validator = CountryStateReferenceValidator('fake_file', 'hydrologicUnitCodes', 'hydrologicUnitCode',
+                                                            reference_class=HydrologicUnitCodes)
+
+    def test_valid_value_in_list(self):
+        self.assertTrue(self.validator.validate({'countryCode': 'US', 'stateFipsCode': '55', 'hydrologicUnitCode': '0701'}, {}))
+
+    def test_error_includes_longest_valid_prefix(self):
+        self.assertFalse(self.validator.validate({'countryCode': 'US', 'stateFipsCode': '55', 'hydrologicUnitCode': '07010300'}, {}))
+        self.assertEqual(self.validator.errors['hydrologicUnitCode'],
+                         ['07010300 is not in the reference list for country US, state 55. The longest valid prefix is 0701 (4 digits)'])
+
+    def test_error_without_valid_prefix(self):
+        self.assertFalse(self.validator.validate({'countryCode': 'US', 'stateFipsCode': '55', 'hydrologicUnitCode': '0801'}, {}))
+        self.assertEqual(self.validator.errors['hydrologicUnitCode'],
+                         ['0801 is not in the reference list for country US, state 55'])
@@ -0,0 +1,79 @@
+import json
+from unittest import TestCase, mock
+
+from ..county_index import CountyBoundingBoxes, CountyGridIndex
+
+
+class CountyGridIndexTestCase(TestCase):
+
+    def test_get_candidates(self):
+        degree = 360000
+        index = CountyGridIndex([
+            (0, 2 * degree, 0, 2 * degree, 'a'),
+            (degree, 3 * degree, degree, 3 * degree, 'b'),
+            (-2 * degree, -degree, -2 * degree, -degree, 'c')
+        ])
+
+        self.assertEqual(index.get_candidates(degree // 2, degree // 2), ['a'])
+        self.assertEqual(index.get_candidates(3 * degree // 2, 3 * degree // 2), ['a', 'b'])
+        self.assertEqual(index.get_candidates(2 * degree, 2 * degree), ['a', 'b'])
+        self.assertEqual(index.get_candidates(-degree - 1, -degree - 1), ['c'])
+        self.assertEqual(index.get_candidates(4 * degree, 4 * degree), [])
+
+
+class CountyBoundingBoxesTestCase(TestCase):
+
+    def setUp(self):
+        counties = {'countries': [
+            {'countryCode': 'US', 'states': [
+                {'stateFipsCode': '55', 'counties': [
+                    {'countyCode': '000', 'county_min_lat_va': '423000', 'county_max_lat_va': '470000',
+                     'county_min_long_va': '0864900', 'county_max_long_va': '0925400'},
+                    {'countyCode': '025', 'county_min_lat_va': '425500', 'county_max_lat_va': '432900',
+                     'county_min_long_va': '0890000', 'county_max_long_va': '0895000'},
+                    {'countyCode': '021', 'county_min_lat_va': '431900', 'county_max_lat_va': '434000',
+                     'county_min_long_va': '0890000', 'county_max_long_va': '0895900'},
+                    {'countyCode': '049', 'county_min_lat_va': '432800', 'county_max_lat_va': '425000',
+                     'county_min_long_va': '0895900', 'county_max_long_va': '0893000'},
+                    {'countyCode': '099', 'county_min_lat_va': '', 'county_max_lat_va': '',
+                     'county_min_long_va': '', 'county_max_long_va': ''}
+                ]},
+                {'stateFipsCode': '02', 'counties': [
+                    {'countyCode': '016', 'county_min_lat_va': '511030', 'county_max_lat_va': '571819',
+                     'county_min_long_va': '1660213', 'county_max_long_va': '-1722655'}
+                ]}
+            ]}
+        ]}
+        with mock.patch('mlrvalidator.validators.reference.open', mock.mock_open(read_data=json.dumps(counties))):
+            self.boxes = CountyBoundingBoxes('county.json')
+
+    def test_candidates(self):
+        self.assertEqual(self.boxes.get_candidate_counties(' 430400', ' 0892400'), [
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025'}
+        ])
+        # 049 has its latitudes swapped
+        self.assertEqual(self.boxes.get_candidate_counties(' 431000', ' 0894000'), [
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025'},
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '049'}
+        ])
+        self.assertEqual(self.boxes.get_candidate_counties(' 433000', ' 0892400'), [
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '021'}
+        ])
+        self.assertEqual(self.boxes.get_candidate_counties(' 450000', ' 0900000'), [])
+
+    def test_box_crossing_180th_meridian(self):
+        aleutians = [{'countryCode': 'US', 'stateFipsCode': '02', 'countyCode': '016'}]
+        self.assertEqual(self.boxes.get_candidate_counties(' 520000', ' 1750000'), aleutians)
+        self.assertEqual(self.boxes.get_candidate_counties(' 520000', '-1750000'), aleutians)
+        self.assertEqual(self.boxes.get_candidate_counties(' 520000', '-1700000'), [])
+
+    def test_invalid_coordinates(self):
+        self.assertIsNone(self.boxes.get_candidate_counties('', ' 0892400'))
+        self.assertIsNone(self.boxes.get_candidate_counties(' 430400', 'west'))
+        # Coordinates rejected by the single field rules, which parse_dms would read as 43 04' 00" and 89 24' 00"
+        self.assertIsNone(self.boxes.get_candidate_counties(' 0430400', ' 0892400'))
+        self.assertIsNone(self.boxes.get_candidate_counties(' 430400', ' 892400'))
+        self.assertIsNone(self.boxes.get_candidate_counties('430400', '0892400'))
+
+    def test_is_empty(self):
+        self.assertFalse(self.boxes.is_empty())
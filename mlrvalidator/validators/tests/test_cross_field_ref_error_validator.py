@@ -16,12 +16,12 @@ class CrossFieldRefValidatorAllValidatorsTestCase(TestCase):
     @mock.patch('mlrvalidator.validators.cross_field_ref_error_validator.SiteNumberFormat')
     def setUp(self, mcounties_ref, msite_type_ref, mstates_ref, mwater_use_ref, mland_net_ref, msite_number_ref, mref_validator_class):
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = False
-        mref_validator.errors = {'field1' : ['Error message']}
+        mref_validator.validate_context.return_value = {'field1' : ['Error message']}
+        mref_validator.fields = ['countryCode', 'stateFipsCode', 'field1']
         self.validator = CrossFieldRefErrorValidator('ref_dir')
 
     def test_multiple_error(self):
-        self.assertFalse(self.validator.validate({'dummyfield': 'A'}, {}))
+        self.assertFalse(self.validator.validate({'field1': 'A'}, {}))
         self.assertEqual(len(self.validator.errors), 1)
 
 
@@ -98,8 +98,7 @@ class CrossFieldRefValidatorForCountiesTestCase(TestCase):
         }
 
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -175,8 +174,7 @@ class CrossFieldRefValidatorForMCDsTestCase(TestCase):
         }
 
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -295,8 +293,7 @@ class CrossFieldRefValidatorForCountiesTestCase(TestCase):
         }
 
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -376,8 +373,7 @@ class CrossFieldRefValidatorForStatesTestCase(TestCase):
             ]
         }
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -468,8 +464,7 @@ class CrossFieldRefValidatorForNationalWaterUseTestCase(TestCase):
             ]
         }
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -518,8 +513,7 @@ class CrossFieldValidatorSiteTypeFieldTestCase(TestCase):
             ]
         }
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -561,8 +555,7 @@ class CrossFieldValidatorLandNetTestCase(TestCase):
                     ]
                 }
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -4,6 +4,7 @@ import unittest
 from unittest import TestCase, mock
 
 from ..cross_field_ref_warning_validator import CrossFieldRefWarningValidator
+from ..validation_context import ValidationContext
 
 
 class CrossFieldRefWarningCountyLatitudeTestCase(TestCase):
@@ -173,6 +174,62 @@ class CrossFieldRefWarningCountyLongitudeTestCase(TestCase):
 
 
 
+class CrossFieldRefWarningCandidateCountiesTestCase(TestCase):
+    @mock.patch('mlrvalidator.validators.cross_field_ref_warning_validator.States')
+    def setUp(self, mstates_ref):
+        ref_list = {
+            "countries": [
+                {
+                    "countryCode": "US",
+                    "states": [
+                        {
+                            "stateFipsCode": "55",
+                            "counties": [
+                                {
+                                    "countyCode": "001",
+                                    "county_min_lat_va": "420000",
+                                    "county_max_lat_va": "440000",
+                                    "county_min_long_va": "0880000",
+                                    "county_max_long_va": "0900000"
+                                }, {
+                                    "countyCode": "002",
+                                    "county_min_lat_va": "430000",
+                                    "county_max_lat_va": "440000",
+                                    "county_min_long_va": "0890000",
+                                    "county_max_long_va": "0900000"
+                                }
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+
+        with mock.patch('mlrvalidator.validators.reference.open',
+                        mock.mock_open(read_data=json.dumps(ref_list))):
+            self.validator = CrossFieldRefWarningValidator('ref_dir')
+
+    def test_candidate_counties(self):
+        self.assertFalse(self.validator.validate({'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '002',
+                                                  'latitude': ' 423000', 'longitude': ' 0883000'}, {}))
+        self.assertEqual(self.validator.errors['countyCode'],
+                         ['Coordinates are within the bounding box of counties: US 55 001'])
+
+    def test_no_candidate_counties(self):
+        self.assertFalse(self.validator.validate({'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '002',
+                                                  'latitude': ' 300000', 'longitude': ' 0883000'}, {}))
+        self.assertIn('latitude', self.validator.errors)
+        self.assertNotIn('countyCode', self.validator.errors)
+
+    def test_county_already_a_candidate(self):
+        # The entered county is one of the candidates, so there is no better county to suggest
+        errors = {'latitude': ['Latitude is out of range for county 002']}
+        self.validator._validate_candidate_counties(
+            ValidationContext({'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '002', 'latitude': ' 433000',
+                               'longitude': ' 0893000'}, {}), errors)
+        self.assertNotIn('countyCode', errors)
+
+
 class CrossFieldRefWarningAltitudeTestCase(TestCase):
 
     def setUp(self):
@@ -310,8 +367,7 @@ class CrossFieldValidatorSiteNumberFieldTestCase(TestCase):
             ]
         }
         mref_validator = mref_validator_class.return_value
-        mref_validator.validate.return_value = True
-        mref_validator.errors = []
+        mref_validator.validate_context.return_value = []
 
         with mock.patch('mlrvalidator.validators.reference.open',
                         mock.mock_open(read_data=json.dumps(ref_list))):
@@ -0,0 +1,98 @@
+from unittest import TestCase
+
+from ..dms import CoordinateBounds, NO_BOUNDS, parse_dms, parse_latitude, parse_longitude
+
+
+class ParseDmsTestCase(TestCase):
+
+    def test_latitude(self):
+        self.assertEqual(parse_dms(' 433015'), ((43 * 60 + 30) * 60 + 15) * 100)
+        self.assertEqual(parse_dms('-433015.5'), -(((43 * 60 + 30) * 60 + 15) * 100 + 50))
+
+    def test_longitude(self):
+        self.assertEqual(parse_dms(' 0893000.25'), (89 * 3600 + 30 * 60) * 100 + 25)
+        self.assertEqual(parse_dms('1800000'), 180 * 360000)
+
+    def test_digits_after_hundredths_are_dropped(self):
+        self.assertEqual(parse_dms('000000.129'), 12)
+
+    def test_invalid(self):
+        self.assertIsNone(parse_dms(''))
+        self.assertIsNone(parse_dms('43'))
+        self.assertIsNone(parse_dms('436000'))
+        self.assertIsNone(parse_dms('433060'))
+        self.assertIsNone(parse_dms('4330AB'))
+        self.assertIsNone(parse_dms('433015.'))
+
+
+class ParseLatitudeLongitudeTestCase(TestCase):
+
+    def test_parse_latitude(self):
+        self.assertEqual(parse_latitude(' 000001'), 100)
+        self.assertEqual(parse_latitude('-000001.5 '), -150)
+        self.assertEqual(parse_latitude(' 905959'), (90 * 3600 + 59 * 60 + 59) * 100)
+
+    def test_parse_latitude_invalid(self):
+        self.assertIsNone(parse_latitude('000001'))
+        self.assertIsNone(parse_latitude(' 0000001'))
+        self.assertIsNone(parse_latitude(' 910000'))
+        self.assertIsNone(parse_latitude(' 12.7456'))
+        self.assertIsNone(parse_latitude(' 900000.-9'))
+        self.assertIsNone(parse_latitude(' 43000'))
+        self.assertIsNone(parse_latitude(' 4 0000'))
+        self.assertIsNone(parse_latitude(' +40000'))
+        self.assertIsNone(parse_latitude(' 430000.1.2'))
+
+    def test_parse_longitude(self):
+        self.assertEqual(parse_longitude(' 0000001'), 100)
+        self.assertEqual(parse_longitude('-1800000.01'), -(180 * 360000 + 1))
+
+    def test_parse_longitude_invalid(self):
+        self.assertIsNone(parse_longitude(' 000001'))
+        self.assertIsNone(parse_longitude(' 1810000'))
+        self.assertIsNone(parse_longitude(' 0006000'))
+        self.assertIsNone(parse_longitude(' 089000'))
+        self.assertIsNone(parse_longitude(' 08 0000'))
+
+
+class CoordinateBoundsTestCase(TestCase):
+
+    def test_from_attributes(self):
+        bounds = CoordinateBounds.from_attributes({'state_min_lat_va': '292900', 'state_max_lat_va': '383000',
+                                                   'state_min_long_va': '-0745800', 'state_max_long_va': '-0605000'},
+                                                  'state')
+        self.assertEqual(bounds, (parse_dms('292900'), parse_dms('383000'), parse_dms('-0745800'),
+                                  parse_dms('-0605000')))
+        self.assertTrue(bounds.contains_longitude(parse_dms('-0700000')))
+        self.assertFalse(bounds.contains_longitude(parse_dms('0700000')))
+
+    def test_bounds_are_inclusive(self):
+        bounds = CoordinateBounds.from_attributes({'county_min_lat_va': '100000', 'county_max_lat_va': '200000'},
+                                                  'county')
+        self.assertTrue(bounds.contains_latitude(parse_dms('100000')))
+        self.assertTrue(bounds.contains_latitude(parse_dms('200000')))
+        self.assertFalse(bounds.contains_latitude(parse_dms('200000.01')))
+        self.assertFalse(bounds.contains_latitude(parse_dms('-150000')))
+
+    def test_swapped_bounds(self):
+        bounds = CoordinateBounds.from_attributes({'county_min_lat_va': '200000', 'county_max_lat_va': '100000',
+                                                   'county_min_long_va': '0900000', 'county_max_long_va': '0800000'},
+                                                  'county')
+        self.assertEqual(bounds, (parse_dms('100000'), parse_dms('200000'), parse_dms('0800000'),
+                                  parse_dms('0900000')))
+
+    def test_crosses_180th_meridian(self):
+        bounds = CoordinateBounds.from_attributes({'county_min_long_va': '1660213', 'county_max_long_va': '-1722655'},
+                                                  'county')
+        self.assertTrue(bounds.crosses_180th_meridian)
+        self.assertTrue(bounds.contains_longitude(parse_dms('1750000')))
+        self.assertTrue(bounds.contains_longitude(parse_dms('-1750000')))
+        self.assertFalse(bounds.contains_longitude(parse_dms('-1700000')))
+        self.assertFalse(bounds.contains_longitude(parse_dms('1600000')))
+
+    def test_missing_bounds(self):
+        bounds = CoordinateBounds.from_attributes({'county_min_lat_va': '', 'county_max_lat_va': '100000',
+                                                   'county_min_long_va': '0800000'}, 'county')
+        self.assertEqual(bounds, NO_BOUNDS)
+        self.assertTrue(bounds.contains_latitude(0))
+        self.assertTrue(bounds.contains_longitude(0))
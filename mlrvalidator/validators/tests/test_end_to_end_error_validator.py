@@ -1,8 +1,12 @@
 
-from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
 
 from app import application
 from ..error_validator import ErrorValidator
+from ..reference import ReferenceRegistry
+from ..validation_context import ValidationContext
+from ..warning_validator import WarningValidator
 
 
 class BaseE2ETestCase(TestCase):
@@ -3611,3 +3615,87 @@ class SiteWebReadyCode(BaseE2ETestCase):
             update=True
         )
         self.assertIn('siteWebReadyCode', self.v.errors)
+
+
+class ErrorValidatorConcurrencyTestCase(BaseE2ETestCase):
+
+    def test_concurrent_validations_match_sequential_validations(self):
+        locations = [
+            ({'agencyCode': 'USGS ', 'siteNumber': '12345678', 'siteWebReadyCode': 'Y'}, {}, False),
+            ({'agencyCode': 'usgs', 'siteNumber': '1234'}, {}, False),
+            ({'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '999'}, {}, False),
+            ({'siteTypeCode': 'FA-AWL'}, {'siteTypeCode': 'ST'}, True),
+            ({'latitude': ' 433000', 'longitude': ' 0893000'}, {}, False)
+        ] * 20
+        expected = [dict(self.v.validate(ddot, existing, update=update).errors)
+                    for ddot, existing, update in locations]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda args: self.v.validate(*args), locations))
+
+        self.assertEqual([dict(result.errors) for result in results], expected)
+
+
+class ErrorValidatorRuleCoverageTestCase(BaseE2ETestCase):
+
+    def test_rule_coverage(self):
+        self.v.validate({'holeDepth': '10', 'wellDepth': '20'}, {}, update=True)
+
+        coverage = self.v.rule_coverage()
+        self.assertEqual(sorted(coverage), ['cross_field_ref_validator', 'cross_field_validator'])
+        depths = [rule for rule in coverage['cross_field_validator']['rules'] if rule['name'] == 'depths'][0]
+        self.assertEqual(depths['triggered'], 1)
+
+
+class StateCoordinateRangeTestCase(BaseE2ETestCase):
+
+    def test_negative_longitude_in_range(self):
+        # AF 00 is bounded by longitudes -0745800 and -0605000, which used to be compared as strings
+        self.v.validate({'countryCode': 'AF', 'stateFipsCode': '00', 'latitude': ' 300000', 'longitude': '-0700000'},
+                        {}, update=True)
+        self.assertNotIn('longitude', self.v.errors)
+        self.assertNotIn('latitude', self.v.errors)
+
+    def test_negative_longitude_out_of_range(self):
+        self.v.validate({'countryCode': 'AF', 'stateFipsCode': '00', 'longitude': '-0800000'}, {}, update=True)
+        self.assertIn('Longitude is out of range for state 00', self.v.errors['longitude'])
+
+        self.v.validate({'countryCode': 'AF', 'stateFipsCode': '00', 'longitude': ' 0700000'}, {}, update=True)
+        self.assertIn('Longitude is out of range for state 00', self.v.errors['longitude'])
+
+    def test_latitude_out_of_range(self):
+        self.v.validate({'countryCode': 'US', 'stateFipsCode': '55', 'latitude': '-430000'}, {}, update=True)
+        self.assertIn('Latitude is out of range for state 55', self.v.errors['latitude'])
+
+    def test_invalid_coordinates_only_get_the_single_field_error(self):
+        # ' 43300' and ' 893000' would be misread as 4 33' 00" and 89 30' 00" if the range rules parsed them leniently
+        self.v.validate({'countryCode': 'US', 'stateFipsCode': '01', 'latitude': ' 43300', 'longitude': ' 893000'},
+                        {}, update=True)
+        self.assertEqual(self.v.errors['latitude'], ['Invalid Degree/Minute/Second Value'])
+        self.assertEqual(self.v.errors['longitude'], ['Invalid Degree/Minute/Second Value'])
+
+
+class SharedReferenceLookupTestCase(TestCase):
+
+    def test_state_is_resolved_once_for_errors_and_warnings(self):
+        reference_registry = ReferenceRegistry()
+        error_validator = ErrorValidator(application.config['SCHEMA_DIR'], application.config['REFERENCE_FILE_DIR'],
+                                         reference_registry=reference_registry)
+        warning_validator = WarningValidator(application.config['SCHEMA_DIR'],
+                                             application.config['REFERENCE_FILE_DIR'],
+                                             reference_registry=reference_registry)
+        states_ref = error_validator.cross_field_ref_validator.states_ref
+        self.assertIs(states_ref, warning_validator.cross_field_ref_validator.states_ref)
+
+        location = {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025', 'latitude': ' 430000',
+                    'longitude': ' 0893000', 'altitude': '99999'}
+        with mock.patch.object(states_ref, 'get_state_attributes',
+                               wraps=states_ref.get_state_attributes) as mock_get_state_attributes:
+            context = ValidationContext(location, {})
+            error_result = error_validator.validate_context(context)
+            warning_result = warning_validator.validate_context(context)
+
+        mock_get_state_attributes.assert_called_once_with('US', '55')
+        self.assertEqual(error_result.errors, error_validator.validate(location, {}).errors)
+        self.assertEqual(warning_result.warnings, warning_validator.validate(location, {}).warnings)
+        self.assertIn('altitude', warning_result.warnings)
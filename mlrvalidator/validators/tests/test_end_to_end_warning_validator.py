@@ -97,6 +97,41 @@ class CountyCodeTestCase(TestCase):
         )
         self.assertIn('latitude', validator.warnings)
 
+    def test_invalid_coordinates_not_range_checked(self):
+        result = validator.validate(
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '001', 'latitude': ' 43300',
+             'longitude': ' 893000'},
+            {}
+        )
+        self.assertNotIn('latitude', result.warnings)
+        self.assertNotIn('longitude', result.warnings)
+
+    def test_candidate_counties(self):
+        result = validator.validate(
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '001', 'latitude': ' 430400',
+             'longitude': ' 0892400'},
+            {}
+        )
+        self.assertIn('latitude', result.warnings)
+        self.assertEqual(result.warnings['countyCode'],
+                         ['Coordinates are within the bounding box of counties: US 55 025'])
+
+    def test_no_candidate_counties_for_invalid_coordinate(self):
+        result = validator.validate(
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '001', 'latitude': ' 0430400',
+             'longitude': ' 0892400'},
+            {}
+        )
+        self.assertNotIn('countyCode', result.warnings)
+
+    def test_no_candidate_counties_when_in_county(self):
+        result = validator.validate(
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025', 'latitude': ' 430400',
+             'longitude': ' 0892400'},
+            {}
+        )
+        self.assertNotIn('countyCode', result.warnings)
+
 
 class ContributingDrainageAreaTestCase(TestCase):
 
@@ -13,13 +13,12 @@ class ErrorValidatorErrorsTestCase(TestCase):
 
     def setUpPassingValidator(self, validator_class):
         """
-        Given a mock validator class, tell its `validate` method to return `true`, and its `errors` property to be empty
+        Given a mock validator class, tell its `validate_context` method to return no errors
         :param validator_class:
         :return:
         """
         validator = validator_class.return_value
-        validator.validate.return_value = True
-        validator.errors = {}
+        validator.validate_context.return_value = {}
 
     def setUpPassingValidators(self, *validator_classes):
         """
@@ -45,8 +44,7 @@ class ErrorValidatorErrorsTestCase(TestCase):
     def test_single_field_invalid(self, mtran_class, mref_class, mcross_class, msingle_field_class):
         self.setUpPassingValidators(mtran_class, mref_class, mcross_class)
         msingle_field = msingle_field_class.return_value
-        msingle_field.validate.return_value = False
-        msingle_field.errors = {'A' : ['Invalid']}
+        msingle_field.validate_context.return_value = {'A' : ['Invalid']}
 
         validator = ErrorValidator('schema_dir', 'ref_dir')
         result = validator.validate({'A': 'This', 'B': 'That'}, {})
@@ -62,8 +60,7 @@ class ErrorValidatorErrorsTestCase(TestCase):
     def test_cross_field_invalid(self, mtran_class, mref_class, mcross_class, msingle_field_class):
         self.setUpPassingValidators(mtran_class, mref_class, msingle_field_class)
         mcross = mcross_class.return_value
-        mcross.validate.return_value = False
-        mcross.errors = {'B': ['Invalid']}
+        mcross.validate_context.return_value = {'B': ['Invalid']}
 
         validator = ErrorValidator('schema_dir', 'ref_dir')
         result = validator.validate({'A': 'This', 'B': 'That'}, {})
@@ -79,8 +76,7 @@ class ErrorValidatorErrorsTestCase(TestCase):
     def test_ref_invalid(self, mtran_class, mref_class, mcross_class, msingle_field_class):
         self.setUpPassingValidators(mtran_class, mcross_class, msingle_field_class)
         mref = mref_class.return_value
-        mref.validate.return_value = False
-        mref.errors = {'B': ['Bad']}
+        mref.validate_context.return_value = {'B': ['Bad']}
 
         validator = ErrorValidator('schema_dir', 'ref_dir')
         result = validator.validate({'A': 'This', 'B': 'That'}, {})
@@ -96,8 +92,7 @@ class ErrorValidatorErrorsTestCase(TestCase):
     def test_tran_invalid(self, mtran_class, mref_class, mcross_class, msingle_field_class):
         self.setUpPassingValidators(mref_class, mcross_class, msingle_field_class)
         mtran = mtran_class.return_value
-        mtran.validate.return_value = False
-        mtran.errors = {'B': ['Bad transition']}
+        mtran.validate_context.return_value = {'B': ['Bad transition']}
 
 
         validator = ErrorValidator('schema_dir', 'ref_dir')
@@ -116,14 +111,10 @@ class ErrorValidatorErrorsTestCase(TestCase):
         mcross = mcross_class.return_value
         msingle_field = msingle_field_class.return_value
 
-        mtran.validate.return_value = False
-        mtran.errors = {'B': ['Bad transition']}
-        mref.validate.return_value = False
-        mref.errors = {'B': ['Bad ref']}
-        mcross.validate.return_value = False
-        mcross.errors = {'A': ['Invalid cross']}
-        msingle_field.validate.return_value = False
-        msingle_field.errors = {'B': ['Missing']}
+        mtran.validate_context.return_value = {'B': ['Bad transition']}
+        mref.validate_context.return_value = {'B': ['Bad ref']}
+        mcross.validate_context.return_value = {'A': ['Invalid cross']}
+        msingle_field.validate_context.return_value = {'B': ['Missing']}
         validator = ErrorValidator('schema_dir', 'ref_dir')
         result = validator.validate({'A': 'This', 'B': 'That'}, {})
         self.assertFalse(result)
@@ -1,10 +1,12 @@
+import copy
 import json
 import os
 from unittest import TestCase, mock
 
 from app import application
+from ..dms import NO_BOUNDS, parse_dms
 from ..reference import CountryStateReference, NationalWaterUseCodes, States, FieldTransitions, SiteTypesCrossField, Counties, \
-    LandNetCrossField, SiteNumberFormat
+    LandNetCrossField, SiteNumberFormat, ReferenceLists, ReferenceRegistry, HydrologicUnitCodes, HydrologicUnitCodeIndex
 
 
 class CountryStateReferenceTestCase(TestCase):
@@ -54,6 +56,84 @@ class CountryStateReferenceTestCase(TestCase):
     def test_missing_state(self):
         self.assertEqual(self.aquifer_ref.get_list_by_country_state('US', '03'), [])
 
+    def test_set_that_exists(self):
+        self.assertEqual(self.aquifer_ref.get_set_by_country_state('US', '02'), frozenset(['000MCRL', '000SELS']))
+
+    def test_set_missing_country_or_state(self):
+        self.assertEqual(self.aquifer_ref.get_set_by_country_state('CN', '02'), frozenset())
+        self.assertEqual(self.aquifer_ref.get_set_by_country_state('US', '03'), frozenset())
+
+
+class HydrologicUnitCodeIndexTestCase(TestCase):
+    def setUp(self):
+        self.huc_index = HydrologicUnitCodeIndex(['07', '0701', '070102', '07010206', '0702', '070200', '08'])
+
+    def test_contains(self):
+        for code in ['07', '0701', '070102', '07010206', '0702', '070200', '08']:
+            self.assertIn(code, self.huc_index)
+
+    def test_not_contains(self):
+        for code in ['', '0', '06', '09', '0700', '0703', '070101', '07010207', '0701020601']:
+            self.assertNotIn(code, self.huc_index)
+
+    def test_iteration_is_sorted(self):
+        self.assertEqual(list(self.huc_index), ['07', '0701', '070102', '07010206', '0702', '070200', '08'])
+        self.assertEqual(len(self.huc_index), 7)
+
+    def test_longest_prefix(self):
+        self.assertEqual(self.huc_index.longest_prefix('0701020699'), '07010206')
+        self.assertEqual(self.huc_index.longest_prefix('07010299'), '070102')
+        self.assertEqual(self.huc_index.longest_prefix('070300'), '07')
+        self.assertEqual(self.huc_index.longest_prefix('0900'), '')
+        self.assertEqual(self.huc_index.longest_prefix('07'), '')
+
+
+class HydrologicUnitCodesTestCase(TestCase):
+    def setUp(self):
+        ref_list = {
+            "countries": [
+                {
+                    "countryCode": "US",
+                    "states": [
+                        {
+                            "stateFipsCode": "55",
+                            "hydrologicUnitCodes": [
+                                "07",
+                                "0701",
+                                "070102",
+                                "07010206"
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+        with mock.patch('mlrvalidator.validators.reference.open', mock.mock_open(read_data=json.dumps(ref_list)), create=True):
+            self.huc_ref = HydrologicUnitCodes('fake_file')
+        self.ref_list = ref_list
+
+    def test_loaded_json_not_changed(self):
+        loaded = copy.deepcopy(self.ref_list)
+        with mock.patch('mlrvalidator.validators.reference.load_reference_file', return_value=loaded):
+            huc_ref = HydrologicUnitCodes('fake_file')
+
+        self.assertEqual(loaded, self.ref_list)
+        self.assertFalse(huc_ref.is_empty())
+        self.assertIn('07', huc_ref.get_set_by_country_state('US', '55'))
+
+    def test_list_that_exists(self):
+        self.assertEqual(self.huc_ref.get_list_by_country_state('US', '55'), ['07', '0701', '070102', '07010206'])
+        self.assertEqual(self.huc_ref.get_list_by_country_state('US', '01'), [])
+
+    def test_membership(self):
+        self.assertIn('070102', self.huc_ref.get_set_by_country_state('US', '55'))
+        self.assertNotIn('070103', self.huc_ref.get_set_by_country_state('US', '55'))
+        self.assertNotIn('070102', self.huc_ref.get_set_by_country_state('US', '01'))
+
+    def test_longest_valid_prefix(self):
+        self.assertEqual(self.huc_ref.get_longest_valid_prefix('US', '55', '07010301'), '0701')
+        self.assertEqual(self.huc_ref.get_longest_valid_prefix('US', '01', '07010301'), '')
+
 
 class ValidateGetNationalWaterUseCase(TestCase):
     def setUp(self):
@@ -83,6 +163,11 @@ class ValidateGetNationalWaterUseCase(TestCase):
 
         self.assertEqual(test_national_water_use, bad_national_water_use)
 
+    def test_code_set(self):
+        self.assertEqual(self.national_water_use.get_national_water_use_code_set('AS'),
+                         frozenset(self.national_water_use.get_national_water_use_codes('AS')))
+        self.assertEqual(self.national_water_use.get_national_water_use_code_set('XY'), frozenset())
+
 
 class ValidateGetCountyCodeCase(TestCase):
     def setUp(self):
@@ -105,6 +190,10 @@ class ValidateGetCountyCodeCase(TestCase):
 
         self.assertEqual(test_county, bad_county)
 
+    def test_county_code_set(self):
+        self.assertEqual(self.county.get_county_code_set('FM', '64'), frozenset(["000", "005", "040", "050", "060"]))
+        self.assertEqual(self.county.get_county_code_set('FM', 'XY'), frozenset())
+
 
 class ValidateGetCountyAttributesCase(TestCase):
     def setUp(self):
@@ -140,6 +229,11 @@ class ValidateGetCountyAttributesCase(TestCase):
 
         self.assertEqual(test_county, bad_county)
 
+    def test_county_bounds(self):
+        self.assertEqual(self.county.get_county_bounds('FM', '64', '000'),
+                         (parse_dms('010400'), parse_dms('100700'), parse_dms('-1630200'), parse_dms('-1380000')))
+        self.assertEqual(self.county.get_county_bounds('FM', '64', '999'), NO_BOUNDS)
+
 
 class ValidateGetStateCodeCase(TestCase):
     def setUp(self):
@@ -157,6 +251,10 @@ class ValidateGetStateCodeCase(TestCase):
 
         self.assertEqual(test_state, bad_state)
 
+    def test_state_code_set(self):
+        self.assertEqual(self.state.get_state_code_set('CA'), frozenset(["00", "90", "91", "92", "93", "94", "95", "96", "97", "98"]))
+        self.assertEqual(self.state.get_state_code_set('XY'), frozenset())
+
 
 class ValidateGetStateAttributesCase(TestCase):
     def setUp(self):
@@ -187,6 +285,11 @@ class ValidateGetStateAttributesCase(TestCase):
 
         self.assertEqual(test_state, bad_state)
 
+    def test_state_bounds(self):
+        self.assertEqual(self.state.get_state_bounds('CA', '00'),
+                         (parse_dms('414036'), parse_dms('694000'), parse_dms('0553000'), parse_dms('1410000')))
+        self.assertEqual(self.state.get_state_bounds('XY', '00'), NO_BOUNDS)
+
 
 class ValidateGetFieldTransitionsCase(TestCase):
     def setUp(self):
@@ -213,6 +316,11 @@ class ValidateGetFieldTransitionsCase(TestCase):
 
         self.assertEqual(test_new_site_type, bad_new_site_type)
 
+    def test_transition_set(self):
+        self.assertEqual(self.site_type.get_allowed_transition_set('AG'),
+                         frozenset(["FA-SPS", "FA-WIW", "GW", "GW-CR", "GW-IW", "GW-MW", "SP"]))
+        self.assertEqual(self.site_type.get_allowed_transition_set('XY'), frozenset())
+
 
 class ValidateGetSiteTypesCrossFieldCase(TestCase):
 
@@ -306,4 +414,49 @@ class ValidateGetSiteNumberFormatCase(TestCase):
     def test_bad_site_type(self):
         result = self.site_format.get_site_number_template('XY')
         expected = ''
-        self.assertEqual(result, expected)
\ No newline at end of file
+        self.assertEqual(result, expected)
+
+class ReferenceListsTestCase(TestCase):
+    def setUp(self):
+        ref_list = {
+            'agencyCode': ['USGS', 'USEPA'],
+            'siteTypeCode': ['ST', 'GW']
+        }
+        with mock.patch('mlrvalidator.validators.reference.open', mock.mock_open(read_data=json.dumps(ref_list)), create=True):
+            self.reference_lists = ReferenceLists('fake_file')
+
+    def test_field_with_list(self):
+        self.assertEqual(self.reference_lists.get_reference_set('agencyCode'), frozenset(['USGS', 'USEPA']))
+
+    def test_field_without_list(self):
+        self.assertEqual(self.reference_lists.get_reference_set('altitudeDatumCode'), frozenset())
+
+
+class ReferenceRegistryTestCase(TestCase):
+    def setUp(self):
+        self.registry = ReferenceRegistry()
+        self.state_path = os.path.join(application.config['REFERENCE_FILE_DIR'], 'state.json')
+        self.huc_path = os.path.join(application.config['REFERENCE_FILE_DIR'], 'huc.json')
+
+    def test_same_file_returns_same_reference(self):
+        states = self.registry.get(States, self.state_path)
+
+        self.assertIsInstance(states, States)
+        self.assertIs(self.registry.get(States, self.state_path), states)
+        self.assertEqual(self.registry.paths, [os.path.abspath(self.state_path)])
+
+    def test_constructor_arguments_are_part_of_key(self):
+        huc_ref = self.registry.get(CountryStateReference, self.huc_path, 'hydrologicUnitCodes')
+
+        self.assertIs(self.registry.get(CountryStateReference, self.huc_path, 'hydrologicUnitCodes'), huc_ref)
+        self.assertIsNot(self.registry.get(CountryStateReference, self.huc_path, 'otherCodes'), huc_ref)
+
+    def test_bytes_saved(self):
+        self.assertEqual(self.registry.bytes_saved, 0)
+
+        self.registry.get(States, self.state_path)
+        self.assertEqual(self.registry.bytes_saved, 0)
+
+        self.registry.get(States, self.state_path)
+        self.registry.get(States, self.state_path)
+        self.assertEqual(self.registry.bytes_saved, 2 * os.path.getsize(self.state_path))
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from .. import reference_snapshot
+from ..reference import load_reference_file
+from ..reference_snapshot import build_snapshot, get_snapshot, ReferenceSnapshot, SNAPSHOT_FILE_NAME
+
+
+class ReferenceSnapshotTestCase(TestCase):
+
+    def setUp(self):
+        self.reference_dir = tempfile.mkdtemp()
+        self.states = {'countries': [{'countryCode': 'US', 'states': [{'stateFipsCode': '01'}]}]}
+        self.transitions = [{'existingField': 'AG', 'newFields': ['GW']}]
+        self._write('state.json', self.states)
+        self._write('site_type_transition.json', self.transitions)
+
+    def tearDown(self):
+        reference_snapshot._snapshots.clear()
+        shutil.rmtree(self.reference_dir)
+
+    def _path(self, name):
+        return os.path.join(self.reference_dir, name)
+
+    def _write(self, name, contents):
+        with open(self._path(name), 'w') as fd:
+            fd.write(json.dumps(contents))
+
+    def test_build_and_load(self):
+        build_snapshot(self.reference_dir)
+        snapshot = ReferenceSnapshot(self._path(SNAPSHOT_FILE_NAME))
+
+        self.assertEqual(sorted(snapshot.files.keys()), ['site_type_transition.json', 'state.json'])
+        self.assertEqual(snapshot.load(self._path('state.json')), self.states)
+        self.assertEqual(snapshot.load(self._path('site_type_transition.json')), self.transitions)
+
+    def test_file_not_in_snapshot(self):
+        build_snapshot(self.reference_dir)
+        self._write('county.json', {'countries': []})
+        snapshot = ReferenceSnapshot(self._path(SNAPSHOT_FILE_NAME))
+
+        self.assertIsNone(snapshot.load(self._path('county.json')))
+
+    def test_stale_file(self):
+        build_snapshot(self.reference_dir)
+        changed_states = {'countries': [{'countryCode': 'US', 'states': [{'stateFipsCode': '02'}]}]}
+        self._write('state.json', changed_states)
+        snapshot = ReferenceSnapshot(self._path(SNAPSHOT_FILE_NAME))
+
+        self.assertFalse(snapshot.is_current(self._path('state.json')))
+        self.assertIsNone(snapshot.load(self._path('state.json')))
+        self.assertTrue(snapshot.is_current(self._path('site_type_transition.json')))
+        self.assertEqual(load_reference_file(self._path('state.json')), changed_states)
+
+    def test_not_a_snapshot(self):
+        with open(self._path(SNAPSHOT_FILE_NAME), 'wb') as fd:
+            fd.write(b'not a snapshot')
+
+        self.assertRaises(ValueError, ReferenceSnapshot, self._path(SNAPSHOT_FILE_NAME))
+        self.assertIsNone(get_snapshot(self.reference_dir))
+        self.assertEqual(load_reference_file(self._path('state.json')), self.states)
+
+    def test_get_snapshot(self):
+        self.assertIsNone(get_snapshot(self.reference_dir))
+
+        build_snapshot(self.reference_dir)
+        snapshot = get_snapshot(self.reference_dir)
+
+        self.assertIsInstance(snapshot, ReferenceSnapshot)
+        self.assertIs(get_snapshot(self.reference_dir), snapshot)
+        self.assertEqual(load_reference_file(self._path('state.json')), self.states)
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from app import application
+from .. import reference_store
+from ..dms import NO_BOUNDS
+from ..error_validator import ErrorValidator
+from ..reference import Counties, CountryStateReference, HydrologicUnitCodes, ReferenceRegistry
+from ..reference_store import build_store, get_store, ReferenceStore, STORE_FILE_NAME, StoreCounties, \
+    StoreCountryStateReference, StoreHydrologicUnitCodes
+from ..warning_validator import WarningValidator
+
+
+class ReferenceStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.reference_dir = tempfile.mkdtemp()
+        self.counties = {'countries': [
+            {'countryCode': 'US', 'states': [
+                {'stateFipsCode': '55', 'counties': [
+                    {'countyCode': '025', 'county_min_lat_va': '425500'},
+                    {'countyCode': '001', 'county_min_lat_va': '434000'}
+                ]},
+                {'stateFipsCode': '5', 'counties': [{'countyCode': '003'}]}
+            ]}
+        ]}
+        self.hucs = {'countries': [
+            {'countryCode': 'US', 'states': [
+                {'stateFipsCode': '55', 'hydrologicUnitCodes': ['07', '0709', '070900', '04']}
+            ]}
+        ]}
+        self._write('county.json', self.counties)
+        self._write('huc.json', self.hucs)
+
+    def tearDown(self):
+        reference_store._stores.clear()
+        shutil.rmtree(self.reference_dir)
+
+    def _path(self, name):
+        return os.path.join(self.reference_dir, name)
+
+    def _write(self, name, contents):
+        with open(self._path(name), 'w') as fd:
+            fd.write(json.dumps(contents))
+
+    def test_counties(self):
+        build_store(self.reference_dir)
+        counties = StoreCounties(ReferenceStore(self._path(STORE_FILE_NAME)), self._path('county.json'))
+
+        self.assertEqual(counties.get_county_codes('US', '55'), ['001', '025'])
+        self.assertIn('025', counties.get_county_code_set('US', '55'))
+        self.assertNotIn('003', counties.get_county_code_set('US', '55'))
+        self.assertEqual(len(counties.get_county_code_set('US', '5')), 1)
+        self.assertFalse(counties.get_county_code_set('US', '01'))
+        self.assertEqual(counties.get_county_attributes('US', '55', '025'),
+                         {'countyCode': '025', 'county_min_lat_va': '425500'})
+        self.assertEqual(counties.get_county_attributes('US', '55', '999'), {})
+        self.assertEqual(counties.get_county_bounds('US', '55', '025'), NO_BOUNDS)
+        self.assertFalse(counties.is_empty())
+
+    def test_hydrologic_unit_codes(self):
+        build_store(self.reference_dir)
+        hucs = StoreHydrologicUnitCodes(ReferenceStore(self._path(STORE_FILE_NAME)), self._path('huc.json'))
+
+        self.assertIn('070900', hucs.get_set_by_country_state('US', '55'))
+        self.assertEqual(hucs.get_list_by_country_state('US', '55'), ['04', '07', '0709', '070900'])
+        self.assertEqual(hucs.get_longest_valid_prefix('US', '55', '07090099'), '070900')
+        self.assertEqual(hucs.get_longest_valid_prefix('US', '55', '0810'), '')
+
+    def test_registry_uses_current_store(self):
+        build_store(self.reference_dir)
+
+        registry = ReferenceRegistry(use_store=True)
+        self.assertIsInstance(registry.get(Counties, self._path('county.json')), StoreCounties)
+        self.assertIsInstance(registry.get(HydrologicUnitCodes, self._path('huc.json')), StoreHydrologicUnitCodes)
+        self.assertIsInstance(ReferenceRegistry().get(Counties, self._path('county.json')), Counties)
+
+    def test_registry_does_not_use_stale_store(self):
+        build_store(self.reference_dir)
+        self.counties['countries'][0]['states'][0]['counties'].append({'countyCode': '005'})
+        self._write('county.json', self.counties)
+
+        registry = ReferenceRegistry(use_store=True)
+        counties = registry.get(Counties, self._path('county.json'))
+        self.assertIsInstance(counties, Counties)
+        self.assertIn('005', counties.get_county_code_set('US', '55'))
+
+    def test_file_not_in_store(self):
+        build_store(self.reference_dir)
+        self._write('aquifer.json', {'countries': []})
+
+        registry = ReferenceRegistry(use_store=True)
+        self.assertIsInstance(registry.get(CountryStateReference, self._path('aquifer.json'), 'aquiferCodes'),
+                              CountryStateReference)
+
+    def test_not_a_store(self):
+        with open(self._path(STORE_FILE_NAME), 'wb') as fd:
+            fd.write(b'not a store')
+
+        self.assertRaises(ValueError, ReferenceStore, self._path(STORE_FILE_NAME))
+        self.assertIsNone(get_store(self.reference_dir))
+
+
+class StoreValidatorTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.reference_dir = os.path.join(cls.temp_dir, 'references')
+        shutil.copytree(application.config['REFERENCE_FILE_DIR'], cls.reference_dir)
+        build_store(cls.reference_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        reference_store._stores.clear()
+        shutil.rmtree(cls.temp_dir)
+
+    def _validators(self, use_store):
+        registry = ReferenceRegistry(use_store=use_store)
+        return (ErrorValidator(application.config['SCHEMA_DIR'], self.reference_dir, reference_registry=registry),
+                WarningValidator(application.config['SCHEMA_DIR'], self.reference_dir, reference_registry=registry))
+
+    def test_store_gives_same_results(self):
+        error_validator, warning_validator = self._validators(False)
+        store_error_validator, store_warning_validator = self._validators(True)
+        self.assertIsInstance(store_error_validator.cross_field_ref_validator.counties_ref, StoreCounties)
+        self.assertIsInstance(store_error_validator.cross_field_ref_validator.aquifer_ref_validator.country_state_ref,
+                              StoreCountryStateReference)
+
+        locations = [
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '025', 'latitude': ' 430000',
+             'longitude': ' 0893000', 'hydrologicUnitCode': '07090002', 'aquiferCode': '100CNZC',
+             'nationalAquiferCode': 'N100GLCIAL', 'minorCivilDivisionCode': '48000'},
+            {'countryCode': 'US', 'stateFipsCode': '55', 'countyCode': '999', 'hydrologicUnitCode': '0709000299',
+             'aquiferCode': 'XXX', 'minorCivilDivisionCode': '00000'},
+            {'countryCode': 'US', 'stateFipsCode': '01', 'countyCode': '001', 'latitude': ' 323000',
+             'longitude': ' 0863000', 'nationalAquiferCode': 'S100SECSLP'},
+            {'countryCode': 'CA', 'stateFipsCode': '01', 'countyCode': '001'}
+        ]
+        for location in locations:
+            self.assertEqual(store_error_validator.validate(location, {}).errors,
+                             error_validator.validate(location, {}).errors)
+            self.assertEqual(store_warning_validator.validate(location, {}).warnings,
+                             warning_validator.validate(location, {}).warnings)
@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from app import application
+
+from ..cross_field_ref_error_validator import CrossFieldRefErrorValidator
+from ..rule_registry import CrossFieldRule, RuleRegistry
+from ..validation_context import ValidationContext
+
+
+class RecordingValidator:
+
+    def __init__(self):
+        self.calls = []
+
+    def _validate_first(self, context, errors, error_key):
+        self.calls.append('first')
+        errors[error_key] = ['First error']
+
+    def _validate_second(self, context, errors):
+        self.calls.append('second')
+
+
+class RuleRegistryTestCase(TestCase):
+
+    def setUp(self):
+        self.registry = RuleRegistry([
+            CrossFieldRule('_validate_first', ['field1', 'field2'], 'error1'),
+            CrossFieldRule('_validate_second', ['field2', 'field3']),
+            CrossFieldRule('_validate_first', ['field4'], 'error4', name='fourth')
+        ])
+        self.validator = RecordingValidator()
+
+    def test_rules_for_field(self):
+        self.assertEqual([rule.name for rule in self.registry.get_rules_for_field('field2')], ['first', 'second'])
+        self.assertEqual(self.registry.get_rules_for_field('field5'), [])
+
+    def test_only_triggered_rules_are_run(self):
+        errors = {}
+        self.registry.run(self.validator, ValidationContext({'field3': 'a', 'field4': 'b'}, {'field1': 'c'}), errors)
+
+        self.assertEqual(self.validator.calls, ['second', 'first'])
+        self.assertEqual(errors, {'error4': ['First error']})
+
+    def test_rules_run_in_registration_order(self):
+        self.registry.run(self.validator, ValidationContext({'field4': 'a', 'field3': 'b', 'field1': 'c'}, {}), {})
+
+        self.assertEqual(self.validator.calls, ['first', 'second', 'first'])
+
+    def test_coverage(self):
+        self.registry.run(self.validator, ValidationContext({'field1': 'a'}, {}), {})
+        self.registry.run(self.validator, ValidationContext({'field2': 'a'}, {}), {})
+
+        coverage = self.registry.coverage()
+        self.assertEqual(coverage['validations'], 2)
+        self.assertEqual(coverage['rules'][0], {'name': 'first', 'fields': ['field1', 'field2'], 'triggered': 2,
+                                                'skipped': 0})
+        self.assertEqual(coverage['rules'][1]['triggered'], 1)
+        self.assertEqual(coverage['rules'][2], {'name': 'fourth', 'fields': ['field4'], 'triggered': 0, 'skipped': 2})
+
+
+class CrossFieldRefErrorValidatorRulesTestCase(TestCase):
+
+    def setUp(self):
+        self.validator = CrossFieldRefErrorValidator(application.config['REFERENCE_FILE_DIR'])
+
+    def test_site_type_rule_fields(self):
+        site_type_rules = self.validator.rule_registry.get_rules_for_field('siteTypeCode')
+        self.assertIn('site_type', [rule.name for rule in site_type_rules])
+        self.assertIn('site_type', [rule.name for rule in self.validator.rule_registry.get_rules_for_field('wellDepth')])
+
+    def test_sparse_update_runs_only_its_rules(self):
+        self.validator.validate_context(ValidationContext({'stationName': 'Renamed'}, {'countryCode': 'US'},
+                                                          update=True))
+        self.validator.validate_context(ValidationContext({'countyCode': '025'}, {'countryCode': 'US'},
+                                                          update=True))
+
+        coverage = {rule['name']: rule for rule in self.validator.rule_registry.coverage()['rules']}
+        self.assertEqual(coverage['counties']['triggered'], 1)
+        self.assertEqual(coverage['mcd']['triggered'], 1)
+        self.assertEqual(coverage['states']['triggered'], 0)
+        self.assertEqual(coverage['states']['skipped'], 2)
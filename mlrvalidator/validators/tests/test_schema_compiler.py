@@ -0,0 +1,156 @@
+import json
+import os
+import random
+from unittest import TestCase
+
+import yaml
+
+from app import application
+
+from ..reference import ReferenceRegistry
+from ..schema_compiler import CompiledSchema, SchemaCompileError
+from ..single_field_validator import SingleFieldValidator
+from ..validation_context import ValidationContext
+from ...metrics import ValidationMetrics, RULE_METRIC
+
+# Values which exercise each of the rules used by the schemas
+SPECIAL_VALUES = ['', ' ', '     ', 'USGS', 'USGS ', ' USGS', 'usgs', 'XYZ', '12345678', ' 12345678', '1234567', 'a3',
+                  '32   4', '433000', ' 433000', '-433000', ' 433000.12', ' 433000.', ' 433000.1a', ' 913000',
+                  ' 0893000', '-0893000', ' 1813000', ' 0893000.5', '0893000', '1', '-1', '1.5', '1.555', '1.',
+                  '12.3a', '1e5', 'abc', '19800101', '198013', '19801332', '1981', '1500', '20991231', "'quoted'",
+                  "'open", "close'", 'AION', 'AIONX', 'YN N', 'Y', 'N', 'y', 'x', '1 000', '12a', 'name#1',
+                  'tab\there', 'under_score', 'GW', 'FA-WTP', 'ST', 'US', 'CA', 'MX', '55', '025', '07090001',
+                  'x' * 60, ' ' * 20, '\t']
+
+
+def get_reference_values(reference_file_dir):
+    with open(os.path.join(reference_file_dir, 'reference_lists.json')) as fd:
+        references = json.load(fd)
+    return {field: values for field, values in references.items() if isinstance(values, list)}
+
+
+def make_documents(schema, reference_values, count, seed):
+    '''
+    Random documents containing a random selection of the fields in schema and an unknown field
+    '''
+    rng = random.Random(seed)
+    fields = sorted(schema)
+    documents = []
+    for index in range(count):
+        document = {}
+        for field in rng.sample(fields, rng.randint(0, len(fields))):
+            choice = rng.random()
+            if choice < 0.4 and reference_values.get(field):
+                value = rng.choice(reference_values[field])
+                document[field] = value + ' ' * rng.randint(0, 2) if rng.random() < 0.5 else value
+            else:
+                document[field] = rng.choice(SPECIAL_VALUES)
+        if rng.random() < 0.5:
+            document['unknownField'] = rng.choice(SPECIAL_VALUES)
+        documents.append(document)
+    return documents
+
+
+class CompiledSchemaDifferentialTestCase(TestCase):
+    '''
+    Checks that the compiled schema produces exactly the errors that Cerberus produces for many random documents
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference_file_dir = application.config['REFERENCE_FILE_DIR']
+        cls.reference_registry = ReferenceRegistry()
+        cls.reference_values = get_reference_values(cls.reference_file_dir)
+
+    def get_validator(self, schema_file):
+        with open(os.path.join(application.config['SCHEMA_DIR'], schema_file)) as fd:
+            schema = yaml.load(fd.read())
+        return SingleFieldValidator(schema, reference_dir=self.reference_file_dir,
+                                    reference_registry=self.reference_registry, allow_unknown=True)
+
+    def assert_same_errors(self, validator, seed):
+        self.assertIsNotNone(validator.compiled_schema)
+        for document in make_documents(validator.schema, self.reference_values, 500, seed):
+            for update in [False, True]:
+                validator.validate(document, update=update)
+                self.assertEqual(validator.compiled_schema.validate(document, update=update), validator.errors,
+                                 msg='document {0}, update {1}'.format(document, update))
+
+    def test_error_schema(self):
+        self.assert_same_errors(self.get_validator('error_schema.yml'), 1)
+
+    def test_warning_schema(self):
+        self.assert_same_errors(self.get_validator('warning_schema.yml'), 2)
+
+    def test_error_messages_in_rule_order(self):
+        validator = self.get_validator('error_schema.yml')
+        document = {'agencyCode': ' XYZ    ', 'altitude': 'abc', 'wellDepth': '1.555'}
+        validator.validate(document, update=True)
+        self.assertEqual(validator.compiled_schema.validate(document, update=True), validator.errors)
+        self.assertEqual(len(validator.errors['agencyCode']), 3)
+
+
+class CompiledSchemaTestCase(TestCase):
+
+    def test_valid_document(self):
+        compiled_schema = CompiledSchema(SingleFieldValidator(
+            schema={'agencyCode': {'maxlength': 5, 'is_empty': False}}, reference_dir='', allow_unknown=True))
+        self.assertEqual(compiled_schema.validate({'agencyCode': 'USGS', 'other': 'value'}), {})
+
+    def test_errors(self):
+        compiled_schema = CompiledSchema(SingleFieldValidator(
+            schema={'agencyCode': {'maxlength': 5, 'is_empty': False},
+                    'altitude': {'type': 'numeric', 'maxlength': 3, 'required': True},
+                    'flag': {'allowed': ['Y', 'N']}},
+            reference_dir='', allow_unknown=True))
+
+        self.assertEqual(compiled_schema.validate({'agencyCode': '      ', 'altitude': 'abcd', 'flag': 'X'}), {
+            'agencyCode': ['Field must contain non whitespace characters', 'max length is 5'],
+            'altitude': ['must be of numeric type'],
+            'flag': ['unallowed value X']
+        })
+        self.assertEqual(compiled_schema.validate({}), {'altitude': ['required field']})
+        self.assertEqual(compiled_schema.validate({}, update=True), {})
+
+    def test_values_which_are_not_strings_are_left_to_cerberus(self):
+        compiled_schema = CompiledSchema(SingleFieldValidator(
+            schema={'agencyCode': {'maxlength': 5}}, reference_dir='', allow_unknown=True))
+
+        self.assertIsNone(compiled_schema.validate({'agencyCode': None}))
+        self.assertIsNone(compiled_schema.validate({'agencyCode': 12}))
+        self.assertIsNone(compiled_schema.validate(['agencyCode']))
+        self.assertEqual(compiled_schema.validate({'other': 12}), {})
+
+    def test_validate_context_falls_back_to_cerberus(self):
+        validator = SingleFieldValidator(schema={'agencyCode': {'maxlength': 5}}, reference_dir='', allow_unknown=True)
+
+        list_context = ValidationContext({'agencyCode': [1, 2, 3, 4, 5, 6]}, {}, update=True)
+        none_context = ValidationContext({'agencyCode': None}, {}, update=True)
+
+        self.assertEqual(validator.validate_context(list_context), {'agencyCode': ['max length is 5']})
+        self.assertEqual(validator.validate_context(none_context), {'agencyCode': ['null value not allowed']})
+
+    def test_unsupported_schemas_are_not_compiled(self):
+        with self.assertRaises(SchemaCompileError):
+            CompiledSchema(SingleFieldValidator(schema={'agencyCode': {'maxlength': 5}}, reference_dir=''))
+        with self.assertRaises(SchemaCompileError):
+            CompiledSchema(SingleFieldValidator(schema={'agencyCode': {'minlength': 5}}, reference_dir='',
+                                                allow_unknown=True))
+        with self.assertRaises(SchemaCompileError):
+            CompiledSchema(SingleFieldValidator(schema={'agencyCode': {'default': 'USGS'}}, reference_dir='',
+                                                allow_unknown=True))
+
+        self.assertIsNone(SingleFieldValidator(schema={'agencyCode': {'minlength': 5}}, reference_dir='',
+                                               allow_unknown=True).compiled_schema)
+
+    def test_rules_are_timed(self):
+        metrics = ValidationMetrics()
+        compiled_schema = CompiledSchema(SingleFieldValidator(
+            schema={'agencyCode': {'maxlength': 5, 'is_empty': False}, 'altitude': {'type': 'numeric'}},
+            reference_dir='', allow_unknown=True), metrics=metrics)
+
+        compiled_schema.validate({'agencyCode': ' ', 'altitude': '1'})
+        timers = metrics._timers[RULE_METRIC]
+        self.assertEqual(timers[('SingleFieldValidator', 'is_empty')].failures, 1)
+        self.assertNotIn(('SingleFieldValidator', 'maxlength'), timers)
+        self.assertEqual(timers[('SingleFieldValidator', 'type_numeric')].calls, 1)
@@ -505,6 +505,11 @@ class ValidateValidLatitudeDMS(TestCase):
         self.assertFalse(self.validator.validate(self.bad_data18))
         self.assertFalse(self.validator.validate(self.bad_data19))
 
+    def test_forms_accepted_before_dms_parsing_not_ok(self):
+        # Slicing the value accepted a missing seconds digit and spaces, signs or a second decimal point in the digits
+        for latitude in [' 43000', '-43000', ' 43000 ', ' 4 0000', ' +40000', ' 43 000', '-4300 0', ' 430000.1.2']:
+            self.assertFalse(self.validator.validate({'latitude': latitude}), latitude)
+
 
 class ValidateValidLongitudeDMSTestCase(TestCase):
 
@@ -667,6 +672,11 @@ class ValidateValidLongitudeDMSTestCase(TestCase):
         self.assertFalse(self.validator.validate(self.bad_data18))
         self.assertFalse(self.validator.validate(self.bad_data19))
 
+    def test_forms_accepted_before_dms_parsing_not_ok(self):
+        # Slicing the value accepted a missing seconds digit and spaces, signs or a second decimal point in the digits
+        for longitude in [' 089000', '-089000', ' 08 0000', ' +890000', '-08900 0', ' 0890000.1.2']:
+            self.assertFalse(self.validator.validate({'longitude': longitude}), longitude)
+
 
 class ValidateValidDateTestCase(TestCase):
 
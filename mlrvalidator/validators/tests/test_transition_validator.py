@@ -11,7 +11,7 @@ class TransitionValidatorSiteTypeTestCase(TestCase):
     def setUp(self, mfield_transitions, msite_type_invalid_codes):
     
         msite_type_invalid_codes.return_value.get_site_type_invalid_codes.return_value = ['FA', 'SS']
-        mfield_transitions.return_value.get_allowed_transitions.return_value = ['FA-SPS', 'FA-WIW', 'FA-DV', 'FA-OF']
+        mfield_transitions.return_value.get_allowed_transition_set.return_value = frozenset(['FA-SPS', 'FA-WIW', 'FA-DV', 'FA-OF'])
         self.validator = TransitionValidator('ref_dir')
 
     def test_valid_transition(self):
@@ -57,7 +57,7 @@ class TransitionValidatorSiteTypeTestCase2(TestCase):
     def setUp(self, mfield_transitions, msite_type_invalid_codes):
     
         msite_type_invalid_codes.return_value.get_site_type_invalid_codes.return_value = ['FA', 'SS']
-        mfield_transitions.return_value.get_allowed_transitions.return_value = ['FA-SPS','FA-WIW','GW']
+        mfield_transitions.return_value.get_allowed_transition_set.return_value = frozenset(['FA-SPS','FA-WIW','GW'])
         self.validator = TransitionValidator('ref_dir')
 
     def test_valid_transition(self):
@@ -70,7 +70,7 @@ class TransitionValidatorErrorsClearAfterEachUse(TestCase):
     def setUp(self, mfield_transitions, msite_type_invalid_codes):
     
         msite_type_invalid_codes.return_value.get_site_type_invalid_codes.return_value = ['FA', 'SS']
-        mfield_transitions.return_value.get_allowed_transitions.return_value = ['FA-SPS','FA-WIW','GW', 'FA-DV']
+        mfield_transitions.return_value.get_allowed_transition_set.return_value = frozenset(['FA-SPS','FA-WIW','GW', 'FA-DV'])
         self.validator = TransitionValidator('ref_dir')
 
     def test_invalid_transition_errors_response_population(self):
@@ -0,0 +1,91 @@
+
+from unittest import TestCase
+
+from ..validation_context import ValidationContext
+
+class TestAnyFieldsInDocument(TestCase):
+
+    def test_any_fields(self):
+        context = ValidationContext({'field1': 'a', 'field2': 'b', 'field3': 'c'}, {})
+        self.assertTrue(context.any_fields_in_document(['field1', 'field3']))
+
+        context = ValidationContext({'field1': 'a'}, {})
+        self.assertTrue(context.any_fields_in_document(['field1', 'field3']))
+
+        context = ValidationContext({'field2': 'a', 'field3': 'c'}, {})
+        self.assertTrue(context.any_fields_in_document(['field1', 'field3']))
+
+    def test_all_fields_missing_in_document(self):
+        context = ValidationContext({'field2': 'b'}, {'field1': 'a', 'field3': 'b'})
+        self.assertFalse(context.any_fields_in_document(['field1', 'field3']))
+
+
+class TestMergedDocument(TestCase):
+
+    def test_document_overrides_existing_document(self):
+        existing_document = {'field1': 'a', 'field2': 'b'}
+        context = ValidationContext({'field2': 'c'}, existing_document, update=True)
+
+        self.assertEqual(context.merged_document, {'field1': 'a', 'field2': 'c'})
+        self.assertEqual(existing_document, {'field1': 'a', 'field2': 'b'})
+        self.assertTrue(context.update)
+
+
+class TestStrippedValues(TestCase):
+
+    def test_stripped_values(self):
+        context = ValidationContext({'field1': ' a '}, {'field1': 'b', 'field2': 'c  '})
+
+        self.assertEqual(context.get_stripped('field1'), 'a')
+        self.assertEqual(context.get_stripped_values(['field1', 'field2', 'field3']), ['a', 'c', ''])
+        self.assertEqual(context.document_keys, frozenset(['field1']))
+
+    def test_numbers(self):
+        context = ValidationContext({'field1': ' 1.5 ', 'field2': 'abc', 'field3': ' '}, {})
+
+        self.assertEqual(context.get_number('field1'), 1.5)
+        self.assertIsNone(context.get_number('field2'))
+        self.assertIsNone(context.get_number('field3'))
+        self.assertIsNone(context.get_number('field4'))
+
+    def test_coordinates(self):
+        context = ValidationContext({'latitude': '-000001.5', 'longitude': ' 0000001 '}, {})
+
+        self.assertEqual(context.get_coordinate('latitude'), -150)
+        self.assertEqual(context.get_coordinate('longitude'), 100)
+
+    def test_coordinates_rejected_by_single_field_rules(self):
+        context = ValidationContext({'latitude': ' 43300', 'longitude': ' 893000'}, {})
+
+        self.assertIsNone(context.get_coordinate('latitude'))
+        self.assertIsNone(context.get_coordinate('longitude'))
+        self.assertIsNone(ValidationContext({}, {}).get_coordinate('latitude'))
+
+
+class TestGetReference(TestCase):
+
+    def test_lookup_is_made_once_for_each_set_of_arguments(self):
+        calls = []
+
+        def lookup(country, state):
+            calls.append((country, state))
+            return {'stateFipsCode': state}
+
+        context = ValidationContext({}, {})
+
+        self.assertEqual(context.get_reference(lookup, 'US', '55'), {'stateFipsCode': '55'})
+        self.assertEqual(context.get_reference(lookup, 'US', '55'), {'stateFipsCode': '55'})
+        self.assertEqual(context.get_reference(lookup, 'US', '01'), {'stateFipsCode': '01'})
+        self.assertEqual(calls, [('US', '55'), ('US', '01')])
+
+    def test_lookups_are_not_shared_between_contexts(self):
+        calls = []
+
+        def lookup(country):
+            calls.append(country)
+            return country
+
+        ValidationContext({}, {}).get_reference(lookup, 'US')
+        ValidationContext({}, {}).get_reference(lookup, 'US')
+
+        self.assertEqual(calls, ['US', 'US'])
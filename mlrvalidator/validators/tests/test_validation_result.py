@@ -0,0 +1,23 @@
+
+from unittest import TestCase
+
+from ..validation_result import ValidationResult
+
+class ValidationResultTestCase(TestCase):
+
+    def test_passed(self):
+        result = ValidationResult()
+        self.assertTrue(result.passed)
+        self.assertTrue(result)
+        self.assertEqual(result.errors, {})
+        self.assertEqual(result.warnings, {})
+
+    def test_errors(self):
+        result = ValidationResult(errors={'A': ['Invalid']})
+        self.assertFalse(result.passed)
+        self.assertFalse(result)
+
+    def test_warnings(self):
+        result = ValidationResult(warnings={'A': ['Suspicious']})
+        self.assertFalse(result.passed)
+        self.assertFalse(result)
@@ -13,12 +13,9 @@ class ErrorValidatorErrorsTestCase(TestCase):
         mcross_ref = mcross_ref_class.return_value
         mcross = mcross_class.return_value
 
-        msingle_field.validate.return_value = True
-        msingle_field.errors = {}
-        mcross_ref.validate.return_value = True
-        mcross_ref.errors = {}
-        mcross.validate.return_value = True
-        mcross.errors = {}
+        msingle_field.validate_context.return_value = {}
+        mcross_ref.validate_context.return_value = {}
+        mcross.validate_context.return_value = {}
 
         validator = WarningValidator('schema_dir', 'ref_dir')
 
@@ -30,12 +27,9 @@ class ErrorValidatorErrorsTestCase(TestCase):
         msingle_field = msingle_field_class.return_value
         mcross = mcross_class.return_value
 
-        msingle_field.validate.return_value = False
-        msingle_field.errors = {'A' : ['Invalid']}
-        mcross_ref.validate.return_value = True
-        mcross_ref.errors = {}
-        mcross.validate.return_value = True
-        mcross.errors = {}
+        msingle_field.validate_context.return_value = {'A' : ['Invalid']}
+        mcross_ref.validate_context.return_value = {}
+        mcross.validate_context.return_value = {}
 
         validator = WarningValidator('schema_dir', 'ref_dir')
 
@@ -48,12 +42,9 @@ class ErrorValidatorErrorsTestCase(TestCase):
         msingle_field = msingle_field_class.return_value
         mcross = mcross_class.return_value
 
-        msingle_field.validate.return_value = True
-        msingle_field.errors = {}
-        mcross_ref.validate.return_value = False
-        mcross_ref.errors = {'A': ['Not good'], 'B': ['No match']}
-        mcross.validate.return_value = True
-        mcross.errors = {}
+        msingle_field.validate_context.return_value = {}
+        mcross_ref.validate_context.return_value = {'A': ['Not good'], 'B': ['No match']}
+        mcross.validate_context.return_value = {}
 
         validator = WarningValidator('schema_dir', 'ref_dir')
 
@@ -67,12 +58,9 @@ class ErrorValidatorErrorsTestCase(TestCase):
         msingle_field = msingle_field_class.return_value
         mcross = mcross_class.return_value
 
-        msingle_field.validate.return_value = True
-        msingle_field.errors = {}
-        mcross_ref.validate.return_value = True
-        mcross_ref.errors = {}
-        mcross.validate.return_value = False
-        mcross.errors = {'A': ['Not good'], 'B': ['No match']}
+        msingle_field.validate_context.return_value = {}
+        mcross_ref.validate_context.return_value = {}
+        mcross.validate_context.return_value = {'A': ['Not good'], 'B': ['No match']}
 
         validator = WarningValidator('schema_dir', 'ref_dir')
 
@@ -86,12 +74,9 @@ class ErrorValidatorErrorsTestCase(TestCase):
         msingle_field = msingle_field_class.return_value
         mcross = mcross_class.return_value
 
-        msingle_field.validate.return_value = False
-        msingle_field.errors = {'A': ['Missing info']}
-        mcross_ref.validate.return_value = False
-        mcross_ref.errors = {'A': ['Not good'], 'B': ['No match']}
-        mcross.validate.return_value = False
-        mcross.errors = {'A': ['Bad']}
+        msingle_field.validate_context.return_value = {'A': ['Missing info']}
+        mcross_ref.validate_context.return_value = {'A': ['Not good'], 'B': ['No match']}
+        mcross.validate_context.return_value = {'A': ['Bad']}
 
         validator = WarningValidator('schema_dir', 'ref_dir')
 
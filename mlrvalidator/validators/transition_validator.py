@@ -1,33 +1,59 @@
 
 import os
+import threading
 
-from .reference import SiteTypeInvalidCodes, FieldTransitions
+from .reference import SiteTypeInvalidCodes, FieldTransitions, ReferenceRegistry
+from .validation_context import ValidationContext
 
 class TransitionValidator:
 
-    def __init__(self, reference_dir):
-        self._errors = {}
+    def __init__(self, reference_dir, reference_registry=None):
+        '''
+        :param str reference_dir:
+        :param ReferenceRegistry reference_registry: If not specified a new registry is used.
+        '''
+        if reference_registry is None:
+            reference_registry = ReferenceRegistry()
+        self._local = threading.local()
         self.site_type_invalid_code_list = []
-        self.site_type_transition_ref = FieldTransitions(os.path.join(reference_dir, 'site_type_transition.json'))
-        self.site_type_invalid_code_list = SiteTypeInvalidCodes(os.path.join(reference_dir, 'site_type_invalid.json'))
+        self.site_type_transition_ref = reference_registry.get(
+            FieldTransitions, os.path.join(reference_dir, 'site_type_transition.json'))
+        self.site_type_invalid_code_list = reference_registry.get(
+            SiteTypeInvalidCodes, os.path.join(reference_dir, 'site_type_invalid.json'))
 
-    def validate(self, document, existing_document):
-        self._errors = {}
+    def validate_context(self, context):
+        '''
+        :param ValidationContext context:
+        :return: dict of errors found. Empty if the site type transition is valid.
+        '''
+        errors = {}
 
-        existing_value = existing_document.get('siteTypeCode', '').strip()
-        new_value = document.get('siteTypeCode', '').strip()
+        existing_value = context.existing_document.get('siteTypeCode', '').strip()
+        new_value = context.document.get('siteTypeCode', '').strip()
 
         if existing_value and new_value and (existing_value != new_value):
-            transitions = self.site_type_transition_ref.get_allowed_transitions(existing_value)
-            if transitions and transitions.count(new_value) == 0:
-                self._errors['siteTypeCode'] = ['Can\'t change a siteTypeCode with existing value {0} to {1}'.format(existing_value, new_value)]
+            transitions = self.site_type_transition_ref.get_allowed_transition_set(existing_value)
+            if transitions and new_value not in transitions:
+                errors['siteTypeCode'] = ['Can\'t change a siteTypeCode with existing value {0} to {1}'.format(existing_value, new_value)]
         
         invalid_codes = self.site_type_invalid_code_list.get_site_type_invalid_codes()
         if (existing_value in invalid_codes and new_value is '') or (new_value in invalid_codes):
-            self._errors['siteTypeCode'] = ['Existing record uses a non-valid site type, may not use a non-valid code for site creation or updates. Re-submit with a valid siteTypeCode.']
+            errors['siteTypeCode'] = ['Existing record uses a non-valid site type, may not use a non-valid code for site creation or updates. Re-submit with a valid siteTypeCode.']
+
+        return errors
+
+    def validate(self, document, existing_document):
+        '''
+        After validate is called the errors property will reflect the errors generated by the last call to validate
+        made by the calling thread.
+        :param dict document:
+        :param dict existing_document:
+        :return: boolean
+        '''
+        self._local.errors = self.validate_context(ValidationContext(document, existing_document, update=True))
 
-        return self._errors == {}
+        return self._local.errors == {}
 
     @property
     def errors(self):
-        return self._errors
\ No newline at end of file
+        return getattr(self._local, 'errors', {})
\ No newline at end of file
@@ -0,0 +1,102 @@
+from .dms import parse_latitude, parse_longitude
+
+_COORDINATE_PARSERS = {'latitude': parse_latitude, 'longitude': parse_longitude}
+
+
+class ValidationContext:
+    '''
+    Holds everything that is specific to the validation of a single location. Validators keep no per-request state of
+    their own, so one validator instance can validate several locations at the same time as long as each call uses
+    its own context.
+
+    A single context is shared by all of the error and warning validators for a request, so the merged document is
+    built once and the stripped, numeric and coordinate values of each field and the reference entities, such as the attributes of
+    a state or county, are computed the first time they are asked for.
+    '''
+
+    def __init__(self, document, existing_document, update=False):
+        '''
+        :param dict document: properties of a new location or properties to be merged into an existing location
+        :param dict existing_document: properties of an existing location. Specify an empty dict if there is none.
+        :param boolean update: True if document is an update to existing_document
+        '''
+        self.document = document
+        self.existing_document = existing_document
+        self.update = update
+        self.merged_document = existing_document.copy()
+        self.merged_document.update(document)
+        self.document_keys = frozenset(document)
+        self._stripped_values = {}
+        self._numbers = {}
+        self._coordinates = {}
+        self._references = {}
+
+    def any_fields_in_document(self, keys):
+        '''
+
+        :param list of str keys:
+        :return: boolean
+        '''
+        return not self.document_keys.isdisjoint(keys)
+
+    def get_stripped(self, key):
+        '''
+        :param str key:
+        :return: str - the value of key in the merged document with surrounding white space removed. Empty if the key
+            is missing.
+        '''
+        try:
+            return self._stripped_values[key]
+        except KeyError:
+            value = self._stripped_values[key] = self.merged_document.get(key, '').strip()
+            return value
+
+    def get_stripped_values(self, keys):
+        '''
+        :param list of str keys:
+        :return: list of str - the stripped value of each key in the merged document
+        '''
+        return [self.get_stripped(key) for key in keys]
+
+    def get_number(self, key):
+        '''
+        :param str key:
+        :return: float - the value of key in the merged document or None if the key is missing or the value is not
+            a number.
+        '''
+        try:
+            return self._numbers[key]
+        except KeyError:
+            try:
+                number = float(self.get_stripped(key))
+            except ValueError:
+                number = None
+            self._numbers[key] = number
+            return number
+
+    def get_coordinate(self, key):
+        '''
+        :param str key: latitude or longitude
+        :return: int - the value of key in the merged document in hundredths of a second or None if the key is missing
+            or the value is not accepted by the valid_latitude_dms or valid_longitude_dms rule.
+        '''
+        try:
+            return self._coordinates[key]
+        except KeyError:
+            # The leading space or sign is part of the format, so the value is parsed without stripping it
+            coordinate = self._coordinates[key] = _COORDINATE_PARSERS[key](self.merged_document.get(key, ''))
+            return coordinate
+
+    def get_reference(self, lookup, *args):
+        '''
+        :param function lookup: a reference lookup method such as States.get_state_attributes
+        :param args: the arguments of lookup
+        :return: the value returned by lookup(*args). Lookups are only made the first time, so error and warning rules
+            which use the same reference entity share it.
+        '''
+        key = (lookup, args)
+        try:
+            return self._references[key]
+        except KeyError:
+            value = self._references[key] = lookup(*args)
+            return value
@@ -0,0 +1,23 @@
+class ValidationResult:
+    '''
+    The outcome of validating a single location. A result is truthy when there are no errors and no warnings, so it
+    can be used wherever the boolean returned by validate was used before.
+    '''
+
+    def __init__(self, errors=None, warnings=None):
+        '''
+        :param dict errors: lists of error messages keyed by field
+        :param dict warnings: lists of warning messages keyed by field
+        '''
+        self.errors = errors if errors is not None else {}
+        self.warnings = warnings if warnings is not None else {}
+
+    @property
+    def passed(self):
+        return self.errors == {} and self.warnings == {}
+
+    def __bool__(self):
+        return self.passed
+
+    def __repr__(self):
+        return 'ValidationResult(errors={0!r}, warnings={1!r})'.format(dict(self.errors), dict(self.warnings))
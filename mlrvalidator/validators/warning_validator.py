@@ -1,38 +1,86 @@
 from collections import defaultdict
 from itertools import chain
 import os
+import threading
 import yaml
 
+from mlrvalidator.startup_profile import profile_phase
 from .cross_field_ref_warning_validator import CrossFieldRefWarningValidator
 from .cross_field_warning_validator import CrossFieldWarningValidator
+from .reference import ReferenceRegistry
 from .single_field_validator import SingleFieldValidator
+from .validation_context import ValidationContext
+from .validation_result import ValidationResult
 
 class WarningValidator:
 
-    def __init__(self, schema_dir, reference_file_dir):
-        with open(os.path.join(schema_dir, 'warning_schema.yml')) as fd:
-            warning_schema = yaml.load(fd.read())
+    def __init__(self, schema_dir, reference_file_dir, reference_registry=None, metrics=None):
+        '''
+        :param str schema_dir:
+        :param str reference_file_dir:
+        :param ReferenceRegistry reference_registry: Registry used to load the reference files. Pass the same
+            registry to other validators to share the loaded references. If not specified a new registry is used.
+        :param ValidationMetrics metrics: If specified, the stages and rules of the validator are timed.
+        '''
+        if reference_registry is None:
+            reference_registry = ReferenceRegistry()
 
-        self.single_field_validator = SingleFieldValidator(warning_schema, reference_dir=reference_file_dir, allow_unknown=True)
-        self.cross_field_ref_validator = CrossFieldRefWarningValidator(reference_file_dir)
+        # Loading the schema includes its validation by Cerberus and its compilation into checks
+        with profile_phase('schema:warning_schema.yml'):
+            with open(os.path.join(schema_dir, 'warning_schema.yml')) as fd:
+                warning_schema = yaml.load(fd.read())
+            self.single_field_validator = SingleFieldValidator(warning_schema, reference_dir=reference_file_dir,
+                                                               reference_registry=reference_registry,
+                                                               metrics=metrics, allow_unknown=True)
+        self.cross_field_ref_validator = CrossFieldRefWarningValidator(reference_file_dir, reference_registry=reference_registry)
         self.cross_field_validator = CrossFieldWarningValidator()
-        self._warnings = defaultdict(list)
+        self._local = threading.local()
+
+        if metrics is not None:
+            metrics.instrument_cross_field_validator(self.cross_field_validator)
+            metrics.instrument_cross_field_validator(self.cross_field_ref_validator)
+            metrics.instrument_stages(self)
 
     def validate(self, ddot_location, existing_location, update=False):
-        self.single_field_validator.validate(ddot_location, update=update)
-        self.cross_field_ref_validator.validate(ddot_location, existing_location)
-        self.cross_field_validator.validate(ddot_location, existing_location)
+        """
+        :param ddot_location: dict describing properties of a new location or properties to be merged into an existing location
+        :param existing_location: dict describing properties of an existing location. Specify an empty dict if there is none.
+        :param update: Boolean True if the properties in ddot_location should be merged into existing_location.
+        :return: ValidationResult containing the warnings found. The result is truthy if there are no warnings.
+            The warnings property will reflect the warnings generated by the last call to validate made by the calling thread.
+        """
+        return self.validate_context(ValidationContext(ddot_location, existing_location, update=update))
+
+    def validate_context(self, context):
+        '''
+        Validates the location in context. The context can be shared with an ErrorValidator so that the merged
+        document and the stripped values are only computed once.
+        :param ValidationContext context:
+        :return: ValidationResult containing the warnings found
+        '''
+        single_field_warnings = self.single_field_validator.validate_context(context)
+        cross_field_ref_warnings = self.cross_field_ref_validator.validate_context(context)
+        cross_field_warnings = self.cross_field_validator.validate_context(context)
 
-        self._warnings = defaultdict(list)
-        all_warnings = chain(self.single_field_validator.errors.items(),
-                             self.cross_field_ref_validator.errors.items(),
-                             self.cross_field_validator.errors.items())
+        warnings = defaultdict(list)
+        all_warnings = chain(single_field_warnings.items(),
+                             cross_field_ref_warnings.items(),
+                             cross_field_warnings.items())
 
         for k, v in chain(all_warnings):
-            self._warnings[k].extend(v)
+            warnings[k].extend(v)
+
+        self._local.warnings = warnings
+        return ValidationResult(warnings=warnings)
 
-        return self._warnings == {}
+    def rule_coverage(self):
+        '''
+        :return: dict of the coverage statistics of the rule registry of each cross field stage, keyed by the stage
+            attribute name. Useful for checking which rules are run by the locations being validated.
+        '''
+        return {name: getattr(self, name).rule_registry.coverage()
+                for name in ['cross_field_validator', 'cross_field_ref_validator']}
 
     @property
     def warnings(self):
-        return self._warnings
\ No newline at end of file
+        return getattr(self._local, 'warnings', defaultdict(list))
\ No newline at end of file
@@ -41,5 +41,5 @@ setup(name='usgs_wma_mlr_validator',
       platforms='any',
       zip_safe=False,
       py_modules=['config', 'app'],
-      packages=find_packages()
+      packages=find_packages(exclude=['benchmarks', 'benchmarks.*'])
       )